@@ -25,6 +25,8 @@ def init(verbose=False):
     if verbose:
         print(f"Changed working directory to: {DJANGO_PROJECT_ROOT}")
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", DJANGO_SETTINGS_MODULE)
+    # Only needed for sync invoke() calls inside Jupyter's event loop; the
+    # tools also have async implementations that work with ainvoke()/astream().
     os.environ["DJANGO_ALLOW_ASYNC_UNSAFE"] = "true"
     import django
 
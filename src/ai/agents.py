@@ -1,36 +1,47 @@
 from langgraph.prebuilt import create_react_agent
-from langchain.agents import AgentExecutor
-from ai.llms import get_groq_model
+from ai.llms import get_model
+from ai.history import make_pre_model_hook
 from ai.tools.documents import (
     make_list_documents_tool,
     make_get_document_tool,
     make_create_document_tool,
     make_update_document_tool,
     make_delete_document_tool,
-    make_search_documents_tool
+    make_search_documents_tool,
+    make_bulk_create_documents_tool,
+    make_bulk_update_documents_tool,
+    make_bulk_delete_documents_tool
 )
 from ai.tools.movie_discovery import (
     make_search_movies_tool,
-    make_movie_detail_tool
+    make_movie_detail_tool,
+    make_movie_details_batch_tool
 )
 
-def get_document_agent(config, checkpointer=None):
-    model = get_groq_model()
+def get_document_agent(config=None, checkpointer=None, model=None):
+    # `config` is kept for backwards compatibility only: tools read user_id
+    # from the runtime config passed to invoke/stream, so the compiled agent
+    # can be shared (see ai.graphs).
+    if model is None:
+        model = get_model("agent")
 
-    # Dynamically inject config into each tool
     document_tools = [
-        make_list_documents_tool(config),
-        make_get_document_tool(config),
-        make_create_document_tool(config),
-        make_update_document_tool(config),
-        make_delete_document_tool(config),
-        make_search_documents_tool(config),
+        make_list_documents_tool(),
+        make_get_document_tool(),
+        make_create_document_tool(),
+        make_update_document_tool(),
+        make_delete_document_tool(),
+        make_search_documents_tool(),
+        make_bulk_create_documents_tool(),
+        make_bulk_update_documents_tool(),
+        make_bulk_delete_documents_tool(),
     ]
 
     agent = create_react_agent(
         name="document_agent",
         model=model,
         tools=document_tools,
+        pre_model_hook=make_pre_model_hook(),
         prompt=(
             "You are a document management specialist responsible for all document operations.\n\n"
         
@@ -38,18 +49,21 @@ def get_document_agent(config, checkpointer=None):
             
             "1. list_documents\n"
             "   Purpose: Show user's most recent documents\n"
-            "   Parameters: {\"limit\": 5}  // optional, defaults to 5, max 25\n"
-            "   Use when: User asks for 'recent', 'latest', 'all', or 'list' documents\n\n"
+            "   Parameters: {\"limit\": 5, \"cursor\": \"...\"}  // both optional, limit defaults to 5, max 25\n"
+            "   Use when: User asks for 'recent', 'latest', 'all', or 'list' documents\n"
+            "   Paging: if the result has next_cursor, call again with cursor set to it to see the next page\n\n"
             
             "2. search_documents\n"
             "   Purpose: Find documents by keyword in title or content\n"
-            "   Parameters: {\"query\": \"search term\", \"limit\": 5}  // query required, limit optional\n"
-            "   Use when: User asks to 'find', 'search for', or mentions specific topics\n\n"
+            "   Parameters: {\"query\": \"search term\", \"limit\": 5, \"cursor\": \"...\"}  // query required, limit and cursor optional\n"
+            "   Use when: User asks to 'find', 'search for', or mentions specific topics\n"
+            "   Paging: pass the returned next_cursor as cursor with the SAME query to get more matches\n\n"
             
             "3. get_document\n"
             "   Purpose: Retrieve full details of a specific document\n"
-            "   Parameters: {\"document_id\": 123}  // document_id is required integer\n"
-            "   Use when: User wants to 'view', 'read', or 'open' a specific document by ID\n\n"
+            "   Parameters: {\"document_id\": 123, \"section\": 2, \"sections\": 1}  // document_id required, section/sections optional\n"
+            "   Use when: User wants to 'view', 'read', or 'open' a specific document by ID\n"
+            "   Long documents come back in sections: read the section search_documents reported instead of paging through everything; next_section is the one after those returned\n\n"
             
             "4. create_document\n"
             "   Purpose: Create a new document\n"
@@ -67,6 +81,13 @@ def get_document_agent(config, checkpointer=None):
             "   Purpose: Remove a document\n"
             "   Parameters: {\"document_id\": 123}  // document_id is required integer\n"
             "   Use when: User asks to 'delete', 'remove', or 'erase' a document\n\n"
+
+            "7. bulk_create_documents / bulk_update_documents / bulk_delete_documents\n"
+            "   Purpose: Create, update or delete several documents in ONE call\n"
+            "   Parameters: {\"documents\": [{\"title\": \"...\", \"content\": \"...\"}]}, "
+            "{\"updates\": [{\"document_id\": 1, \"title\": \"...\"}]}, {\"document_ids\": [1, 2]}\n"
+            "   Use when: The request affects more than one document ('delete all my drafts about X', "
+            "'create a document for each of these movies'). Never loop over the single-document tools.\n\n"
             
             "REQUEST INTERPRETATION RULES:\n"
             "- 'Give me summary of X' → search_documents for X, then get_document if found\n"
@@ -95,38 +116,44 @@ def get_document_agent(config, checkpointer=None):
             "- For operations requiring document_id, ensure you have the correct ID first\n"
             "- Only create documents when explicitly requested\n"
             "- Confirm successful operations by showing results\n"
-            "- Tool outputs are formatted as strings. Parse document IDs from strings (e.g., 'ID 123: Title') for follow-up actions like get_document.\n\n"
+            "- Tool outputs are compact JSON. Take document IDs from the `id` fields (e.g. {\"id\":123,\"title\":\"...\"}) for follow-up actions like get_document.\n\n"
             
             "You must use these exact parameter formats for each tool to avoid validation errors."
         ),
         checkpointer=checkpointer
     )
-    # Wrap in AgentExecutor with verbose logging for debugging
-    return AgentExecutor(agent=agent, tools=document_tools, verbose=True)
+    # Return the compiled graph itself: create_supervisor needs a named graph,
+    # which an AgentExecutor wrapper does not provide.
+    return agent
 
-def get_movie_discovery_agent(config, checkpointer=None):
-    model = get_groq_model()
+def get_movie_discovery_agent(config=None, checkpointer=None, model=None):
+    if model is None:
+        model = get_model("agent")
 
-    # Dynamically inject config into each tool
     movie_tools = [
-        make_search_movies_tool(config),
-        make_movie_detail_tool(config)
+        make_search_movies_tool(),
+        make_movie_detail_tool(),
+        make_movie_details_batch_tool()
     ]
 
     agent = create_react_agent(
         name="movie_discovery_agent",
         model=model,
         tools=movie_tools,
+        pre_model_hook=make_pre_model_hook(),
         prompt=(
             "You are a movie discovery specialist that helps find and retrieve detailed movie information.\n\n"
             
             "CAPABILITIES:\n"
             "• Use `search_movies` to find movies by title, genre, or keywords\n"
-            "• Use `movie_detail` to get comprehensive information about a specific movie\n\n"
+            "• Use `movie_detail` to get comprehensive information about a specific movie\n"
+            "• Use `movie_details_batch` with a list of movie IDs to get details for several movies in one call\n"
+            "• Tool outputs are compact JSON: take movie IDs from the `id` fields; failures come back as {\"error\": \"...\"}\n\n"
             
             "WORKFLOW:\n"
             "1. When asked about a movie, first search to find the correct movie\n"
-            "2. Get detailed information using the movie ID from search results\n"
+            "2. Get detailed information using the movie ID from search results "
+            "(use movie_details_batch when you need more than one movie)\n"
             "3. Provide comprehensive movie information including:\n"
             "   - Title and release year\n"
             "   - Plot/overview\n"
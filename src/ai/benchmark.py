@@ -0,0 +1,314 @@
+"""
+Offline benchmark of the agent graphs and tools.
+
+Runs the real main_supervisor graph, the document tools and the movie tools
+with the fake chat model (ai.fake_llm) and a local TMDB stand-in
+(tmdb.stub), so it needs no network access or API keys. Use it through
+`manage.py benchmark_agents`, which runs it on a throwaway test database.
+
+Each scenario is a first conversation turn sent by every seeded user in
+turn. Results hold throughput and p50/p95/p99 latency per scenario, per
+component inside the scenarios (graph nodes, model calls, tools) and per
+tool called directly, with the mean tokens of its results. They are plain JSON: compare() checks a run against
+a saved baseline.
+"""
+import asyncio
+import platform
+import random
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack
+
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+from ai import cache, graphs
+from ai.metrics import MetricsCallbackHandler, result_tokens
+from ai.tools.documents import make_get_document_tool, make_list_documents_tool, make_search_documents_tool
+from ai.tools.movie_discovery import make_movie_detail_tool, make_search_movies_tool
+from documents import chunks, search, vectors
+from documents.models import Document
+from tmdb import client as tmdb_client
+from tmdb.cache import tmdb_cache
+from tmdb.stub import StubTMDBServer
+
+# Messages sent by each scenario; {document_id} is one of the user's documents
+SCENARIOS = {
+    "command_list": "list my documents",
+    "command_get": "get document {document_id}",
+    "document_search": "find my notes about dreams",
+    "supervisor": "What do I have saved?",
+    "movie_search": "search movies about space",
+    "fan_out": "search movies about heists; list my documents",
+}
+
+# Tools called directly, with their arguments for one of the user's documents
+TOOLS = {
+    "list_documents": (make_list_documents_tool, lambda document_id: {"limit": 10}),
+    "search_documents": (make_search_documents_tool, lambda document_id: {"query": "dreams about space", "limit": 10}),
+    "get_document": (make_get_document_tool, lambda document_id: {"document_id": document_id}),
+    "search_movies": (make_search_movies_tool, lambda document_id: {"query": "inception"}),
+    "movie_detail": (make_movie_detail_tool, lambda document_id: {"movie_id": 27205}),
+}
+
+WORDS = (
+    "dreams space heist movie director scene script draft review notes plot character ending sequel "
+    "budget cast camera score actor festival premiere memory time travel city ocean night light"
+).split()
+
+
+def percentile(samples, q):
+    """The Q-th percentile (0-100) of SAMPLES, interpolating between ranks."""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples, wall=None):
+    """Latency summary of SAMPLES (seconds) in milliseconds; throughput when WALL is given."""
+    summary = {"count": len(samples)}
+    if samples:
+        summary.update({
+            "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+            "p50_ms": round(percentile(samples, 50) * 1000, 3),
+            "p95_ms": round(percentile(samples, 95) * 1000, 3),
+            "p99_ms": round(percentile(samples, 99) * 1000, 3),
+            "max_ms": round(max(samples) * 1000, 3),
+        })
+    if wall:
+        summary["throughput_rps"] = round(len(samples) / wall, 3)
+    return summary
+
+
+class TimingRecorder(MetricsCallbackHandler):
+    """Collects the time of every node, model call and tool call of a scenario."""
+
+    def __init__(self):
+        super().__init__()
+        self.samples = defaultdict(list)
+
+    def timed(self, kind, name, elapsed):
+        self.samples[f"{kind}:{name}"].append(elapsed)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, "tool", kwargs.get("name") or (serialized or {}).get("name"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        elapsed, labels = self._stop(run_id)
+        if labels is not None:
+            self.timed(*labels, elapsed)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self.on_tool_end(None, run_id=run_id)
+
+
+def _content(rng, words):
+    sentences = []
+    while words > 0:
+        length = rng.randint(8, 20)
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+        words -= length
+    return " ".join(sentences)
+
+
+def seed(users=5, documents=50, words=300, rng_seed=0):
+    """
+    Create USERS users with DOCUMENTS documents of about WORDS words each and
+    build the search indexes. Returns [(user, [document ids])].
+    """
+    rng = random.Random(rng_seed)
+    User = get_user_model()
+    seeded = []
+    with transaction.atomic():
+        for i in range(users):
+            user = User.objects.create(username=f"bench-{i}-{uuid.uuid4().hex[:8]}")
+            docs = Document.objects.bulk_create([
+                Document(
+                    owner=user,
+                    title=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {n}",
+                    content=_content(rng, rng.randint(words // 2, words * 2)),
+                )
+                for n in range(documents)
+            ])
+            seeded.append((user, [doc.id for doc in docs]))
+        # bulk_create skips the per-save index updates
+        search.rebuild_index()
+        chunks.rebuild_chunks()
+    vectors.rebuild_vectors()
+    return seeded
+
+
+async def _timed_runs(seeded, runs, concurrency, call):
+    """Call CALL(user, document ids, i) RUNS times, at most CONCURRENCY at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+    samples, errors = [], []
+
+    async def one(i):
+        user, document_ids = seeded[i % len(seeded)]
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(user, document_ids, i)
+            except Exception as e:
+                errors.append(f"{e.__class__.__name__}: {e}")
+                return
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(runs)))
+    return samples, errors, time.perf_counter() - started
+
+
+async def run_scenarios(seeded, scenarios=None, runs=20, concurrency=1, warmup=1):
+    graph = graphs.get_graph("main_supervisor")
+    results = {}
+    for name in scenarios or SCENARIOS:
+        recorder = TimingRecorder()
+
+        async def turn(user, document_ids, i, callbacks=(recorder,), message=SCENARIOS[name]):
+            config = {
+                "configurable": {
+                    "user_id": user.id, "thread_id": f"bench-{uuid.uuid4().hex}", "turn_id": uuid.uuid4().hex,
+                },
+                "callbacks": list(callbacks),
+            }
+            text = message.format(document_id=document_ids[i % len(document_ids)])
+            result = await graph.ainvoke({"messages": [{"role": "user", "content": text}]}, config)
+            if not result["messages"][-1].content:
+                raise ValueError("empty reply")
+
+        # Warm-up turns build lazy state (clients, caches) and are not measured
+        await _timed_runs(seeded, warmup * len(seeded), concurrency, lambda *args: turn(*args, callbacks=()))
+        samples, errors, wall = await _timed_runs(seeded, runs, concurrency, turn)
+        results[name] = {
+            **summarize(samples, wall),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "components": {component: summarize(times) for component, times in sorted(recorder.samples.items())},
+        }
+    return results
+
+
+async def run_tools(seeded, tools=None, runs=20, concurrency=1):
+    results = {}
+    for name in tools or TOOLS:
+        make_tool, arguments = TOOLS[name]
+        tool = make_tool()
+
+        tokens = []
+
+        async def call(user, document_ids, i, tool=tool, arguments=arguments, tokens=tokens):
+            result = await tool.ainvoke(arguments(document_ids[i % len(document_ids)]), {"configurable": {"user_id": user.id}})
+            tokens.append(result_tokens(result))
+
+        samples, errors, wall = await _timed_runs(seeded, runs, concurrency, call)
+        results[name] = {
+            **summarize(samples, wall),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "result_tokens": round(sum(tokens) / len(tokens), 1) if tokens else None,
+        }
+    return results
+
+
+def benchmark_settings(llm_latency=0.0, tmdb_url=None, vector_dir=None, checkpointer=None, caches=False):
+    """Settings for an offline run: fake models, no rate limits and, unless CACHES, no reply or tool call caching."""
+    overrides = {
+        "AI_LLM_BACKEND": "fake",
+        "AI_FAKE_LLM_LATENCY": llm_latency,
+        "AI_RATE_LIMITS": {"default": (10 ** 9, 10 ** 12)},
+        "TMDB_API_KEY": "benchmark",
+    }
+    if tmdb_url:
+        overrides["TMDB_BASE_URL"] = tmdb_url
+    if vector_dir:
+        overrides["DOCUMENT_VECTOR_DIR"] = vector_dir
+    if checkpointer:
+        overrides["AI_CHECKPOINTER"] = checkpointer
+    if not caches:
+        overrides.update(AI_RESPONSE_CACHE_TTL=0, AI_LLM_CACHE_TTL=0, AI_TOOL_MEMO_TTL=0)
+    return override_settings(**overrides)
+
+
+def _reset():
+    graphs.reset()
+    tmdb_client.reset_clients()
+    cache.get_response_cache.cache_clear()
+    cache.get_llm_cache.cache_clear()
+    cache.get_tool_memo.cache_clear()
+
+
+def run_benchmark(users=5, documents=50, words=300, runs=20, concurrency=1, warmup=1, llm_latency=0.0,
+                  tmdb_latency=0.0, checkpointer=None, caches=False, scenarios=None, tools=None):
+    """Seed the current database, run every scenario and tool, and return the results."""
+    with ExitStack() as stack:
+        server = stack.enter_context(StubTMDBServer(latency=tmdb_latency))
+        vector_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        stack.enter_context(benchmark_settings(llm_latency, server.url, vector_dir, checkpointer, caches))
+        stack.callback(_reset)
+        _reset()
+
+        # Only the in-process tier of the TMDB cache, so runs start cold and
+        # leave the persistent cache alone
+        alias, tmdb_cache.alias = tmdb_cache.alias, None
+        stack.callback(setattr, tmdb_cache, "alias", alias)
+        tmdb_cache.local.clear()
+        tmdb_cache.counters.clear()
+
+        started = time.perf_counter()
+        seeded = seed(users, documents, words)
+        seed_seconds = time.perf_counter() - started
+
+        scenario_results = asyncio.run(run_scenarios(seeded, scenarios, runs, concurrency, warmup))
+        tool_results = asyncio.run(run_tools(seeded, tools, runs, concurrency))
+
+        return {
+            "config": {
+                "users": users,
+                "documents_per_user": documents,
+                "words_per_document": words,
+                "runs": runs,
+                "concurrency": concurrency,
+                "warmup": warmup,
+                "llm_latency": llm_latency,
+                "tmdb_latency": tmdb_latency,
+                "checkpointer": checkpointer,
+                "caches": caches,
+            },
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "seed_seconds": round(seed_seconds, 3),
+            "scenarios": scenario_results,
+            "tools": tool_results,
+            "tmdb": {"requests": server.requests, "cache": tmdb_client.cache_stats()},
+        }
+
+
+def compare(results, baseline, max_regression=0.2, metric="p95_ms"):
+    """
+    Return a message for each scenario or tool whose METRIC got more than
+    MAX_REGRESSION (a fraction) worse than in BASELINE, or that now fails.
+    """
+    regressions = []
+    for section in ("scenarios", "tools"):
+        for name, result in results.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            if result.get("errors") and not before.get("errors"):
+                regressions.append(f"{section}/{name}: {result['errors']} errors ({result['first_error']})")
+            old, new = before.get(metric), result.get(metric)
+            if old and new and new > old * (1 + max_regression):
+                regressions.append(f"{section}/{name}: {metric} {old:.1f} -> {new:.1f} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
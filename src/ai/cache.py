@@ -0,0 +1,297 @@
+"""
+Caches in front of the supervisor graph and the chat model API.
+
+ResponseCache keeps the supervisor's reply to the first message of a
+conversation. Entries are keyed on the normalized message, the graph, the
+model and the user's documents version. Every document tool that writes
+calls bump_documents_version(), so a reply that read documents is never
+served after they change. A turn that wrote documents itself is never
+cached. With settings.AI_RESPONSE_CACHE_SIMILARITY above 0, a message whose
+embedding is at least that similar to a cached one (same user and version)
+shares its entry.
+
+DjangoLLMCache is a LangChain BaseCache for the chat models. A model call
+with exactly the same prompt, tool results included, and the same
+parameters is answered without calling the API.
+
+ToolMemo answers a repeated read-only tool call (same tool and arguments)
+in the same conversation turn with the earlier result, e.g. when a ReAct
+loop or a handoff repeats search_documents or movie_detail. Turns are told
+apart by the "turn_id" ai.views puts in the config. Document tool entries
+are keyed on the user's documents version too, so a write earlier in the
+turn is seen. Error results are never kept.
+
+All three live in the settings.AI_CACHE_ALIAS cache. Their TTLs and the
+backend's MAX_ENTRIES bound them.
+"""
+import functools
+import hashlib
+import json
+import re
+import uuid
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from langchain_core.caches import BaseCache
+from langchain_core.messages import AIMessage
+
+from ai import metrics
+from ai.tools import output
+from documents.embeddings import get_embedder
+
+# Most recent messages per user/version compared by embedding similarity
+MAX_SIMILAR_ENTRIES = 50
+
+
+def _cache():
+    return caches[settings.AI_CACHE_ALIAS]
+
+
+def _digest(*parts):
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode()).hexdigest()
+
+
+def normalize_prompt(text):
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", text or "").strip().lower().rstrip("?!. ")
+
+
+def _models():
+    return f"{settings.AI_LLM_BACKEND}:" + ",".join(f"{role}={name}" for role, name in sorted(settings.AI_MODELS.items()))
+
+
+def _version_key(user_id):
+    return f"ai:documents-version:{user_id}"
+
+
+def documents_version(user_id):
+    """
+    Opaque token that changes whenever USER_ID's documents change. It is
+    random rather than a counter: if the backend evicts it, the replacement
+    can't collide with a version older entries were stored under.
+    """
+    cache = _cache()
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = uuid.uuid4().hex
+        # Another request may have created it in the meantime
+        if not cache.add(_version_key(user_id), version, timeout=None):
+            version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def bump_documents_version(user_id):
+    _cache().set(_version_key(user_id), uuid.uuid4().hex, timeout=None)
+
+
+class ResponseCache:
+    def __init__(self, ttl=None, similarity=None):
+        self.ttl = settings.AI_RESPONSE_CACHE_TTL if ttl is None else ttl
+        self.similarity = settings.AI_RESPONSE_CACHE_SIMILARITY if similarity is None else similarity
+        self.hits = 0
+        self.misses = 0
+
+    def _scope(self, user_id, version, graph, model):
+        return _digest(graph, model or _models(), user_id, version)
+
+    def _most_similar(self, scope, prompt):
+        entries = _cache().get(f"ai:response-index:{scope}")
+        if not entries:
+            return None
+        query = get_embedder().embed([prompt])[0]
+        scores = np.stack([vector for _, vector in entries]) @ query
+        best = int(np.argmax(scores))
+        return entries[best][0] if scores[best] >= self.similarity else None
+
+    def get(self, user_id, message, graph="main_supervisor", model=None):
+        """
+        Return (reply or None, version). Pass the version back to set() so a
+        turn that changed the user's documents is not cached.
+        """
+        version = documents_version(user_id)
+        if not self.ttl:
+            return None, version
+
+        scope = self._scope(user_id, version, graph, model)
+        prompt = normalize_prompt(message)
+        reply = _cache().get(f"ai:response:{scope}:{_digest(prompt)}")
+        if reply is None and self.similarity > 0:
+            similar = self._most_similar(scope, prompt)
+            if similar is not None:
+                reply = _cache().get(f"ai:response:{scope}:{_digest(similar)}")
+
+        if reply is None:
+            self.misses += 1
+            metrics.RESPONSE_CACHE.labels("miss").inc()
+        else:
+            self.hits += 1
+            metrics.RESPONSE_CACHE.labels("hit").inc()
+        return reply, version
+
+    def set(self, user_id, message, reply, version, graph="main_supervisor", model=None):
+        if not self.ttl or not reply or documents_version(user_id) != version:
+            return False
+
+        scope = self._scope(user_id, version, graph, model)
+        prompt = normalize_prompt(message)
+        cache = _cache()
+        cache.set(f"ai:response:{scope}:{_digest(prompt)}", reply, self.ttl)
+        if self.similarity > 0:
+            index_key = f"ai:response-index:{scope}"
+            entries = [entry for entry in cache.get(index_key, []) if entry[0] != prompt]
+            entries.append((prompt, get_embedder().embed([prompt])[0]))
+            cache.set(index_key, entries[-MAX_SIMILAR_ENTRIES:], self.ttl)
+        return True
+
+
+def _with_fresh_ids(generation):
+    """
+    Give a cached generation new message and tool call ids; reusing them
+    would make LangGraph's add_messages overwrite the earlier message.
+    """
+    message = getattr(generation, "message", None)
+    if not isinstance(message, AIMessage):
+        return generation
+
+    ids = {call["id"]: f"call_{uuid.uuid4().hex[:24]}" for call in message.tool_calls if call.get("id")}
+    additional_kwargs = dict(message.additional_kwargs)
+    if "tool_calls" in additional_kwargs:
+        additional_kwargs["tool_calls"] = [
+            {**call, "id": ids.get(call.get("id"), call.get("id"))} for call in additional_kwargs["tool_calls"]
+        ]
+    message = message.model_copy(update={
+        "id": None,
+        "tool_calls": [{**call, "id": ids.get(call.get("id"), call.get("id"))} for call in message.tool_calls],
+        "additional_kwargs": additional_kwargs,
+    })
+    return generation.model_copy(update={"message": message})
+
+
+class DjangoLLMCache(BaseCache):
+    """LangChain model cache stored in a Django cache backend with a TTL."""
+
+    def __init__(self, ttl=None):
+        self.ttl = settings.AI_LLM_CACHE_TTL if ttl is None else ttl
+
+    def _key(self, prompt, llm_string):
+        return f"ai:llm:{_digest(llm_string, prompt)}"
+
+    def lookup(self, prompt, llm_string):
+        generations = _cache().get(self._key(prompt, llm_string))
+        if generations is None:
+            return None
+        return [_with_fresh_ids(generation) for generation in generations]
+
+    def update(self, prompt, llm_string, return_val):
+        _cache().set(self._key(prompt, llm_string), return_val, self.ttl)
+
+    def clear(self, **kwargs):
+        _cache().clear()
+
+
+class ToolMemo:
+    def __init__(self, ttl=None):
+        self.ttl = settings.AI_TOOL_MEMO_TTL if ttl is None else ttl
+
+    def key(self, tool, config, args, kwargs, documents=True):
+        """
+        Cache key of a call, or None when it can't be memoized (not part of a
+        turn, or memo disabled). DOCUMENTS keys it on the documents version.
+        """
+        configurable = (config or {}).get("configurable", {})
+        turn_id = configurable.get("turn_id")
+        if not self.ttl or turn_id is None:
+            return None
+        user_id = configurable.get("user_id")
+        version = documents_version(user_id) if documents else None
+        arguments = json.dumps([args, kwargs], sort_keys=True, default=str)
+        return f"ai:tool-memo:{_digest(turn_id, user_id, version, tool, arguments)}"
+
+    def get(self, key):
+        result = _cache().get(key)
+        metrics.TOOL_MEMO.labels("miss" if result is None else "hit").inc()
+        return result
+
+    def set(self, key, result):
+        # Errors are often transient (rate limits, timeouts): let the next call retry
+        if result is None or output.is_error(result):
+            return
+        _cache().set(key, result, self.ttl)
+
+
+def memoized_tool(make_tool=None, *, documents=True):
+    """
+    Decorate the make_*_tool factory of a read-only tool so repeated calls in
+    a turn are answered by get_tool_memo(). Write tools must not use it; tools
+    that don't read documents pass documents=False.
+    """
+    if make_tool is None:
+        return functools.partial(memoized_tool, documents=documents)
+
+    def _split(kwargs):
+        return kwargs.get("config"), {key: value for key, value in kwargs.items() if key != "config"}
+
+    def memoize(name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            memo = get_tool_memo()
+            config, arguments = _split(kwargs)
+            key = memo.key(name, config, args, arguments, documents)
+            if key is not None:
+                result = memo.get(key)
+                if result is not None:
+                    return result
+            result = func(*args, **kwargs)
+            if key is not None:
+                memo.set(key, result)
+            return result
+
+        return wrapper
+
+    def amemoize(name, coroutine):
+        @functools.wraps(coroutine)
+        async def wrapper(*args, **kwargs):
+            memo = get_tool_memo()
+            config, arguments = _split(kwargs)
+            key = await sync_to_async(memo.key)(name, config, args, arguments, documents)
+            if key is not None:
+                result = await sync_to_async(memo.get)(key)
+                if result is not None:
+                    return result
+            result = await coroutine(*args, **kwargs)
+            if key is not None:
+                await sync_to_async(memo.set)(key, result)
+            return result
+
+        return wrapper
+
+    @functools.wraps(make_tool)
+    def factory(*args, **kwargs):
+        tool = make_tool(*args, **kwargs)
+        if tool.func is not None:
+            tool.func = memoize(tool.name, tool.func)
+        if tool.coroutine is not None:
+            tool.coroutine = amemoize(tool.name, tool.coroutine)
+        return tool
+
+    return factory
+
+
+@lru_cache(maxsize=1)
+def get_response_cache():
+    return ResponseCache()
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache():
+    """The shared model cache, or None when settings.AI_LLM_CACHE_TTL is 0."""
+    return DjangoLLMCache() if settings.AI_LLM_CACHE_TTL else None
+
+
+@lru_cache(maxsize=1)
+def get_tool_memo():
+    return ToolMemo()
@@ -0,0 +1,143 @@
+"""
+Structured commands that skip the model entirely.
+
+Requests that are a single unambiguous document operation ("get document
+12", "delete document 3", "list my documents", "search documents for
+inception", "rename document 4 to Plans") are parsed with anchored
+patterns and run the document tool directly. The tool's JSON result is
+rendered into a reply by the command's renderer. Anything else, including a command with extra
+words around it, goes to the agents as before.
+"""
+import json
+import re
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from pydantic import ValidationError
+
+from ai.history import last_request
+from ai.tools.documents import (
+    make_delete_document_tool,
+    make_get_document_tool,
+    make_list_documents_tool,
+    make_search_documents_tool,
+    make_update_document_tool,
+)
+from documents.models import Document
+
+_POLITE = r"(?:please\s+|can you\s+|could you\s+)?"
+_END = r"\s*(?:please)?\s*[.!?]*"
+_DOCUMENT = r"(?:document|doc)\s*(?:id\s*)?#?(?P<document_id>\d+)"
+
+# (tool, pattern); named groups become the tool arguments
+COMMANDS = [
+    ("get_document", re.compile(rf"{_POLITE}(?:get|show|open|read|view|display)\s+(?:me\s+)?{_DOCUMENT}{_END}", re.I)),
+    ("delete_document", re.compile(rf"{_POLITE}(?:delete|remove|erase)\s+{_DOCUMENT}{_END}", re.I)),
+    ("update_document", re.compile(rf"{_POLITE}(?:rename|retitle)\s+{_DOCUMENT}\s+to\s+[\"']?(?P<title>[^\"']+?)[\"']?{_END}", re.I)),
+    ("list_documents", re.compile(
+        rf"{_POLITE}(?:list|show)\s+(?:me\s+)?(?:all\s+)?(?:my\s+)?(?:(?P<limit>\d+)\s+)?(?:latest\s+|recent\s+)?(?:documents|docs){_END}", re.I
+    )),
+    ("search_documents", re.compile(
+        rf"{_POLITE}(?:search|find)\s+(?:my\s+)?(?:documents|docs)\s+(?:for|about|on|mentioning)\s+[\"']?(?P<query>[^\"']+?)[\"']?{_END}", re.I
+    )),
+]
+
+INT_ARGS = {"document_id", "limit"}
+
+def _render_document(data):
+    reply = f"Document ID {data['id']}: {data['title']}\n\n{data['content']}"
+    if "sections" in data:
+        first, last = data["sections"]
+        reply += f"\n\n(Sections {first}-{last} of {data['total_sections']}"
+        reply += f"; ask for section {data['next_section']} to keep reading.)" if "next_section" in data else ".)"
+    return reply
+
+
+def _render_update(data):
+    if data["status"] == "unchanged":
+        return f"Document ID {data['id']} has nothing to update."
+    title = f" ('{data['title']}')" if "title" in data else ""
+    return f"Done. Document ID {data['id']}{title} updated successfully."
+
+
+def _render_list(data):
+    if not data["documents"]:
+        return "No documents found."
+    lines = "\n".join(f"ID {doc['id']}: {doc['title']}" for doc in data["documents"])
+    more = "\n\nMore documents are available." if "next_cursor" in data else ""
+    return f"Your recent documents:\n{lines}{more}"
+
+
+def _render_search(data):
+    if not data["results"]:
+        return "No documents found matching the query."
+    lines = "\n".join(
+        f"ID {doc['id']}: {doc['title']}"
+        + (f" (section {doc['section']})" if "section" in doc else "")
+        + (f" - {doc['snippet']}" if "snippet" in doc else "")
+        for doc in data["results"]
+    )
+    return f"Found {len(data['results'])} documents matching '{data['query']}' (best match first):\n{lines}"
+
+
+# Replies for each command, from the tool's parsed JSON result
+RENDERERS = {
+    "get_document": _render_document,
+    "delete_document": lambda data: f"Done. Document ID {data['id']} deleted successfully.",
+    "update_document": _render_update,
+    "list_documents": _render_list,
+    "search_documents": _render_search,
+}
+ERROR_TEMPLATE = "I couldn't do that: {error}"
+# What the tools raise for a bad request (unknown document, out-of-range
+# section, invalid arguments or cursor); anything else is a real failure and
+# propagates to the caller's error handling
+USER_ERRORS = (Document.DoesNotExist, ValueError, ValidationError)
+
+
+def parse_command(text):
+    """Return (tool name, arguments) when TEXT is exactly one known command, else None."""
+    text = (text or "").strip()
+    for name, pattern in COMMANDS:
+        match = pattern.fullmatch(text)
+        if match:
+            args = {key: int(value) if key in INT_ARGS else value.strip() for key, value in match.groupdict().items() if value}
+            return name, args
+    return None
+
+
+def make_command_node():
+    """A graph node running the parsed command of the last user message with its tool."""
+    tools = {
+        tool.name: tool
+        for tool in (
+            make_get_document_tool(),
+            make_delete_document_tool(),
+            make_update_document_tool(),
+            make_list_documents_tool(),
+            make_search_documents_tool(),
+        )
+    }
+
+    def _reply(name, result=None, error=None):
+        if error is not None:
+            content = ERROR_TEMPLATE.format(error=error)
+        else:
+            content = RENDERERS[name](json.loads(result))
+        return {"messages": [AIMessage(content=content, name="document_agent")]}
+
+    def run_command(state, config):
+        name, args = parse_command(last_request(state["messages"]))
+        try:
+            return _reply(name, result=tools[name].invoke(args, config))
+        except USER_ERRORS as e:
+            return _reply(name, error=e)
+
+    async def arun_command(state, config):
+        name, args = parse_command(last_request(state["messages"]))
+        try:
+            return _reply(name, result=await tools[name].ainvoke(args, config))
+        except USER_ERRORS as e:
+            return _reply(name, error=e)
+
+    return RunnableLambda(run_command, afunc=arun_command, name="command")
@@ -0,0 +1,117 @@
+"""
+Offline stand-in for the Groq chat models (settings.AI_LLM_BACKEND = "fake").
+
+FakeChatModel supports tool calling, so it can drive the real supervisor,
+agents and tools without network access or an API key. By default it
+follows simple rules:
+
+- a supervisor (it has transfer_to_* tools) hands a new request to the
+  movie agent when it mentions movies, otherwise to the document agent,
+  and answers once the agent has handed back;
+- an agent calls the tool that matches the request (search_movies,
+  search_documents, list_documents, ...) and then answers with the tool
+  output.
+
+Pass `responses` (messages returned in turn) or `responder` (a callable
+taking the messages and bound tool names) to script it instead. `latency`
+adds a delay per call, to simulate the API in benchmarks.
+"""
+import asyncio
+import re
+import time
+import uuid
+from typing import Any, Callable, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from ai.history import count_tokens
+
+MOVIE_WORDS = re.compile(r"\b(movies?|films?|actors?|directors?|cast|tmdb)\b", re.IGNORECASE)
+
+
+def _tool_call(name, args):
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{uuid.uuid4().hex[:24]}"}])
+
+
+def _strip_request(text, words):
+    pattern = rf"^.*?\b({'|'.join(words)})\b\s*(for|about|on)?\s*"
+    return re.sub(pattern, "", text, count=1, flags=re.IGNORECASE).strip(" ?.!") or text
+
+
+def default_responder(messages, tool_names):
+    last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+    request = messages[last_human].content if last_human >= 0 else ""
+    since = messages[last_human + 1:]
+    results = [m for m in since if isinstance(m, ToolMessage) and not m.name.startswith("transfer_")]
+
+    if any(name.startswith("transfer_to_") for name in tool_names):
+        # Supervisor: route once, answer after the agent handed back
+        answers = [m for m in since if isinstance(m, AIMessage) and m.content and not m.tool_calls]
+        if any(isinstance(m, ToolMessage) and m.name.startswith("transfer_back_to_") for m in since):
+            return AIMessage(content=answers[-1].content if answers else "Done.")
+        target = "movie_discovery_agent" if MOVIE_WORDS.search(request) else "document_agent"
+        if f"transfer_to_{target}" in tool_names:
+            return _tool_call(f"transfer_to_{target}", {})
+
+    if results:
+        return AIMessage(content=f"Here is what I found:\n{results[-1].content}")
+
+    if "search_movies" in tool_names:
+        return _tool_call("search_movies", {"query": _strip_request(request, ["movies?", "films?", "about"])})
+    if "search_documents" in tool_names and re.search(r"\b(find|search|about)\b", request, re.IGNORECASE):
+        return _tool_call("search_documents", {"query": _strip_request(request, ["find", "search", "about"])})
+    if "list_documents" in tool_names:
+        return _tool_call("list_documents", {})
+    return AIMessage(content=f"You said: {request}")
+
+
+class FakeChatModel(BaseChatModel):
+    model_name: str = "fake"
+    responses: Optional[list] = None
+    responder: Optional[Callable] = None
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    def bind_tools(self, tools, **kwargs):
+        # A binding with a `tools` kwarg, like real chat models, so LangGraph
+        # recognizes the model as already bound
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _respond(self, messages, tools):
+        self.calls += 1
+        if self.responses:
+            message = self.responses[(self.calls - 1) % len(self.responses)]
+        else:
+            tool_names = {tool["function"]["name"] for tool in tools or []}
+            message = (self.responder or default_responder)(messages, tool_names)
+        prompt_tokens = count_tokens(messages)
+        completion_tokens = count_tokens([message])
+        message = message.model_copy(update={
+            "usage_metadata": {
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, tools)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, tools)
@@ -0,0 +1,84 @@
+"""
+Process-wide registry of compiled agent graphs.
+
+Building a graph (model clients, tools, create_react_agent, create_supervisor
+and compile) is far more expensive than running one, so each graph is built
+once per process and shared by every request. Graphs hold no per-user state:
+pass user_id and thread_id in the runtime config, e.g.
+
+    graph = get_graph("main_supervisor")
+    graph.invoke({"messages": [...]}, {"configurable": {"user_id": 3, "thread_id": "..."}})
+"""
+import logging
+import threading
+
+from django.conf import settings
+from langgraph.checkpoint.memory import InMemorySaver
+
+from ai import agents, llms, supervisors
+from checkpoints.saver import DjangoCheckpointSaver
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BUILDERS = {
+    "main_supervisor": supervisors.get_routed_supervisor,
+    "document_agent": agents.get_document_agent,
+    "movie_discovery_agent": agents.get_movie_discovery_agent,
+}
+
+_graphs = {}
+_checkpointer = None
+_lock = threading.Lock()
+
+
+def get_checkpointer():
+    global _checkpointer
+    if _checkpointer is None:
+        with _lock:
+            if _checkpointer is None:
+                if settings.AI_CHECKPOINTER == "memory":
+                    _checkpointer = InMemorySaver()
+                else:
+                    _checkpointer = DjangoCheckpointSaver()
+    return _checkpointer
+
+
+def get_graph(name="main_supervisor"):
+    graph = _graphs.get(name)
+    if graph is not None:
+        return graph
+
+    try:
+        builder = GRAPH_BUILDERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown graph '{name}'. Available: {', '.join(GRAPH_BUILDERS)}")
+
+    checkpointer = get_checkpointer()
+    with _lock:
+        # Another thread may have built it while we waited for the lock
+        graph = _graphs.get(name)
+        if graph is None:
+            graph = _graphs[name] = builder(checkpointer=checkpointer)
+    return graph
+
+
+def warm_up(names=None):
+    """
+    Build the given graphs (all by default) ahead of the first request.
+    Runs while the server starts, so a graph that fails to build is logged
+    and left to be built (and fail visibly) on its first request instead.
+    """
+    for name in names or GRAPH_BUILDERS:
+        try:
+            get_graph(name)
+        except Exception:
+            logger.exception("Could not preload graph %s", name)
+
+
+def reset():
+    """Drop all compiled graphs and pooled model clients, e.g. after changing settings in tests."""
+    global _checkpointer
+    with _lock:
+        _graphs.clear()
+        _checkpointer = None
+    llms.reset_pool()
@@ -0,0 +1,150 @@
+"""
+Keep the prompt sent to the model within a token budget.
+
+make_pre_model_hook() returns a LangGraph pre_model_hook that, before every
+model call:
+
+1. collapses large tool outputs (full documents, raw TMDB payloads) that
+   the model has already answered from to a one-line stub, and
+2. keeps only the newest turns that fit in the budget, replacing the
+   dropped ones with a short note listing the earlier user requests.
+
+Only the model input is changed; the full history stays in the checkpoint.
+Token counts are memoized by content digest, so each step only tokenizes
+the messages that are new since the previous one.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, trim_messages
+
+# Tool outputs that are only useful until the model has answered from them
+COLLAPSIBLE_TOOLS = {"get_document", "movie_detail", "movie_details_batch", "search_movies"}
+
+# Per-message overhead of the chat format, as in OpenAI's counting guide
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Token counts kept by content digest; the oldest are dropped first
+TOKEN_CACHE_SIZE = 10_000
+
+_encoding = None
+_token_counts = {}
+_token_counts_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            # No cached BPE file and no network: fall back to ~4 chars per token
+            _encoding = False
+    return _encoding
+
+
+def _tokenize_count(text):
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def count_text_tokens(text):
+    key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    tokens = _token_counts.get(key)
+    if tokens is None:
+        tokens = _tokenize_count(text)
+        with _token_counts_lock:
+            _token_counts[key] = tokens
+            if len(_token_counts) > TOKEN_CACHE_SIZE:
+                del _token_counts[next(iter(_token_counts))]
+    return tokens
+
+
+def _message_text(message):
+    content = message.content
+    if isinstance(content, str):
+        text = content
+    else:
+        text = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        text += f" {tool_call['name']} {tool_call['args']}"
+    return text
+
+
+def last_request(messages):
+    """Text of the newest user message."""
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else ""
+        if isinstance(message, dict) and message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def count_tokens(messages):
+    return sum(MESSAGE_OVERHEAD_TOKENS + count_text_tokens(_message_text(m)) for m in messages)
+
+
+def collapse_used_tool_outputs(messages):
+    """
+    Replace the content of collapsible tool results that are followed by a
+    final AI answer with a stub that keeps their first line (e.g. the
+    document ID and title).
+    """
+    last_answer = max(
+        (i for i, m in enumerate(messages) if isinstance(m, AIMessage) and not m.tool_calls),
+        default=-1,
+    )
+    collapsed = []
+    for i, message in enumerate(messages):
+        if i < last_answer and isinstance(message, ToolMessage) and message.name in COLLAPSIBLE_TOOLS:
+            text = _message_text(message)
+            first_line = text.split("\n", 1)[0][:200]
+            message = message.model_copy(update={
+                "content": f"{first_line} [{message.name} output of {count_text_tokens(text)} tokens "
+                           f"collapsed; call the tool again if you need it]"
+            })
+        collapsed.append(message)
+    return collapsed
+
+
+def summarize_dropped(messages, max_requests=5):
+    requests = [
+        _message_text(m)[:120] for m in messages if isinstance(m, HumanMessage)
+    ][-max_requests:]
+    summary = f"[{len(messages)} earlier messages were trimmed from this conversation."
+    if requests:
+        summary += " Earlier user requests, oldest first: " + "; ".join(f'"{r}"' for r in requests)
+    return SystemMessage(content=summary + "]")
+
+
+def make_pre_model_hook(max_tokens=None):
+    max_tokens = max_tokens or settings.AI_HISTORY_TOKEN_BUDGET
+
+    def pre_model_hook(state):
+        messages = collapse_used_tool_outputs(state["messages"])
+        trimmed = trim_messages(
+            messages,
+            max_tokens=max_tokens,
+            token_counter=count_tokens,
+            strategy="last",
+            # Never start on an orphaned tool result
+            start_on="human",
+            include_system=True,
+            allow_partial=False,
+        )
+        if not trimmed:
+            # The current turn alone is over budget: send it whole rather than nothing
+            last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+            trimmed = messages[last_human:]
+        dropped = len(messages) - len(trimmed)
+        if dropped:
+            trimmed = [summarize_dropped(messages[:dropped])] + trimmed
+        return {"llm_input_messages": trimmed}
+
+    return pre_model_hook
@@ -1,13 +1,142 @@
+"""
+Chat model clients shared by every graph.
+
+get_model(role) returns the pooled client for a role: cheap routing steps
+("supervisor") go to a small fast model and the agents that call tools and
+write answers ("agent") to a larger one, see settings.AI_MODELS. There is
+one client per model per process. Each pooled client has a
+TokenBucketRateLimiter that tracks requests and tokens per minute. Calls
+queue until both budgets allow them, and are shed with RateLimitExceeded
+once the wait would exceed settings.AI_RATE_LIMIT_MAX_WAIT, before Groq
+answers with 429s. The limits are per process: divide them by the number
+of workers.
+
+settings.AI_LLM_BACKEND = "fake" swaps every client for ai.fake_llm's
+offline FakeChatModel.
+"""
+import asyncio
+import threading
+import time
+
 from django.conf import settings
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
 from langchain_groq import ChatGroq
 
+DEFAULT_MODEL = "mixtral-8x7b-32768"
+
+_pool = {}
+_rate_limiters = {}
+_lock = threading.Lock()
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, model, retry_after):
+        super().__init__(f"The model '{model}' is busy, try again in {retry_after:.0f} seconds.")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class TokenBucketRateLimiter(BaseRateLimiter):
+    """
+    Two token buckets, one for requests and one for model tokens per minute.
+    A call needs one request and a positive token balance. The tokens it
+    actually used are charged afterwards by TokenUsageCallback, so a large
+    call makes the following ones wait.
+    """
+
+    def __init__(self, model, requests_per_minute, tokens_per_minute, max_wait=10.0, clock=time.monotonic):
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_wait = max_wait
+        self.clock = clock
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _try_acquire(self):
+        """Take one request if both buckets allow it; otherwise return the seconds to wait."""
+        with self._lock:
+            self._refill()
+            if self._requests >= 1 and self._tokens > 0:
+                self._requests -= 1
+                return 0.0
+            request_wait = (1 - self._requests) * 60 / self.requests_per_minute if self._requests < 1 else 0.0
+            token_wait = (1 - self._tokens) * 60 / self.tokens_per_minute if self._tokens <= 0 else 0.0
+            return max(request_wait, token_wait)
+
+    def record_tokens(self, tokens):
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+    def acquire(self, *, blocking=True):
+        deadline = self.clock() + self.max_wait
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return True
+            if not blocking:
+                return False
+            if self.clock() + wait > deadline:
+                raise RateLimitExceeded(self.model, wait)
+            time.sleep(wait)
+
+    async def aacquire(self, *, blocking=True):
+        deadline = self.clock() + self.max_wait
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return True
+            if not blocking:
+                return False
+            if self.clock() + wait > deadline:
+                raise RateLimitExceeded(self.model, wait)
+            await asyncio.sleep(wait)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Charge the tokens each model call used to its rate limiter."""
+
+    def __init__(self, rate_limiter):
+        self.rate_limiter = rate_limiter
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                # Responses served from the model cache are marked with a zero cost
+                if "total_cost" in usage:
+                    continue
+                tokens += usage.get("total_tokens", 0)
+        if tokens:
+            self.rate_limiter.record_tokens(tokens)
+
+
 def get_groq_api_key():
     return settings.GROQ_API_KEY
 
-def get_groq_model(model="mixtral-8x7b-32768", **kwargs):
+def get_groq_model(model=DEFAULT_MODEL, **kwargs):
+    """A new ChatGroq client; use get_model() to share the pooled one."""
+    # Imported here: ai.cache imports this module
+    from ai.cache import get_llm_cache
+
     if model is None:
         model = "llama-3.1-8b-instant"  # Fallback for compatibility
 
+    # Identical prompts are answered from the cache instead of the API
+    kwargs.setdefault("cache", get_llm_cache())
+
     return ChatGroq(
         model_name=model,
         temperature=0,  # Keep your deterministic setting
@@ -15,4 +144,48 @@ def get_groq_model(model="mixtral-8x7b-32768", **kwargs):
         max_retries=2,  # Keep your retry logic
         api_key=get_groq_api_key(),
         **kwargs
-    )
\ No newline at end of file
+    )
+
+
+def get_rate_limiter(model):
+    with _lock:
+        limiter = _rate_limiters.get(model)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = settings.AI_RATE_LIMITS.get(model, settings.AI_RATE_LIMITS["default"])
+            limiter = _rate_limiters[model] = TokenBucketRateLimiter(
+                model, requests_per_minute, tokens_per_minute, max_wait=settings.AI_RATE_LIMIT_MAX_WAIT
+            )
+    return limiter
+
+
+def model_name(role="agent"):
+    return settings.AI_MODELS.get(role) or DEFAULT_MODEL
+
+
+def get_model(role="agent"):
+    """The shared chat model client for ROLE ("supervisor" or "agent")."""
+    name = model_name(role)
+    model = _pool.get(name)
+    if model is not None:
+        return model
+
+    limiter = get_rate_limiter(name)
+    with _lock:
+        model = _pool.get(name)
+        if model is None:
+            scheduling = {"rate_limiter": limiter, "callbacks": [TokenUsageCallback(limiter)]}
+            if settings.AI_LLM_BACKEND == "fake":
+                from ai.fake_llm import FakeChatModel
+
+                model = FakeChatModel(model_name=name, latency=settings.AI_FAKE_LLM_LATENCY, **scheduling)
+            else:
+                model = get_groq_model(name, **scheduling)
+            _pool[name] = model
+    return model
+
+
+def reset_pool():
+    """Drop the pooled clients and rate limiters, e.g. after changing settings in tests."""
+    with _lock:
+        _pool.clear()
+        _rate_limiters.clear()
@@ -0,0 +1,105 @@
+import json
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ai import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the agent graphs and tools offline (fake chat model, local TMDB stand-in) "
+        "on a throwaway test database, and report latency percentiles and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5, help="Users to seed")
+        parser.add_argument("--docs", type=int, default=50, help="Documents to seed per user")
+        parser.add_argument("--words", type=int, default=300, help="Average words per document")
+        parser.add_argument("--runs", type=int, default=20, help="Timed runs per scenario and tool")
+        parser.add_argument("--concurrency", type=int, default=1, help="Runs in flight at once")
+        parser.add_argument("--warmup", type=int, default=1, help="Untimed turns per user before each scenario")
+        parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds added to each model call")
+        parser.add_argument("--tmdb-latency", type=float, default=0.0, help="Seconds added to each TMDB request")
+        parser.add_argument("--checkpointer", choices=["database", "memory"], default=settings.AI_CHECKPOINTER)
+        parser.add_argument("--caches", action="store_true", help="Keep the response and model caches enabled")
+        parser.add_argument("--scenario", action="append", dest="scenarios", choices=list(benchmark.SCENARIOS))
+        parser.add_argument("--tool", action="append", dest="tools", choices=list(benchmark.TOOLS))
+        parser.add_argument("--output", help="Write the results as JSON to this file")
+        parser.add_argument("--baseline", help="Fail when p95 latency regressed against these saved results")
+        parser.add_argument("--max-regression", type=float, default=0.2,
+                            help="Allowed p95 slowdown against the baseline, as a fraction")
+
+    def handle(self, *args, **options):
+        baseline = json.loads(Path(options["baseline"]).read_text()) if options["baseline"] else None
+
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == "sqlite":
+                # A file, not the shared in-memory database: sync tools write from worker threads
+                connection.settings_dict.setdefault("TEST", {})["NAME"] = str(Path(directory) / "benchmark.sqlite3")
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                results = benchmark.run_benchmark(
+                    users=options["users"],
+                    documents=options["docs"],
+                    words=options["words"],
+                    runs=options["runs"],
+                    concurrency=options["concurrency"],
+                    warmup=options["warmup"],
+                    llm_latency=options["llm_latency"],
+                    tmdb_latency=options["tmdb_latency"],
+                    checkpointer=options["checkpointer"],
+                    caches=options["caches"],
+                    scenarios=options["scenarios"],
+                    tools=options["tools"],
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.report(results)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2, sort_keys=True))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            regressions = benchmark.compare(results, baseline, options["max_regression"])
+            if regressions:
+                raise CommandError("Performance regressions:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def report(self, results):
+        header = f"{'':<36} {'runs':>5} {'err':>4} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+
+        def row(name, result):
+            # Components have no errors or throughput of their own
+            errors = result.get("errors", "")
+            throughput = f"{result['throughput_rps']:.1f}" if "throughput_rps" in result else ""
+            return (
+                f"{name:<36} {result['count']:>5} {errors:>4} {throughput:>8} "
+                f"{result.get('p50_ms', 0):>9.2f} {result.get('p95_ms', 0):>9.2f} {result.get('p99_ms', 0):>9.2f}"
+            )
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Scenarios"))
+        self.stdout.write(header)
+        for name, result in results["scenarios"].items():
+            self.stdout.write(row(name, result))
+            for component, timings in result["components"].items():
+                self.stdout.write(row(f"  {component}", timings))
+            if result["first_error"]:
+                self.stdout.write(self.style.ERROR(f"  {result['first_error']}"))
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Tools"))
+        self.stdout.write(f"{header} {'tokens':>7}")
+        for name, result in results["tools"].items():
+            self.stdout.write(f"{row(name, result)} {result['result_tokens'] or 0:>7.0f}")
+            if result["first_error"]:
+                self.stdout.write(self.style.ERROR(f"  {result['first_error']}"))
+
+        cache = results["tmdb"]["cache"]
+        self.stdout.write(
+            f"\nSeeded in {results['seed_seconds']:.1f}s. TMDB stub served {results['tmdb']['requests']} requests "
+            f"(cache hit rate {cache['hit_rate']:.0%})."
+        )
@@ -0,0 +1,259 @@
+"""
+Prometheus metrics for the agent graphs, served by ai.views.metrics at /metrics.
+
+MetricsCallbackHandler is passed in the config of every chat turn. It times
+each graph node and model call, and counts the tokens each model call used.
+Tools are timed by the instrumented_tool decorator on their factories, which
+also records the tokens of each result. While a tool runs, every database
+query is counted against it through a connection execute wrapper. TMDB latency and cache status are recorded by
+tmdb.client. Everything is labelled with the agent that did the work, see
+agent_name().
+
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR so /metrics
+aggregates all of them.
+"""
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest
+
+from ai.history import count_text_tokens
+
+logger = logging.getLogger(__name__)
+
+AGENT_NAMES = {"document_agent", "movie_discovery_agent"}
+# Structured commands (ai.commands) run document tools on the document agent's behalf
+AGENT_ALIASES = {"command": "document_agent"}
+
+NODE_SECONDS = Histogram(
+    "ai_node_duration_seconds", "Wall time of graph nodes.", ["agent", "node"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+LLM_SECONDS = Histogram(
+    "ai_llm_duration_seconds", "Wall time of chat model calls.", ["agent", "model", "cache"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30),
+)
+LLM_TOKENS = Counter("ai_llm_tokens_total", "Tokens used by chat model calls.", ["agent", "model", "kind"])
+TOOL_SECONDS = Histogram(
+    "ai_tool_duration_seconds", "Wall time of tool calls.", ["agent", "tool", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+TOOL_DB_QUERIES = Histogram(
+    "ai_tool_db_queries", "Database queries per tool call.", ["agent", "tool"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+TOOL_DB_SECONDS = Histogram(
+    "ai_tool_db_duration_seconds", "Time spent in database queries per tool call.", ["agent", "tool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+TOOL_RESULT_TOKENS = Histogram(
+    "ai_tool_result_tokens", "Tokens of each tool result added to the prompt.", ["agent", "tool"],
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2000, 4000, 8000),
+)
+ROUTES = Counter("ai_routes_total", "Chat turns by entry route of the main graph.", ["route"])
+RESPONSE_CACHE = Counter("ai_response_cache_requests_total", "Response cache lookups.", ["result"])
+TOOL_MEMO = Counter("ai_tool_memo_requests_total", "Lookups of repeated read-only tool calls.", ["result"])
+
+# The tool running in the current context, as (agent, tool, [queries, seconds])
+_current_tool = contextvars.ContextVar("ai_current_tool", default=None)
+
+
+def agent_name(metadata):
+    # Nodes inside a sub-agent run under a namespace like
+    # "supervisor:<task id>|document_agent:<task id>|tools:<task id>"
+    namespace = (metadata or {}).get("langgraph_checkpoint_ns") or ""
+    for node in reversed([part.split(":", 1)[0] for part in namespace.split("|")]):
+        node = AGENT_ALIASES.get(node, node)
+        if node in AGENT_NAMES:
+            return node
+    # Parts of a fanned-out request are tagged with their agent
+    return (metadata or {}).get("agent") or "supervisor"
+
+
+def _record_query(execute, sql, params, many, context):
+    current = _current_tool.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = current[2]
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_wrapper, dispatch_uid="ai.metrics")
+for _connection in connections.all(initialized_only=True):
+    _install_query_wrapper(_connection)
+
+
+def _tool_agent(kwargs):
+    return agent_name((kwargs.get("config") or {}).get("metadata"))
+
+
+def result_tokens(result):
+    return count_text_tokens(result if isinstance(result, str) else str(result))
+
+
+def _observe_tool(agent, tool, status, start, stats, result):
+    TOOL_SECONDS.labels(agent, tool, status).observe(time.perf_counter() - start)
+    TOOL_DB_QUERIES.labels(agent, tool).observe(stats[0])
+    TOOL_DB_SECONDS.labels(agent, tool).observe(stats[1])
+    if status == "ok":
+        tokens = result_tokens(result)
+        TOOL_RESULT_TOKENS.labels(agent, tool).observe(tokens)
+        logger.debug("%s returned %d tokens", tool, tokens)
+
+
+def _timed(name, func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        agent, stats, start = _tool_agent(kwargs), [0, 0.0], time.perf_counter()
+        token = _current_tool.set((agent, name, stats))
+        status, result = "error", None
+        try:
+            result = func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _current_tool.reset(token)
+            _observe_tool(agent, name, status, start, stats, result)
+
+    return wrapper
+
+
+def _atimed(name, coroutine):
+    @functools.wraps(coroutine)
+    async def wrapper(*args, **kwargs):
+        agent, stats, start = _tool_agent(kwargs), [0, 0.0], time.perf_counter()
+        # sync_to_async copies the context, so queries in its thread count too
+        token = _current_tool.set((agent, name, stats))
+        status, result = "error", None
+        try:
+            result = await coroutine(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            _current_tool.reset(token)
+            _observe_tool(agent, name, status, start, stats, result)
+
+    return wrapper
+
+
+def instrumented_tool(make_tool):
+    """Decorate a make_*_tool factory so its tool records time and database use."""
+
+    @functools.wraps(make_tool)
+    def factory(*args, **kwargs):
+        tool = make_tool(*args, **kwargs)
+        if tool.func is not None:
+            tool.func = _timed(tool.name, tool.func)
+        if tool.coroutine is not None:
+            tool.coroutine = _atimed(tool.name, tool.coroutine)
+        return tool
+
+    return factory
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Times graph nodes and chat model calls and counts their tokens."""
+
+    # Called in the caller's thread or event loop, so the timings are not
+    # skewed by waiting for an executor
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, *labels):
+        with self._lock:
+            self._runs[run_id] = (time.perf_counter(), labels)
+
+    def _stop(self, run_id):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return None, None
+        start, labels = run
+        return time.perf_counter() - start, labels
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        # Only the node itself: not the runnables it is made of, nor the
+        # runnable it wraps, which has the node's name too
+        if not node or node.startswith("__") or kwargs.get("name") != node:
+            return
+        with self._lock:
+            parent = self._runs.get(parent_run_id)
+        if parent is None or parent[1][1:] != (node,):
+            self._start(run_id, agent_name(metadata), node)
+
+    def timed(self, kind, name, elapsed):
+        """Called with ("node", node name) or ("llm", model) and the seconds each run took."""
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        elapsed, labels = self._stop(run_id)
+        if labels is not None:
+            NODE_SECONDS.labels(*labels).observe(elapsed)
+            self.timed("node", labels[1], elapsed)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self.on_chain_end(None, run_id=run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        metadata = metadata or {}
+        self._start(run_id, agent_name(metadata), metadata.get("ls_model_name") or "unknown")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        elapsed, labels = self._stop(run_id)
+        if labels is None:
+            return
+        agent, model = labels
+        cache = "miss"
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                # Responses served from the model cache are marked with a zero cost
+                if "total_cost" in usage:
+                    cache = "hit"
+                    continue
+                LLM_TOKENS.labels(agent, model, "prompt").inc(usage.get("input_tokens", 0))
+                LLM_TOKENS.labels(agent, model, "completion").inc(usage.get("output_tokens", 0))
+        LLM_SECONDS.labels(agent, model, cache).observe(elapsed)
+        self.timed("llm", model, elapsed)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        elapsed, labels = self._stop(run_id)
+        if labels is not None:
+            LLM_SECONDS.labels(*labels, "error").observe(elapsed)
+            self.timed("llm", labels[1], elapsed)
+
+
+callback_handler = MetricsCallbackHandler()
+
+
+def export():
+    """Return (body, content type) of the current metrics."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,116 @@
+"""
+Deterministic routing ahead of the LLM supervisor.
+
+Most requests name their domain outright ("list my documents", "search
+movies about space"), and the supervisor's own prompt routes them by those
+keywords. route_request() applies the same rules without a model call. It
+dispatches straight to an agent when exactly one domain matches, and leaves
+everything else to the LLM supervisor: no match, both domains, or
+multi-step requests that need coordinating ("create a document about movie
+X"). Structured commands ("delete document 3") skip the agents too and
+run their tool directly.
+
+Compound requests made of independent parts ("find Inception and also list
+my documents") are split by plan_subtasks() and fanned out with Send, so
+the parts run at the same time and their answers are merged. Each part
+goes where it would go on its own: a part naming no domain ("find
+Inception") is answered by the LLM supervisor while the others go straight
+to their agent. Every part sees the conversation so far. A request is only
+split when at least one part routes without the supervisor, no part refers
+back to another ("... and create a document about it"), no part writes to a
+domain another part also uses, and no part writes next to one whose domain
+is unknown.
+"""
+import re
+
+from django.conf import settings
+from langgraph.types import Send
+
+from ai import metrics
+from ai.commands import parse_command
+from ai.history import last_request
+
+SUPERVISOR = "supervisor"
+COMMAND = "command"
+SUBTASK = "subtask"
+
+MAX_SUBTASKS = 4
+
+# Where compound requests are split; "and then" / "then" mean the order matters and never split
+SPLIT_PATTERN = re.compile(
+    r"\s*(?:;|,?\s+and also\s+|,?\s+also\s+|,?\s+plus\s+|,?\s+and\s+(?=(?:list|show|find|search|get|open|tell|what|who|recommend|look)\b))\s*",
+    re.IGNORECASE,
+)
+SEQUENTIAL_PATTERN = re.compile(r"\b(then|after that|afterwards)\b", re.IGNORECASE)
+REFERENCE_PATTERN = re.compile(r"\b(it|its|that|this|them|those|these|the same)\b", re.IGNORECASE)
+WRITE_PATTERN = re.compile(r"\b(create|write|add|save|update|edit|rename|change|delete|remove|erase)\b", re.IGNORECASE)
+
+# (agent, pattern): a request matching exactly one pattern goes to that agent
+ROUTES = [
+    ("document_agent", re.compile(r"\b(documents?|docs?|notes?|drafts?)\b", re.IGNORECASE)),
+    ("movie_discovery_agent", re.compile(
+        r"\b(movies?|films?|actors?|actress(es)?|directors?|cast|tmdb|box office|trailers?)\b", re.IGNORECASE
+    )),
+]
+
+
+def classify(text):
+    """Return the agent that should handle TEXT, or None when it is not clear-cut."""
+    matches = {agent for agent, pattern in ROUTES if pattern.search(text or "")}
+    if len(matches) == 1:
+        return matches.pop()
+    return None
+
+
+def plan_subtasks(text):
+    """
+    Split TEXT into [(route, task)] when it is made of independent parts,
+    where route is "command" or an agent name; otherwise return None.
+    """
+    if not text or SEQUENTIAL_PATTERN.search(text):
+        return None
+    tasks = [task.strip(" ,.") for task in SPLIT_PATTERN.split(text) if task.strip(" ,.")]
+    if not 2 <= len(tasks) <= MAX_SUBTASKS:
+        return None
+
+    plan, domains, writes = [], [], set()
+    for task in tasks[1:]:
+        if REFERENCE_PATTERN.search(task):
+            return None
+    for task in tasks:
+        route = COMMAND if parse_command(task) else classify(task) or SUPERVISOR
+        domain = "document_agent" if route == COMMAND else route
+        if WRITE_PATTERN.search(task):
+            writes.add(domain)
+        plan.append((route, task))
+        domains.append(domain)
+    if all(domain == SUPERVISOR for domain in domains):
+        return None
+    # The supervisor may use either domain
+    if writes and SUPERVISOR in domains:
+        return None
+    if any(domains.count(domain) > 1 for domain in writes):
+        return None
+    return plan
+
+
+def route_request(state):
+    """
+    Conditional entry edge of the main graph: "command" for a structured
+    command (see ai.commands), one Send per independent part of a compound
+    request, an agent name, or "supervisor".
+    """
+    request = last_request(state["messages"])
+    if settings.AI_DIRECT_COMMANDS and parse_command(request):
+        route = COMMAND
+    elif not settings.AI_FAST_ROUTING:
+        route = SUPERVISOR
+    else:
+        plan = plan_subtasks(request) if settings.AI_PARALLEL_SUBTASKS else None
+        if plan:
+            metrics.ROUTES.labels(SUBTASK).inc()
+            history = state["messages"][:-1]
+            return [Send(SUBTASK, {"route": route, "task": task, "messages": history}) for route, task in plan]
+        route = classify(request) or SUPERVISOR
+    metrics.ROUTES.labels(route).inc()
+    return route
@@ -1,22 +1,32 @@
+import logging
+from typing import Annotated, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.runnables.config import merge_configs
 from langchain_openai import ChatOpenAI
+from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph_supervisor import create_supervisor
-from ai import agents
-from ai.llms import get_groq_model
-import uuid
-
-def get_supervisor(config=None, checkpointer=None):
-
-    if config is None:
-        config = {
-            "configurable": {
-                "user_id": "3",  # You can inject a real user ID here
-                "thread_id": str(uuid.uuid4())
-            }
-        }
+from ai import agents, commands, router
+from ai.llms import get_model
+from ai.history import make_pre_model_hook
+
+logger = logging.getLogger(__name__)
+
+def get_supervisor(config=None, checkpointer=None, document_agent=None, movie_discovery_agent=None, name="main_supervisor"):
+    """
+    Build and compile the LLM supervisor graph.
+
+    This is expensive; use ai.graphs.get_graph("main_supervisor") to get the
+    shared compiled instance. `config` is unused: pass user_id/thread_id in
+    the config given to invoke/stream instead.
+    """
     try:
-        model = get_groq_model()
-        document_agent = agents.get_document_agent(config=config, checkpointer=checkpointer)
-        movie_discovery_agent = agents.get_movie_discovery_agent(config=config, checkpointer=checkpointer)
+        # Routing is a cheap step: the supervisor uses the small model and the
+        # sub-agents (which inherit its checkpointer) the pooled agent model
+        model = get_model("supervisor")
+        document_agent = document_agent or agents.get_document_agent()
+        movie_discovery_agent = movie_discovery_agent or agents.get_movie_discovery_agent()
 
         return create_supervisor(
             agents=[document_agent, movie_discovery_agent],
@@ -41,10 +51,93 @@ def get_supervisor(config=None, checkpointer=None):
                 
                 "Always respond by routing to an agent - never try to answer directly or call tools."
             ),
+            pre_model_hook=make_pre_model_hook(),
             include_agent_name="inline",  # ✅ Helps understand which agent responded
             add_handoff_messages=True  # ✅ Helps with debugging transitions
-        ).compile(name="main_supervisor",checkpointer=checkpointer)
+        ).compile(name=name,checkpointer=checkpointer)
 
     except Exception as e:
-        print(f"Error creating supervisor: {e}")
-        raise
\ No newline at end of file
+        logger.exception("Error creating supervisor: %s", e)
+        raise
+
+
+def _merge_results(left, right):
+    # None clears the sub-task results once they are merged into a reply
+    if right is None:
+        return []
+    return (left or []) + right
+
+
+class MainState(MessagesState):
+    results: Annotated[list, _merge_results]
+
+
+class SubtaskState(TypedDict):
+    route: str
+    task: str
+    # The conversation before the compound request
+    messages: list
+
+
+def make_subtask_node(targets):
+    """Run one part of a compound request on its own: the conversation so far, then that part."""
+
+    def _inputs(state, config):
+        # Tag the part's events with the agent running it (see ai.metrics.agent_name)
+        agent = "document_agent" if state["route"] == router.COMMAND else state["route"]
+        messages = [*state.get("messages", []), HumanMessage(content=state["task"])]
+        return {"messages": messages}, merge_configs(config, {"metadata": {"agent": agent}})
+
+    def run_subtask(state, config):
+        inputs, config = _inputs(state, config)
+        result = targets[state["route"]].invoke(inputs, config)
+        return {"results": [(state["task"], result["messages"][-1].content)]}
+
+    async def arun_subtask(state, config):
+        inputs, config = _inputs(state, config)
+        result = await targets[state["route"]].ainvoke(inputs, config)
+        return {"results": [(state["task"], result["messages"][-1].content)]}
+
+    return RunnableLambda(run_subtask, afunc=arun_subtask, name=router.SUBTASK)
+
+
+def merge_subtasks(state):
+    """Answer a fanned-out request with every part's answer, in the order asked."""
+    reply = "\n\n".join(f"**{task}**\n{answer}" for task, answer in state["results"])
+    return {"messages": [AIMessage(content=reply, name="supervisor")], "results": None}
+
+
+def get_routed_supervisor(config=None, checkpointer=None):
+    """
+    The main graph: structured commands run their tool directly, requests
+    that ai.router can route by their keywords go straight to an agent,
+    independent parts of compound requests run in parallel, and everything
+    else goes to the LLM supervisor.
+    """
+    document_agent = agents.get_document_agent()
+    movie_discovery_agent = agents.get_movie_discovery_agent()
+    command = commands.make_command_node()
+    supervisor = get_supervisor(
+        document_agent=document_agent, movie_discovery_agent=movie_discovery_agent, name=router.SUPERVISOR
+    )
+
+    builder = StateGraph(MainState)
+    builder.add_node(router.SUPERVISOR, supervisor)
+    builder.add_node("document_agent", document_agent)
+    builder.add_node("movie_discovery_agent", movie_discovery_agent)
+    builder.add_node(router.COMMAND, command)
+    builder.add_node(router.SUBTASK, make_subtask_node({
+        router.SUPERVISOR: supervisor,
+        router.COMMAND: command,
+        "document_agent": document_agent,
+        "movie_discovery_agent": movie_discovery_agent,
+    }), input_schema=SubtaskState)
+    builder.add_node("merge", merge_subtasks)
+
+    nodes = [router.SUPERVISOR, router.COMMAND, "document_agent", "movie_discovery_agent"]
+    builder.add_conditional_edges(START, router.route_request, nodes + [router.SUBTASK])
+    for node in nodes:
+        builder.add_edge(node, END)
+    builder.add_edge(router.SUBTASK, "merge")
+    builder.add_edge("merge", END)
+    return builder.compile(name="main_supervisor", checkpointer=checkpointer)
@@ -0,0 +1,664 @@
+import json
+import tempfile
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import StructuredTool
+from prometheus_client import REGISTRY
+from pydantic import ValidationError
+
+from ai import benchmark, commands, graphs, history, llms, metrics, router, supervisors, views
+from ai.commands import parse_command
+from ai.cache import (
+    DjangoLLMCache,
+    ResponseCache,
+    bump_documents_version,
+    get_response_cache,
+    get_tool_memo,
+    memoized_tool,
+)
+from ai.llms import RateLimitExceeded, TokenBucketRateLimiter
+from ai.tools import get_user_id, output
+from ai.tools.documents import (
+    MAX_BULK_ITEMS,
+    make_bulk_create_documents_tool,
+    make_bulk_delete_documents_tool,
+    make_bulk_update_documents_tool,
+    make_create_document_tool,
+    make_get_document_tool,
+    make_list_documents_tool,
+)
+from ai.tools.movie_discovery import MAX_BATCH_SIZE, make_movie_details_batch_tool
+from checkpoints.models import Checkpoint
+from documents.models import Document
+from tmdb import stub
+
+
+@override_settings(AI_CACHE_ALIAS="ai")
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches["ai"].clear()
+        self.cache = ResponseCache(ttl=60, similarity=0)
+
+    def test_hits_normalized_repeats_until_documents_change(self):
+        reply, version = self.cache.get(1, "List my documents")
+        self.assertIsNone(reply)
+        self.assertTrue(self.cache.set(1, "List my documents", "ID 1: Notes", version))
+
+        self.assertEqual(self.cache.get(1, "  list my DOCUMENTS? ")[0], "ID 1: Notes")
+        self.assertIsNone(self.cache.get(2, "list my documents")[0])
+
+        bump_documents_version(1)
+        self.assertIsNone(self.cache.get(1, "list my documents")[0])
+
+    def test_turns_that_change_documents_are_not_cached(self):
+        _, version = self.cache.get(1, "create a document about Inception")
+        bump_documents_version(1)
+
+        self.assertFalse(self.cache.set(1, "create a document about Inception", "Created ID 3", version))
+
+    def test_similar_messages_share_an_entry(self):
+        cache = ResponseCache(ttl=60, similarity=0.8)
+        _, version = cache.get(1, "tell me about the movie inception")
+        cache.set(1, "tell me about the movie inception", "A heist film.", version)
+
+        self.assertEqual(cache.get(1, "please tell me about the movie inception")[0], "A heist film.")
+        self.assertIsNone(cache.get(1, "list my documents")[0])
+
+
+@override_settings(AI_CACHE_ALIAS="ai")
+class LLMCacheTests(SimpleTestCase):
+    def test_cached_tool_calls_get_fresh_ids(self):
+        caches["ai"].clear()
+        cache = DjangoLLMCache(ttl=60)
+        message = AIMessage(content="", id="run-1", tool_calls=[{"name": "list_documents", "args": {}, "id": "call_1"}])
+        cache.update("prompt", "llm", [ChatGeneration(message=message)])
+
+        cached = cache.lookup("prompt", "llm")[0].message
+
+        self.assertIsNone(cached.id)
+        self.assertEqual(cached.tool_calls[0]["name"], "list_documents")
+        self.assertNotEqual(cached.tool_calls[0]["id"], "call_1")
+        self.assertIsNone(cache.lookup("other prompt", "llm"))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TokenBucketRateLimiterTests(SimpleTestCase):
+    def test_requests_per_minute(self):
+        clock = FakeClock()
+        limiter = TokenBucketRateLimiter("m", requests_per_minute=2, tokens_per_minute=1000, clock=clock)
+
+        self.assertTrue(limiter.acquire(blocking=False))
+        self.assertTrue(limiter.acquire(blocking=False))
+        self.assertFalse(limiter.acquire(blocking=False))
+        clock.now += 30
+        self.assertTrue(limiter.acquire(blocking=False))
+
+    def test_spent_tokens_delay_and_then_shed_calls(self):
+        clock = FakeClock()
+        limiter = TokenBucketRateLimiter("m", requests_per_minute=100, tokens_per_minute=600, max_wait=5, clock=clock)
+
+        limiter.record_tokens(1200)
+        self.assertFalse(limiter.acquire(blocking=False))
+        # Waiting for 600 tokens to refill takes a minute, longer than max_wait
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire()
+        clock.now += 61
+        self.assertTrue(limiter.acquire(blocking=False))
+
+
+def use_temp_vector_dir(test):
+    """Committed documents are embedded on commit; keep their index out of the real DOCUMENT_VECTOR_DIR."""
+    vector_dir = tempfile.TemporaryDirectory()
+    test.addCleanup(vector_dir.cleanup)
+    settings_override = override_settings(DOCUMENT_VECTOR_DIR=vector_dir.name)
+    settings_override.enable()
+    test.addCleanup(settings_override.disable)
+
+
+@override_settings(
+    AI_LLM_BACKEND="fake",
+    AI_CHECKPOINTER="memory",
+    AI_RESPONSE_CACHE_TTL=0,
+    AI_MODELS={"supervisor": "small", "agent": "large"},
+)
+class FakeBackendTests(TransactionTestCase):
+    # Sync tools run in worker threads with their own database connections
+    def setUp(self):
+        use_temp_vector_dir(self)
+        caches["ai"].clear()
+        graphs.reset()
+        self.addCleanup(graphs.reset)
+        self.user = get_user_model().objects.create_user(username="alice", password="pw")
+
+    def test_supervisor_routes_to_agent_tools_offline(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t1"}}
+
+        result = graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": "List my documents"}]}, config
+        )
+
+        self.assertIn("Inception notes", result["messages"][-1].content)
+        self.assertEqual(llms.get_model("supervisor").model_name, "small")
+        self.assertEqual(llms.get_model("agent").model_name, "large")
+        # "documents" routes straight to the document agent, skipping the supervisor model
+        self.assertEqual(llms.get_model("supervisor").calls, 0)
+
+    def test_commands_run_their_tool_without_any_model_call(self):
+        doc = Document.objects.create(owner=self.user, title="Old", content="x")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t3"}}
+
+        result = graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": f"delete document {doc.id}"}]}, config
+        )
+
+        self.assertEqual(result["messages"][-1].content, f"Done. Document ID {doc.id} deleted successfully.")
+        self.assertFalse(Document.objects.get(id=doc.id).active)
+        self.assertEqual(llms.get_model("supervisor").calls + llms.get_model("agent").calls, 0)
+
+    def test_commands_reply_to_bad_requests_and_raise_internal_errors(self):
+        node = commands.make_command_node()
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t7"}}
+        state = {"messages": [HumanMessage(content="delete document 999")]}
+
+        reply = node.invoke(state, config)["messages"][-1].content
+        self.assertEqual(reply, "I couldn't do that: Document not found or access denied.")
+
+        with mock.patch("ai.tools.documents._delete_document_by_id", side_effect=DatabaseError("disk I/O error")):
+            with self.assertRaises(DatabaseError):
+                node.invoke(state, config)
+
+    def test_independent_parts_run_in_parallel_and_are_merged(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams within dreams")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t4"}}
+
+        result = graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": "list my documents; search documents for dreams"}]}, config
+        )
+
+        reply = result["messages"][-1].content
+        self.assertTrue(reply.startswith("**list my documents**\n"))
+        self.assertIn("**search documents for dreams**\n", reply)
+        self.assertEqual(reply.count("Inception notes"), 2)
+        self.assertEqual(result["results"], [])
+        self.assertEqual(llms.get_model("supervisor").calls + llms.get_model("agent").calls, 0)
+
+    def test_parts_naming_no_domain_run_on_the_supervisor_in_parallel(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t6"}}
+
+        result = graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": "find Inception and also list my documents"}]}, config
+        )
+
+        reply = result["messages"][-1].content
+        self.assertTrue(reply.startswith("**find Inception**\n"))
+        self.assertIn("**list my documents**\n", reply)
+        self.assertGreater(llms.get_model("supervisor").calls, 0)
+
+    def test_turns_record_node_model_tool_and_database_metrics(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t5"}, "callbacks": [metrics.callback_handler]}
+
+        def sample(name, **labels):
+            return REGISTRY.get_sample_value(name, labels) or 0
+
+        tool = {"agent": "document_agent", "tool": "search_documents"}
+        before = {
+            "node": sample("ai_node_duration_seconds_count", agent="document_agent", node="tools"),
+            "tokens": sample("ai_llm_tokens_total", agent="document_agent", model="large", kind="prompt"),
+            "tool": sample("ai_tool_duration_seconds_count", status="ok", **tool),
+            "queries": sample("ai_tool_db_queries_sum", **tool),
+        }
+
+        graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": "Show my latest documents about dreams"}]}, config
+        )
+
+        self.assertEqual(sample("ai_node_duration_seconds_count", agent="document_agent", node="tools"), before["node"] + 1)
+        self.assertGreater(sample("ai_llm_tokens_total", agent="document_agent", model="large", kind="prompt"), before["tokens"])
+        self.assertEqual(sample("ai_tool_duration_seconds_count", status="ok", **tool), before["tool"] + 1)
+        self.assertGreater(sample("ai_tool_db_queries_sum", **tool), before["queries"])
+
+    @override_settings(AI_CHECKPOINTER="database", AI_CHECKPOINT_KEEP_LAST=5)
+    def test_sync_turns_persist_in_the_database_checkpointer(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "db"}}
+        graph = graphs.get_graph("main_supervisor")
+
+        for message in ["List my documents", "What do I have saved?", "list my documents; search documents for dreams"]:
+            result = graph.invoke({"messages": [{"role": "user", "content": message}]}, config)
+
+        self.assertEqual(sum(isinstance(m, HumanMessage) for m in result["messages"]), 3)
+        rows = Checkpoint.objects.filter(thread_id="db")
+        self.assertEqual(rows.count(), 5)
+        self.assertEqual(set(rows.values_list("checkpoint_ns", flat=True)), {""})
+
+    def test_unclear_requests_go_through_the_supervisor(self):
+        config = {"configurable": {"user_id": self.user.id, "thread_id": "t2"}}
+
+        result = graphs.get_graph("main_supervisor").invoke(
+            {"messages": [{"role": "user", "content": "What do I have saved?"}]}, config
+        )
+
+        self.assertGreater(llms.get_model("supervisor").calls, 0)
+        self.assertEqual(result["messages"][-1].content, 'Here is what I found:\n{"documents":[]}')
+
+
+class StubGraph:
+    """Streams EVENTS, then raises ERROR (if any); its state ends with MESSAGES."""
+
+    def __init__(self, events=(), error=None, messages=()):
+        self.events, self.error, self.messages = events, error, list(messages)
+
+    async def astream_events(self, inputs, config, version):
+        for event in self.events:
+            yield event
+        if self.error is not None:
+            raise self.error
+
+    async def aget_state(self, config):
+        return SimpleNamespace(values={"messages": self.messages})
+
+
+def token(content):
+    return {"event": "on_chat_model_stream", "name": "model", "metadata": {}, "data": {"chunk": AIMessage(content=content)}}
+
+
+async def read_events(stream):
+    body = "".join([event.decode() if isinstance(event, bytes) else event async for event in stream])
+    return [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in body.strip().split("\n\n")
+    ]
+
+
+@override_settings(
+    AI_LLM_BACKEND="fake",
+    AI_CHECKPOINTER="memory",
+    AI_RESPONSE_CACHE_TTL=0,
+)
+class ChatViewTests(TransactionTestCase):
+    def setUp(self):
+        use_temp_vector_dir(self)
+        graphs.reset()
+        self.addCleanup(graphs.reset)
+        self.user = get_user_model().objects.create_user(username="alice", password="pw")
+        self.client.force_login(self.user)
+
+    def post(self, url, body):
+        return self.client.post(url, body, content_type="application/json")
+
+    def test_rejects_bad_requests(self):
+        for body in ("not json", "[]", '"hi"', "1", "{}", '{"message": "  "}'):
+            with self.subTest(body=body):
+                self.assertEqual(self.post("/api/chat/", body).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.post("/api/chat/", {"message": "hi"}).status_code, 401)
+
+    def test_runs_a_turn_and_continues_the_thread(self):
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+
+        response = self.post("/api/chat/", {"message": "List my documents"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Inception notes", response.json()["reply"])
+        thread_id = response.json()["thread_id"]
+        again = self.post("/api/chat/", {"message": "List my documents", "thread_id": thread_id})
+        self.assertEqual(again.json()["thread_id"], thread_id)
+
+    async def test_streams_tool_events_and_done(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.post(
+            "/api/chat/stream/", {"message": "List my documents"}, content_type="application/json"
+        )
+        events = await read_events(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        # The fake model doesn't stream tokens
+        self.assertEqual(events[0], ("tool_start", {"agent": "document_agent", "tool": "list_documents", "input": {}}))
+        self.assertEqual(events[-1][0], "done")
+
+    async def test_stream_errors_do_not_leak_details(self):
+        graph = StubGraph([token("Hel")], RuntimeError("no such table: documents_document"))
+        with self.assertLogs("ai.views", "ERROR"):
+            events = await read_events(views.stream_chat_events(graph, {}, {}, "t1"))
+
+        self.assertEqual([kind for kind, _ in events], ["token", "error", "done"])
+        self.assertNotIn("documents_document", json.dumps(events))
+
+    @override_settings(AI_RESPONSE_CACHE_TTL=60, AI_CACHE_ALIAS="ai")
+    async def test_only_complete_streamed_replies_are_cached(self):
+        caches["ai"].clear()
+        get_response_cache.cache_clear()
+        self.addCleanup(get_response_cache.cache_clear)
+        handoff = AIMessage(content="", tool_calls=[{"name": "transfer_to_document_agent", "args": {}, "id": "1"}])
+        graphs_and_replies = [
+            (StubGraph([token("Part")], RuntimeError("boom"), [AIMessage(content="Part")]), None),
+            (StubGraph([token("x")], messages=[handoff]), None),
+            (StubGraph([token("All done")], messages=[AIMessage(content="All done")]), "All done"),
+        ]
+
+        for graph, cached in graphs_and_replies:
+            _, version = await sync_to_async(get_response_cache().get)(self.user.id, "hi")
+            with self.assertLogs("ai.views", "ERROR") if graph.error else nullcontext():
+                await read_events(views.stream_and_cache(graph, {}, {}, "t1", self.user, "hi", version))
+            self.assertEqual((await sync_to_async(get_response_cache().get)(self.user.id, "hi"))[0], cached)
+
+    async def test_stream_rate_limit_before_any_event_is_a_429(self):
+        await self.async_client.aforce_login(self.user)
+        graph = StubGraph(error=RateLimitExceeded("large", 4.2))
+
+        with mock.patch.object(views, "get_graph", return_value=graph):
+            response = await self.async_client.post(
+                "/api/chat/stream/", {"message": "hi"}, content_type="application/json"
+            )
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "5")
+
+
+@override_settings(AI_LLM_BACKEND="fake", AI_CHECKPOINTER="memory")
+class GraphRegistryTests(SimpleTestCase):
+    def setUp(self):
+        graphs.reset()
+        self.addCleanup(graphs.reset)
+
+    def test_graphs_are_built_once_per_process(self):
+        graph = graphs.get_graph("document_agent")
+
+        self.assertIs(graphs.get_graph("document_agent"), graph)
+        with self.assertRaises(ValueError):
+            graphs.get_graph("no_such_agent")
+
+    def test_warm_up_logs_graphs_that_fail_to_build(self):
+        def broken(checkpointer):
+            raise RuntimeError("GROQ_API_KEY is not set")
+
+        with mock.patch.dict(graphs.GRAPH_BUILDERS, {"broken": broken}):
+            with self.assertLogs("ai.graphs", "ERROR"):
+                graphs.warm_up()
+
+        self.assertIn("main_supervisor", graphs._graphs)
+
+    def test_tools_read_the_user_from_the_config(self):
+        self.assertEqual(get_user_id({"configurable": {"user_id": 3}}), 3)
+        self.assertIsNone(get_user_id(None))
+
+        tool = make_list_documents_tool()
+        # The config is injected at run time, never asked of the model
+        self.assertNotIn("config", tool.tool_call_schema.model_json_schema()["properties"])
+
+
+class CountingEncoding:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text, disallowed_special=()):
+        self.calls += 1
+        return text.split()
+
+
+class HistoryTests(SimpleTestCase):
+    def setUp(self):
+        history._token_counts.clear()
+        self.addCleanup(history._token_counts.clear)
+
+    def test_keeps_the_newest_turns_within_budget(self):
+        messages = []
+        for i in range(10):
+            messages += [HumanMessage(content=f"request {i} " + "word " * 20), AIMessage(content=f"answer {i} " + "word " * 20)]
+
+        with mock.patch.object(history, "_encoding", CountingEncoding()):
+            trimmed = history.make_pre_model_hook(max_tokens=120)({"messages": messages})["llm_input_messages"]
+
+        self.assertIsInstance(trimmed[0], SystemMessage)
+        self.assertIn('"request 7', trimmed[0].content)
+        self.assertEqual(trimmed[-1], messages[-1])
+        self.assertLessEqual(history.count_tokens(trimmed[1:]), 120)
+
+    def test_counts_are_memoized_per_content(self):
+        encoding = CountingEncoding()
+        messages = [HumanMessage(content=f"message {i}") for i in range(20)]
+
+        with mock.patch.object(history, "_encoding", encoding):
+            hook = history.make_pre_model_hook(max_tokens=1000)
+            hook({"messages": messages})
+            first = encoding.calls
+            hook({"messages": messages + [AIMessage(content="one more")]})
+
+        self.assertLessEqual(first, len(messages))
+        self.assertEqual(encoding.calls, first + 1)
+
+    def test_falls_back_to_four_characters_per_token(self):
+        with mock.patch.object(history, "_encoding", False):
+            self.assertEqual(history.count_text_tokens("x" * 40), 11)
+
+
+class RouterTests(SimpleTestCase):
+    def test_routes_only_clear_cut_requests(self):
+        self.assertEqual(router.classify("List my documents"), "document_agent")
+        self.assertEqual(router.classify("delete doc 3"), "document_agent")
+        self.assertEqual(router.classify("search movies about space"), "movie_discovery_agent")
+        # Both domains need coordinating; no domain needs the model
+        self.assertIsNone(router.classify("create a document about the movie Inception"))
+        self.assertIsNone(router.classify("and the second one?"))
+
+    def test_parses_only_exact_commands(self):
+        self.assertEqual(parse_command("Get document 12"), ("get_document", {"document_id": 12}))
+        self.assertEqual(parse_command("please delete doc #3."), ("delete_document", {"document_id": 3}))
+        self.assertEqual(parse_command("list my 10 recent documents"), ("list_documents", {"limit": 10}))
+        self.assertEqual(parse_command("search documents for 'time travel'"), ("search_documents", {"query": "time travel"}))
+        self.assertEqual(
+            parse_command("rename document 4 to Summer plans"),
+            ("update_document", {"document_id": 4, "title": "Summer plans"}),
+        )
+        self.assertIsNone(parse_command("delete document 3 and create a new one about Tenet"))
+        self.assertIsNone(parse_command("summarize document 3"))
+
+    def test_splits_only_independent_parts(self):
+        self.assertEqual(router.plan_subtasks("search movies about space; list my documents"), [
+            ("movie_discovery_agent", "search movies about space"),
+            ("command", "list my documents"),
+        ])
+        # Parts that depend on each other or on their order stay whole
+        self.assertIsNone(router.plan_subtasks("find movies about space and then create a document"))
+        self.assertIsNone(router.plan_subtasks("search movies about space; create a document about it"))
+        # Two writes to the same domain could conflict
+        self.assertIsNone(router.plan_subtasks("delete document 3; rename document 4 to Plans"))
+        # A part naming no domain is left to the supervisor, next to the rest
+        self.assertEqual(router.plan_subtasks("find Inception and also list my documents"), [
+            ("supervisor", "find Inception"),
+            ("command", "list my documents"),
+        ])
+        self.assertIsNone(router.plan_subtasks("find Inception; tell me a joke"))
+        self.assertIsNone(router.plan_subtasks("find Inception; delete document 3"))
+        self.assertIsNone(router.plan_subtasks("list my documents"))
+
+    def test_subtasks_see_the_conversation_so_far(self):
+        received = []
+
+        def agent(inputs):
+            received.append(inputs["messages"])
+            return {"messages": [AIMessage(content="done")]}
+
+        node = supervisors.make_subtask_node({"document_agent": RunnableLambda(agent)})
+        earlier = [HumanMessage(content="list my documents"), AIMessage(content="ID 3: Tenet")]
+
+        result = node.invoke({"route": "document_agent", "task": "open document 3", "messages": earlier})
+
+        self.assertEqual(result, {"results": [("open document 3", "done")]})
+        self.assertEqual([m.content for m in received[0]], ["list my documents", "ID 3: Tenet", "open document 3"])
+
+
+@override_settings(AI_CACHE_ALIAS="ai", AI_TOOL_MEMO_TTL=60)
+class ToolMemoTests(TestCase):
+    def setUp(self):
+        caches["ai"].clear()
+        get_tool_memo.cache_clear()
+        self.addCleanup(get_tool_memo.cache_clear)
+        self.user = get_user_model().objects.create_user(username="alice", password="pw")
+        Document.objects.create(owner=self.user, title="Inception notes", content="dreams")
+        self.config = {"configurable": {"user_id": self.user.id, "thread_id": "t1", "turn_id": "turn-1"}}
+
+    def test_repeated_read_only_calls_in_a_turn_are_reused(self):
+        tool = make_list_documents_tool()
+        first = tool.invoke({"limit": 5}, self.config)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(tool.invoke({"limit": 5}, self.config), first)
+        # Other arguments, later turns and calls outside a turn run the tool
+        with self.assertNumQueries(1):
+            tool.invoke({"limit": 3}, self.config)
+        next_turn = {"configurable": {**self.config["configurable"], "turn_id": "turn-2"}}
+        with self.assertNumQueries(1):
+            tool.invoke({"limit": 5}, next_turn)
+        with self.assertNumQueries(1):
+            tool.invoke({"limit": 5}, {"configurable": {"user_id": self.user.id, "thread_id": "t1"}})
+
+    def test_write_tools_invalidate_the_memo(self):
+        tool = make_list_documents_tool()
+        tool.invoke({"limit": 5}, self.config)
+
+        make_create_document_tool().invoke({"title": "Tenet notes", "content": "time"}, self.config)
+
+        self.assertIn("Tenet notes", tool.invoke({"limit": 5}, self.config))
+
+    def test_error_results_are_not_kept(self):
+        calls = []
+
+        @memoized_tool(documents=False)
+        def make_flaky_tool():
+            def _flaky(query: str, config: RunnableConfig):
+                calls.append(query)
+                return output.dumps({"error": "Search failed."} if len(calls) == 1 else {"results": []})
+
+            return StructuredTool.from_function(func=_flaky, name="flaky", description="Search.")
+
+        tool = make_flaky_tool()
+        self.assertEqual(json.loads(tool.invoke({"query": "x"}, self.config)), {"error": "Search failed."})
+        self.assertEqual(tool.invoke({"query": "x"}, self.config), '{"results":[]}')
+        self.assertEqual(tool.invoke({"query": "x"}, self.config), '{"results":[]}')
+        self.assertEqual(len(calls), 2)
+
+    async def test_async_calls_share_the_memo(self):
+        tool = make_list_documents_tool()
+        first = await tool.ainvoke({"limit": 5}, self.config)
+        hits = REGISTRY.get_sample_value("ai_tool_memo_requests_total", {"result": "hit"}) or 0
+
+        self.assertEqual(await tool.ainvoke({"limit": 5}, self.config), first)
+        self.assertEqual(REGISTRY.get_sample_value("ai_tool_memo_requests_total", {"result": "hit"}), hits + 1)
+
+
+class BulkToolTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="alice", password="pw")
+        self.config = {"configurable": {"user_id": self.user.id}}
+
+    def test_bulk_tools_report_every_item(self):
+        created = json.loads(make_bulk_create_documents_tool().invoke(
+            {"documents": [{"title": f"Notes {i}", "content": "dreams"} for i in range(3)]}, self.config
+        ))["created"]
+        ids = [doc["id"] for doc in created]
+        self.assertEqual([doc.title for doc in Document.objects.filter(id__in=ids).order_by("id")], ["Notes 0", "Notes 1", "Notes 2"])
+
+        updated = json.loads(make_bulk_update_documents_tool().invoke(
+            {"updates": [{"document_id": ids[0], "title": "Renamed"}, {"document_id": ids[1]}, {"document_id": 999}]}, self.config
+        ))
+        self.assertEqual(updated, {"updated": [ids[0]], "unchanged": [ids[1]], "not_found": [999]})
+        self.assertEqual(Document.objects.get(id=ids[0]).title, "Renamed")
+
+        deleted = json.loads(make_bulk_delete_documents_tool().invoke({"document_ids": [ids[2], 999]}, self.config))
+        self.assertEqual(deleted, {"deleted": [ids[2]], "not_found": [999]})
+        self.assertFalse(Document.objects.get(id=ids[2]).active)
+
+    def test_oversize_requests_are_rejected_not_truncated(self):
+        ids = list(range(1, MAX_BULK_ITEMS + 2))
+        with self.assertRaises(ValidationError):
+            make_bulk_delete_documents_tool().invoke({"document_ids": ids}, self.config)
+        with self.assertRaises(ValidationError):
+            make_bulk_create_documents_tool().invoke(
+                {"documents": [{"title": "x", "content": "y"}] * (MAX_BULK_ITEMS + 1)}, self.config
+            )
+        self.assertFalse(Document.objects.exists())
+
+    @override_settings(DOCUMENT_CHUNK_SIZE=200)
+    async def test_async_document_tools_use_the_async_orm(self):
+        create, get = make_create_document_tool(), make_get_document_tool()
+        short = json.loads(await create.ainvoke({"title": "Plans", "content": "short"}, self.config))
+        long = json.loads(await create.ainvoke({"title": "Notes", "content": "\n\n".join(["word " * 50] * 4)}, self.config))
+
+        self.assertEqual(json.loads(await get.ainvoke({"document_id": short["id"]}, self.config))["content"], "short")
+        section = json.loads(await get.ainvoke({"document_id": long["id"], "section": 2}, self.config))
+        self.assertEqual((section["sections"], section["next_section"]), ([2, 2], 3))
+        with self.assertRaises(Document.DoesNotExist):
+            await get.ainvoke({"document_id": 999}, self.config)
+
+    def test_movie_batches_over_the_limit_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            make_movie_details_batch_tool().invoke({"movie_ids": list(range(1, MAX_BATCH_SIZE + 2))}, self.config)
+
+
+class ToolOutputTests(TestCase):
+    def test_document_results_are_compact_json(self):
+        user = get_user_model().objects.create_user(username="alice", password="pw")
+        docs = [Document.objects.create(owner=user, title=f"Notes {i}", content="x") for i in range(3)]
+
+        result = json.loads(make_list_documents_tool().invoke({"limit": 2}, {"configurable": {"user_id": user.id}}))
+
+        self.assertEqual(result["documents"], [{"id": docs[2].id, "title": "Notes 2"}, {"id": docs[1].id, "title": "Notes 1"}])
+        self.assertIn("next_cursor", result)
+
+    def test_tmdb_results_keep_only_whitelisted_fields(self):
+        detail = output.movie_detail_result(stub.movie_detail(27205))
+        self.assertEqual(set(detail) - set(output.MOVIE_DETAIL_FIELDS), set())
+        self.assertNotIn("backdrop_path", detail)
+        self.assertEqual(detail["genres"], [genre["name"] for genre in stub.movie_detail(27205)["genres"]])
+
+        raw = stub.search_results("space")["results"][0]
+        found = output.search_movie_result(raw)
+        self.assertEqual(list(found), ["id", "title", "release_date", "vote_average", "overview"])
+        self.assertLessEqual(len(found["overview"]), output.SEARCH_OVERVIEW_CHARS + 1)
+        self.assertLess(len(output.dumps(found)), len(json.dumps(raw)))
+        self.assertLess(len(output.dumps(detail)), len(json.dumps(stub.movie_detail(27205))) / 2)
+
+
+class BenchmarkTests(TransactionTestCase):
+    def test_percentiles_and_regressions(self):
+        samples = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(benchmark.summarize(samples)["p50_ms"], 50.5)
+        self.assertEqual(benchmark.summarize(samples)["p99_ms"], 99.01)
+
+        baseline = {"scenarios": {"a": {"p95_ms": 100, "errors": 0}, "b": {"p95_ms": 100, "errors": 0}}}
+        results = {"scenarios": {"a": {"p95_ms": 110, "errors": 0}, "b": {"p95_ms": 150, "errors": 0}}}
+        self.assertEqual(benchmark.compare(results, baseline), ["scenarios/b: p95_ms 100.0 -> 150.0 (+50%)"])
+
+    def test_runs_offline_against_the_stub_tmdb_server(self):
+        results = benchmark.run_benchmark(
+            users=1, documents=3, words=40, runs=2, scenarios=["command_list", "movie_search"], tools=["search_movies"],
+            checkpointer="memory",
+        )
+
+        for name in ("command_list", "movie_search"):
+            self.assertEqual((results["scenarios"][name]["count"], results["scenarios"][name]["errors"]), (2, 0))
+        self.assertIn("tool:search_movies", results["scenarios"]["movie_search"]["components"])
+        self.assertEqual(results["tools"]["search_movies"]["errors"], 0)
+        self.assertGreater(results["tmdb"]["requests"], 0)
@@ -1,3 +1,14 @@
+from langchain_core.runnables import RunnableConfig
+
+
+def get_user_id(config: RunnableConfig):
+    """
+    Read the current user from the runtime config passed to invoke/stream,
+    so one compiled graph can serve every user.
+    """
+    return (config or {}).get('configurable', {}).get('user_id')
+
+
 # from .documents import document_tools
 # from .movie_discovery import movie_discovery_tools
 
@@ -1,21 +1,43 @@
 from documents.models import Document
-from langchain_core.tools import Tool
-from django.db.models import Q
-from typing import Any
+from documents import indexing, pagination, search
+from django.db import transaction
+from django.utils import timezone
+from asgiref.sync import sync_to_async
+from ai.metrics import instrumented_tool
+from ai.tools import get_user_id, output
+from ai.cache import bump_documents_version, memoized_tool
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+from django.conf import settings
+from django.db.models.functions import Length
+from typing import Any, Literal
 # from langchain_core.pydantic_v1 import BaseModel, Field
 from pydantic import field_validator, BaseModel, Field
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Define schema using Pydantic
 class ListDocumentsInput(BaseModel):
     limit: int = Field(default=5, description="Number of documents to return (max 25)")
+    cursor: str = Field(default=None, description="Continuation token from a previous list_documents call, to get the next page")
 
 class SearchDocumentsInput(BaseModel):
-    query: str = Field(..., description="Keyword to search for in title or content")
+    query: str = Field(..., description="Keyword or topic to search for in title or content")
     limit: int = Field(default=5, description="Number of results to return (max 25)")
+    mode: Literal["hybrid", "keyword", "semantic"] = Field(
+        default="hybrid",
+        description="'keyword' for exact words, 'semantic' for documents about the topic, 'hybrid' for both",
+    )
+    cursor: str = Field(default=None, description="Continuation token from a previous search_documents call with the same query, to get the next page")
+
+MAX_SECTIONS = 3
 
 class GetDocumentInput(BaseModel):
     document_id: int = Field(..., description="ID of the document to retrieve")
+    section: int = Field(default=None, description="Section number to read from a long document (sections start at 1); search_documents tells which section matches")
+    sections: int = Field(default=1, description=f"Number of consecutive sections to return from `section` (max {MAX_SECTIONS})")
 
 class CreateDocumentInput(BaseModel):
     title: str = Field(..., description="Title of the new document")
@@ -25,26 +47,26 @@ class CreateDocumentInput(BaseModel):
     @classmethod
     def flatten_content(cls, v: Any) -> str:
         """Convert any nested content structure to a flat string."""
-        print(f"🔧 Validator received content: {type(v)} = {v}")
+        logger.debug("Validator received content: %s = %r", type(v), v)
         
         if isinstance(v, dict):
             # Handle nested structure like {"title": "...", "content": "..."}
             if "content" in v:
                 result = str(v["content"])
-                print(f"🔧 Extracted nested content: {result}")
+                logger.debug("Extracted nested content: %r", result)
                 return result
             else:
                 # If it's a dict without "content" key, stringify the whole thing
                 result = str(v)
-                print(f"🔧 Stringified dict: {result}")
+                logger.debug("Stringified dict: %r", result)
                 return result
         elif isinstance(v, str):
-            print(f"🔧 Content already string: {v}")
+            logger.debug("Content already string: %r", v)
             return v
         else:
             # Handle any other type
             result = str(v)
-            print(f"🔧 Converted to string: {result}")
+            logger.debug("Converted to string: %r", result)
             return result
 
 class UpdateDocumentInput(BaseModel):
@@ -55,189 +77,463 @@ class UpdateDocumentInput(BaseModel):
 class DeleteDocumentInput(BaseModel):
     document_id: int = Field(..., description="ID of the document to delete")
 
+# Larger requests are rejected by the schemas, never truncated
+MAX_BULK_ITEMS = 50
+
+class BulkCreateDocumentsInput(BaseModel):
+    documents: list[CreateDocumentInput] = Field(..., max_length=MAX_BULK_ITEMS, description=f"Documents to create, each with title and content (max {MAX_BULK_ITEMS})")
+
+class BulkUpdateDocumentsInput(BaseModel):
+    updates: list[UpdateDocumentInput] = Field(..., max_length=MAX_BULK_ITEMS, description=f"Changes to apply, each with document_id and an optional new title/content (max {MAX_BULK_ITEMS})")
+
+class BulkDeleteDocumentsInput(BaseModel):
+    document_ids: list[int] = Field(..., max_length=MAX_BULK_ITEMS, description=f"IDs of the documents to delete (max {MAX_BULK_ITEMS})")
+
+def _result(**fields):
+    """Compact JSON tool result; fields that are None are left out."""
+    return output.dumps({key: value for key, value in fields.items() if value is not None})
+
+def _format_document_list(docs, cursor=None):
+    return _result(documents=[{"id": doc.id, "title": doc.title} for doc in docs], next_cursor=cursor)
+
+def _format_search_results(query, results, cursor=None, truncated=False):
+    documents = []
+    for doc in results:
+        found = {"id": doc["id"], "title": doc["title"]}
+        if doc.get("section") is not None:
+            found["section"] = doc["section"] + 1
+        if doc["snippet"]:
+            found["snippet"] = doc["snippet"]
+        documents.append(found)
+    # Best match first
+    return _result(query=query, results=documents, next_cursor=cursor, truncated=truncated or None)
+
+def _list_documents_query(user_id, cursor=None):
+    # Only the rendered columns: never pull every row's content
+    qs = Document.objects.filter(owner_id=user_id, active=True).order_by("-created_at", "-id").only("id", "title", "created_at")
+    if cursor:
+        qs = qs.filter(pagination.list_after(cursor))
+    return qs
+
+def _page(items, limit, make_cursor):
+    """Split LIMIT + 1 fetched ITEMS into the page and the cursor of the next one (None when last)."""
+    if len(items) <= limit:
+        return items, None
+    return items[:limit], make_cursor(items[limit - 1])
+
+def _search_page(user_id, query, limit, mode, cursor=None):
+    after = pagination.search_after(cursor, query, mode) if cursor else None
+    found = search.hybrid_search(user_id, query, limit=limit + 1, mode=mode, after=after)
+    results, next_cursor = _page(found, limit, lambda last: pagination.search_cursor(query, mode, last))
+    # Unranked fallback results can't be continued
+    if results and results[-1]["score"] is None:
+        next_cursor = None
+    return _format_search_results(query, results, next_cursor, truncated=found.truncated and next_cursor is None)
+
+def _format_document(doc):
+    return _result(id=doc.id, title=doc.title, content=doc.content)
+
+def _format_document_sections(doc, chunks, first, total):
+    last = first + len(chunks) - 1
+    end = chunks[-1].start + len(chunks[-1].content)
+    return _result(
+        id=doc.id,
+        title=doc.title,
+        sections=[first, last],
+        total_sections=total,
+        characters=[chunks[0].start, end],
+        length=doc.content_length,
+        content="\n\n".join(chunk.content for chunk in chunks),
+        next_section=last + 1 if last < total else None,
+    )
+
+def _document_without_content(document_id, user_id):
+    return (
+        Document.objects.filter(id=document_id, owner_id=user_id, active=True)
+        .annotate(content_length=Length("content"))
+        .defer("content")
+    )
 
-def make_list_documents_tool(config):
+def _sections_to_read(doc, total, section=None, sections=1):
+    """The (first, count) sections of DOC to return, or None to return it whole."""
+    if total == 0 or (section is None and (doc.content_length or 0) <= settings.DOCUMENT_CHUNK_SIZE):
+        return None
+    first = section or 1
+    if not 1 <= first <= total:
+        raise ValueError(f"Document ID {doc.id} has sections 1 to {total}.")
+    return first, max(1, min(sections or 1, MAX_SECTIONS))
+
+def _section_chunks(doc, first, count):
+    return doc.chunks.filter(index__gte=first - 1, index__lt=first - 1 + count).order_by("index")
+
+def _get_document_sections(document_id, user_id, section=None, sections=1):
+    """
+    Short documents are returned whole; long ones a few sections (chunks) at
+    a time, so the full content is never loaded into memory or the prompt.
+    """
+    doc = _document_without_content(document_id, user_id).first()
+    if doc is None:
+        raise Document.DoesNotExist("Document not found or access denied.")
+
+    total = doc.chunks.count()
+    to_read = _sections_to_read(doc, total, section, sections)
+    if to_read is None:
+        return _format_document(doc)
+    first, count = to_read
+    chunks = list(_section_chunks(doc, first, count))
+    return _format_document_sections(doc, chunks, first, total)
+
+async def _aget_document_sections(document_id, user_id, section=None, sections=1):
+    doc = await _document_without_content(document_id, user_id).afirst()
+    if doc is None:
+        raise Document.DoesNotExist("Document not found or access denied.")
+
+    total = await doc.chunks.acount()
+    to_read = _sections_to_read(doc, total, section, sections)
+    if to_read is None:
+        # content is deferred: load it here rather than lazily on access
+        await doc.arefresh_from_db(fields=["content"])
+        return _format_document(doc)
+    first, count = to_read
+    chunks = [chunk async for chunk in _section_chunks(doc, first, count)]
+    return _format_document_sections(doc, chunks, first, total)
+
+def _flatten_content(content):
+    # Additional safety check in case validator didn't work
+    if isinstance(content, dict):
+        logger.debug("Content was still dict - applying fallback conversion")
+        if "content" in content:
+            return str(content["content"])
+        return str(content)
+    return content
+
+
+@instrumented_tool
+@memoized_tool
+def make_list_documents_tool():
     
-    def _list_documents(limit: int = 5):
+    def _list_documents(config: RunnableConfig, limit: int = 5, cursor: str = None):
         """
         List the most recent LIMIT documents for the current user with maximum of 25.
 
         Arguments:
         limit: number of results
+        cursor: continuation token returned with the previous page
         """
-        print("✅ [Tool] list_documents was called")
+        logger.info("list_documents was called")
         if limit > 25:
             limit = 25
 
-        user_id = config.get('configurable', {}).get('user_id')
-        qs = Document.objects.filter(owner_id=user_id, active=True).order_by("-created_at")
+        user_id = get_user_id(config)
+        # One extra row tells whether there is a next page
+        docs = list(_list_documents_query(user_id, cursor)[:limit + 1])
+        docs, next_cursor = _page(docs, limit, pagination.list_cursor)
+        return _format_document_list(docs, next_cursor)
 
-        docs = qs[:limit]
-        if not docs:
-            return "No documents found."
-        
-        # return [
-        #     {"id": doc.id, "title": doc.title}
-        #     for doc in qs[:limit]
-        # ]
-        # Return as formatted string instead of list of dicts
-        doc_list = "\n".join([f"ID {doc.id}: {doc.title}" for doc in docs])
-        return f"Your recent documents:\n{doc_list}"
-
-    return Tool.from_function(
+    async def _alist_documents(config: RunnableConfig, limit: int = 5, cursor: str = None):
+        limit = min(limit, 25)
+        user_id = get_user_id(config)
+
+        docs = [doc async for doc in _list_documents_query(user_id, cursor)[:limit + 1]]
+        docs, next_cursor = _page(docs, limit, pagination.list_cursor)
+        return _format_document_list(docs, next_cursor)
+
+    return StructuredTool.from_function(
         name="list_documents",
         func=_list_documents,
-        description="List upto 25 documents for the current user, ordered by most recent first. Use this tool whenever the user asks for recent, all, or latest documents..",
+        coroutine=_alist_documents,
+        description="List upto 25 documents for the current user, ordered by most recent first. Use this tool whenever the user asks for recent, all, or latest documents. When the result has next_cursor, pass it as cursor to get the next page.",
         args_schema=ListDocumentsInput
     )
 
-def make_search_documents_tool(config):
-    def _search_documents(query: str, limit: int = 5):
+@instrumented_tool
+@memoized_tool
+def make_search_documents_tool():
+    def _search_documents(query: str, config: RunnableConfig, limit: int = 5, mode: str = "hybrid", cursor: str = None):
         """
-        Search documents using a keyword.
+        Full-text search of the user's documents, ranked by relevance.
 
         Parameters:
         - query (str): The search string to filter documents.
         - limit (int, optional): Maximum number of results to return. Defaults to 5.
+        - mode (str, optional): "hybrid" (default), "keyword" or "semantic".
+        - cursor (str, optional): continuation token returned with the previous page.
         """
 
-        print("✅ [Tool] search_documents was called")
+        logger.info("search_documents was called")
         if limit > 25:
             limit = 25
 
-        user_id = config.get('configurable', {}).get('user_id')
+        user_id = get_user_id(config)
 
-        qs = Document.objects.filter(
-            Q(owner_id=user_id),
-            Q(active=True),
-            Q(title__icontains=query) | Q(content__icontains=query)
-        ).order_by("-created_at")
+        return _search_page(user_id, query, limit, mode, cursor)
 
-        docs = qs[:limit]
-        if not docs:
-            return "No documents found matching the query."
-        
-        doc_list = "\n".join([f"ID {doc.id}: {doc.title}" for doc in docs])
-        return f"Found {len(docs)} documents matching '{query}':\n{doc_list}"
+    async def _asearch_documents(query: str, config: RunnableConfig, limit: int = 5, mode: str = "hybrid", cursor: str = None):
+        limit = min(limit, 25)
+        user_id = get_user_id(config)
 
-    return Tool.from_function(
+        # Full-text search runs raw SQL, which has no async cursor in Django
+        return await sync_to_async(_search_page)(user_id, query, limit, mode, cursor)
+
+    return StructuredTool.from_function(
         name="search_documents",
         func=_search_documents,
-        description="Search the user’s documents by keyword in title or content. Use when the user wants to find specific documents based on text.",
+        coroutine=_asearch_documents,
+        description="Search the user’s documents by keyword or by topic (semantic), best match first, with a matching snippet. Use when the user wants to find specific documents based on text. When the result has truncated, only the best matches were searched: tell the user, and use mode 'keyword' or a narrower query to see the rest.",
         args_schema=SearchDocumentsInput
     )
 
-def make_get_document_tool(config):
-    def _get_document(document_id: int):
-        print("✅ [Tool] get_documents was called")
-        user_id = config.get('configurable', {}).get('user_id')
-
-        try:
-            doc = Document.objects.get(id=document_id, owner_id=user_id, active=True)
-            # Return formatted string instead of dict
-            return f"Document ID {doc.id}: {doc.title}\n\nContent:\n{doc.content}"
-        except Document.DoesNotExist:
-            raise Exception("Document not found or access denied.")
-
-        # return {
-        #     "id": doc.id,
-        #     "title": doc.title,
-        #     "content": doc.content,
-        #     "created_at": doc.created_at
-        # }
-
-    return Tool.from_function(
+@instrumented_tool
+@memoized_tool
+def make_get_document_tool():
+    def _get_document(document_id: int, config: RunnableConfig, section: int = None, sections: int = 1):
+        logger.info("get_document was called")
+        user_id = get_user_id(config)
+
+        return _get_document_sections(document_id, user_id, section=section, sections=sections)
+
+    async def _aget_document(document_id: int, config: RunnableConfig, section: int = None, sections: int = 1):
+        user_id = get_user_id(config)
+
+        return await _aget_document_sections(document_id, user_id, section=section, sections=sections)
+
+    return StructuredTool.from_function(
         name="get_document",
         func=_get_document,
-        description="Retrieve a specific document’s full details (title, content, date) by its ID. Use when the user asks to open or view a document.",
+        coroutine=_aget_document,
+        description="Retrieve a specific document’s content by its ID. Long documents are returned a few sections at a time; pass `section` (e.g. the result's next_section) to read a specific part. Use when the user asks to open or view a document.",
         args_schema=GetDocumentInput
     )
 
-def make_create_document_tool(config):
-    def _create_document(title: str, content: str):
+def _create_document_for(user_id, title, content):
+    if not user_id:
+        raise Exception("Missing user_id in config")
 
-        print(f"[Tool] create_document called with title='{title}', content type={type(content)}")
-        print(f"[Tool] Content preview: {content[:100]}..." if len(str(content)) > 100 else f"[Tool] Content: {content}")
-        
-        user_id = config.get("configurable", {}).get("user_id")
+    doc = Document.objects.create(
+        owner_id=user_id,
+        title=title,
+        content=_flatten_content(content),
+        active=True)
+    # Cached replies that read this user's documents are now stale
+    bump_documents_version(user_id)
+
+    return _result(id=doc.id, title=doc.title, status="created")
+
+
+@instrumented_tool
+def make_create_document_tool():
+    def _create_document(title: str, content: str, config: RunnableConfig):
+
+        logger.info("create_document called with title=%r, content type=%s", title, type(content))
+        logger.debug("Content preview: %.100s", content)
+
+        return _create_document_for(get_user_id(config), title, content)
+
+    async def _acreate_document(title: str, content: str, config: RunnableConfig):
+        user_id = get_user_id(config)
         if not user_id:
             raise Exception("Missing user_id in config")
-        
-        # Additional safety check in case validator didn't work
-        if isinstance(content, dict):
-            print("[Tool] Content was still dict - applying fallback conversion")
-            if "content" in content:
-                content = str(content["content"])
-            else:
-                content = str(content)
-
 
-        doc = Document.objects.create(
-            owner_id=user_id, 
-            title=title, 
-            content=content, 
+        doc = await Document.objects.acreate(
+            owner_id=user_id,
+            title=title,
+            content=_flatten_content(content),
             active=True)
+        bump_documents_version(user_id)
 
-        # return json.dumps({
-        #     "id": doc.id,
-        #     "title": doc.title,
-        #     "content": doc.content,
-        #     "created_at": doc.created_at.isoformat()  # optional formatting
-        # })
-        # Return a simple string message instead of complex dict
-        return f"Document '{doc.title}' created successfully with ID {doc.id}"
+        return _result(id=doc.id, title=doc.title, status="created")
     
-    return Tool.from_function(
+    return StructuredTool.from_function(
         name="create_document",
         func=_create_document,
+        coroutine=_acreate_document,
         description="Create a new document for the user by providing a title and content. Use when the user asks to write, draft, or save a new document.",
         args_schema=CreateDocumentInput
     )
 
-def make_update_document_tool(config):
-    def _update_document(document_id: int, title: str = None, content: str = None):
-        print("✅ [Tool] update_documents was called")
-        user_id = config.get('configurable', {}).get('user_id')
+# Updates, deletes and bulk writes run in transaction.atomic(), which has no
+# async form, so their async variants run the sync helper in a thread
+
+def _update_document_fields(document_id, user_id, title=None, content=None):
+    changes = {}
+    if title:
+        changes["title"] = title
+    if content:
+        changes["content"] = content
+
+    # One UPDATE scoped to the owner; the row is never loaded
+    with transaction.atomic():
+        qs = Document.objects.filter(id=document_id, owner_id=user_id, active=True)
+        if changes:
+            found = qs.update(**changes, updated_at=timezone.now())
+        else:
+            found = qs.exists()
+        if not found:
+            raise Document.DoesNotExist("Document not found or access denied.")
+        if changes:
+            indexing.documents_changed([document_id], content="content" in changes)
+            bump_documents_version(user_id)
+
+    return _result(id=document_id, title=title or None, status="updated" if changes else "unchanged")
 
-        try:
-            doc = Document.objects.get(id=document_id, owner_id=user_id, active=True)
-        except Document.DoesNotExist:
-            raise Exception("Document not found or access denied.")
 
-        if title:
-            doc.title = title
-        if content:
-            doc.content = content
-        if title or content:
-            doc.save()
+@instrumented_tool
+def make_update_document_tool():
+    def _update_document(document_id: int, config: RunnableConfig, title: str = None, content: str = None):
+        logger.info("update_document was called")
+        return _update_document_fields(document_id, get_user_id(config), title=title, content=content)
 
-        return f"Document ID {doc.id} ('{doc.title}') updated successfully."
+    async def _aupdate_document(document_id: int, config: RunnableConfig, title: str = None, content: str = None):
+        return await sync_to_async(_update_document_fields)(
+            document_id, get_user_id(config), title=title, content=content
+        )
 
-    return Tool.from_function(
+    return StructuredTool.from_function(
         name="update_document",
         func=_update_document,
+        coroutine=_aupdate_document,
         description="Update an existing document’s title or content. Use when the user asks to rename, fix, revise, modify, or correct a document.",
         args_schema=UpdateDocumentInput
     )
 
-def make_delete_document_tool(config):
-    def _delete_document(document_id: int):
-        print("✅ [Tool] delete_document was called")
-        user_id = config.get('configurable', {}).get('user_id')
+def _delete_document_by_id(document_id, user_id):
+    # Soft delete: one UPDATE, the row is archived later
+    if not Document.objects.filter(id=document_id, owner_id=user_id).soft_delete():
+        raise Document.DoesNotExist("Document not found or access denied.")
+    bump_documents_version(user_id)
+    return _result(id=document_id, status="deleted")
+
 
-        try:
-            doc = Document.objects.get(id=document_id, owner_id=user_id, active=True)
-            doc.delete()
-            return f"Document ID {document_id} deleted successfully."
-        except Document.DoesNotExist:
-            raise Exception("Document not found or access denied.")
+@instrumented_tool
+def make_delete_document_tool():
+    def _delete_document(document_id: int, config: RunnableConfig):
+        logger.info("delete_document was called")
+        return _delete_document_by_id(document_id, get_user_id(config))
 
-    return Tool.from_function(
+    async def _adelete_document(document_id: int, config: RunnableConfig):
+        return await sync_to_async(_delete_document_by_id)(document_id, get_user_id(config))
+
+    return StructuredTool.from_function(
         name="delete_document",
         func=_delete_document,
+        coroutine=_adelete_document,
         description="Delete a document from the user’s list by specifying its ID. Use when the user wants to remove or erase a document.",
         args_schema=DeleteDocumentInput
     )
 
 
+def _bulk_create_documents(documents, user_id):
+    documents = [CreateDocumentInput.model_validate(doc) for doc in documents]
+    now = timezone.now()
+    with transaction.atomic():
+        docs = Document.objects.bulk_create([
+            Document(owner_id=user_id, title=doc.title, content=doc.content, active=True, active_at=now)
+            for doc in documents
+        ])
+        # bulk_create bypasses Document.save(), so sync the search indexes here
+        indexing.documents_changed([doc.id for doc in docs])
+    bump_documents_version(user_id)
+    return _result(created=[{"id": doc.id, "title": doc.title} for doc in docs])
+
+def _bulk_update_documents(updates, user_id):
+    updates = [UpdateDocumentInput.model_validate(update) for update in updates]
+    now = timezone.now()
+    with transaction.atomic():
+        docs = Document.objects.filter(
+            id__in=[update.document_id for update in updates], owner_id=user_id, active=True
+        ).only("id").in_bulk()
+
+        retitled, rewritten = [], []
+        results = {"updated": [], "unchanged": [], "not_found": []}
+        for update in updates:
+            doc = docs.get(update.document_id)
+            if doc is None:
+                results["not_found"].append(update.document_id)
+                continue
+            if not (update.title or update.content):
+                results["unchanged"].append(update.document_id)
+                continue
+            doc.updated_at = now
+            if update.title:
+                doc.title = update.title
+                retitled.append(doc)
+            if update.content:
+                doc.content = update.content
+                rewritten.append(doc)
+            results["updated"].append(update.document_id)
+
+        # At most two UPDATE statements, without loading any content
+        Document.objects.bulk_update(retitled, ["title", "updated_at"])
+        Document.objects.bulk_update(rewritten, ["content", "updated_at"])
+        indexing.documents_changed({doc.id for doc in retitled} - {doc.id for doc in rewritten}, content=False)
+        indexing.documents_changed([doc.id for doc in rewritten])
+    if retitled or rewritten:
+        bump_documents_version(user_id)
+    return _result(**{status: ids for status, ids in results.items() if ids})
+
+def _bulk_delete_documents(document_ids, user_id):
+    document_ids = list(dict.fromkeys(document_ids))
+    found = set(Document.objects.filter(id__in=document_ids, owner_id=user_id).soft_delete())
+    if found:
+        bump_documents_version(user_id)
+    return _result(
+        deleted=[doc_id for doc_id in document_ids if doc_id in found] or None,
+        not_found=[doc_id for doc_id in document_ids if doc_id not in found] or None,
+    )
+
+@instrumented_tool
+def make_bulk_create_documents_tool():
+    def _bulk_create(documents: list[CreateDocumentInput], config: RunnableConfig):
+        logger.info("bulk_create_documents was called")
+        user_id = get_user_id(config)
+        if not user_id:
+            raise Exception("Missing user_id in config")
+        return _bulk_create_documents(documents, user_id)
+
+    async def _abulk_create(documents: list[CreateDocumentInput], config: RunnableConfig):
+        user_id = get_user_id(config)
+        if not user_id:
+            raise Exception("Missing user_id in config")
+        return await sync_to_async(_bulk_create_documents)(documents, user_id)
+
+    return StructuredTool.from_function(
+        name="bulk_create_documents",
+        func=_bulk_create,
+        coroutine=_abulk_create,
+        description=f"Create several documents at once (up to {MAX_BULK_ITEMS}) in one step. Use instead of repeated create_document calls, e.g. one document per movie in a list.",
+        args_schema=BulkCreateDocumentsInput
+    )
+
+@instrumented_tool
+def make_bulk_update_documents_tool():
+    def _bulk_update(updates: list[UpdateDocumentInput], config: RunnableConfig):
+        logger.info("bulk_update_documents was called")
+        return _bulk_update_documents(updates, get_user_id(config))
+
+    async def _abulk_update(updates: list[UpdateDocumentInput], config: RunnableConfig):
+        return await sync_to_async(_bulk_update_documents)(updates, get_user_id(config))
+
+    return StructuredTool.from_function(
+        name="bulk_update_documents",
+        func=_bulk_update,
+        coroutine=_abulk_update,
+        description=f"Update the title and/or content of several documents at once (up to {MAX_BULK_ITEMS}). Reports the result per document ID.",
+        args_schema=BulkUpdateDocumentsInput
+    )
 
+@instrumented_tool
+def make_bulk_delete_documents_tool():
+    def _bulk_delete(document_ids: list[int], config: RunnableConfig):
+        logger.info("bulk_delete_documents was called")
+        return _bulk_delete_documents(document_ids, get_user_id(config))
+
+    async def _abulk_delete(document_ids: list[int], config: RunnableConfig):
+        return await sync_to_async(_bulk_delete_documents)(document_ids, get_user_id(config))
+
+    return StructuredTool.from_function(
+        name="bulk_delete_documents",
+        func=_bulk_delete,
+        coroutine=_abulk_delete,
+        description=f"Delete several documents at once by ID (up to {MAX_BULK_ITEMS}), e.g. all documents found by a search. Reports the result per document ID.",
+        args_schema=BulkDeleteDocumentsInput
+    )
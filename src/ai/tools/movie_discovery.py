@@ -1,29 +1,64 @@
-from langchain_core.tools import Tool
+import logging
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
 from tmdb import client as tmdb_client
+from ai.cache import memoized_tool
+from ai.metrics import instrumented_tool
+from ai.tools import get_user_id, output
+
+logger = logging.getLogger(__name__)
+
+# Larger batches are rejected by the schema, never truncated
+MAX_BATCH_SIZE = 20
+
+class MovieDetailsBatchInput(BaseModel):
+    movie_ids: list[int] = Field(..., max_length=MAX_BATCH_SIZE, description=f"TMDB movie IDs to fetch (max {MAX_BATCH_SIZE})")
+
+def _search_results(response, limit):
+    error = output.tmdb_error(response, default="Search failed.")
+    if error:
+        return output.dumps({"error": error})
+    results = [output.search_movie_result(movie) for movie in response.get("results", [])[:limit]]
+    return output.dumps({"results": results, "total_results": response.get("total_results", len(results))})
 
-def make_search_movies_tool(config):
-    def _search_movies(query: str, limit: int = 5):
-        user_id = config.get('configurable', {}).get('user_id')
-        print('Searching movies with user', user_id)
+def _movie_detail_result(response):
+    error = output.tmdb_error(response)
+    if error:
+        return output.dumps({"error": error})
+    return output.dumps(output.movie_detail_result(response))
+
+def _batch_result(batch):
+    return output.dumps({
+        "results": [output.movie_detail_result(movie) for movie in batch["results"]],
+        **({"errors": batch["errors"]} if batch["errors"] else {}),
+    })
+
+@instrumented_tool
+@memoized_tool(documents=False)
+def make_search_movies_tool():
+    def _search_movies(query: str, config: RunnableConfig, limit: int = 5):
+        user_id = get_user_id(config)
+        logger.info("search_movies was called by user %s", user_id)
 
         if limit > 25:
             limit = 25
 
         response = tmdb_client.search_movie(query, raw=False)
+        return _search_results(response, limit)
 
-        try:
-            total_results = int(response.get("total_results", -1))
-        except:
-            total_results = -1
-
-        if total_results == 0:
-            return []
+    async def _asearch_movies(query: str, config: RunnableConfig, limit: int = 5):
+        if limit > 25:
+            limit = 25
 
-        return response.get("results", [])[:limit]
+        response = await tmdb_client.asearch_movie(query, raw=False)
+        return _search_results(response, limit)
 
-    return Tool.from_function(
+    return StructuredTool.from_function(
         name="search_movies",
         func=_search_movies,
+        coroutine=_asearch_movies,
         description=(
             "Search up to 25 movies from The Movie Database (TMDB) "
             "matching the query string."
@@ -31,16 +66,46 @@ def make_search_movies_tool(config):
     )
 
 
-def make_movie_detail_tool(config):
-    def _movie_detail(movie_id: int):
-        user_id = config.get('configurable', {}).get('user_id')
-        print('Getting movie detail with user', user_id)
+@instrumented_tool
+@memoized_tool(documents=False)
+def make_movie_detail_tool():
+    def _movie_detail(movie_id: int, config: RunnableConfig):
+        user_id = get_user_id(config)
+        logger.info("movie_detail was called by user %s", user_id)
+
+        return _movie_detail_result(tmdb_client.movie_detail(movie_id, raw=False))
 
-        response = tmdb_client.movie_detail(movie_id, raw=False)
-        return response or {"error": "Movie not found."}
+    async def _amovie_detail(movie_id: int, config: RunnableConfig):
+        return _movie_detail_result(await tmdb_client.amovie_detail(movie_id, raw=False))
 
-    return Tool.from_function(
+    return StructuredTool.from_function(
         name="movie_detail",
         func=_movie_detail,
+        coroutine=_amovie_detail,
         description="Get detailed movie information by TMDB movie ID."
     )
+
+
+@instrumented_tool
+@memoized_tool(documents=False)
+def make_movie_details_batch_tool():
+    def _movie_details_batch(movie_ids: list[int], config: RunnableConfig):
+        user_id = get_user_id(config)
+        logger.info("movie_details_batch was called by user %s", user_id)
+
+        return _batch_result(tmdb_client.movie_details_batch(movie_ids))
+
+    async def _amovie_details_batch(movie_ids: list[int], config: RunnableConfig):
+        return _batch_result(await tmdb_client.amovie_details_batch(movie_ids))
+
+    return StructuredTool.from_function(
+        name="movie_details_batch",
+        func=_movie_details_batch,
+        coroutine=_amovie_details_batch,
+        description=(
+            f"Get detailed information for several movies at once (up to {MAX_BATCH_SIZE} TMDB IDs). "
+            "Prefer this over repeated movie_detail calls when comparing or summarizing multiple movies. "
+            "Movies that could not be fetched are listed under 'errors'."
+        ),
+        args_schema=MovieDetailsBatchInput
+    )
@@ -0,0 +1,74 @@
+"""
+Compact JSON results for the tools.
+
+Tool results go straight into the model's context, so they are minimal
+JSON: no whitespace, no empty fields, and for TMDB only the fields the
+agents use (per-tool whitelists below, nested objects reduced to names).
+The model reads IDs from `id` fields instead of parsing prose, and the
+token count of every result is recorded by ai.metrics.
+"""
+import json
+
+# Characters of a movie overview kept in search results; movie_detail has the full text
+SEARCH_OVERVIEW_CHARS = 200
+
+SEARCH_MOVIE_FIELDS = ("id", "title", "release_date", "vote_average", "overview")
+MOVIE_DETAIL_FIELDS = (
+    "id", "title", "original_title", "release_date", "runtime", "genres", "overview", "tagline",
+    "vote_average", "vote_count", "original_language", "spoken_languages", "production_companies",
+    "budget", "revenue", "status", "imdb_id",
+)
+
+# Nested TMDB objects are reduced to their names
+_NAMES = {"genres": "name", "production_companies": "name", "spoken_languages": "english_name"}
+
+
+def dumps(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def project(item, fields):
+    """Keep FIELDS of ITEM (in that order), dropping empty values; TMDB uses 0 for unknown numbers."""
+    result = {}
+    for field in fields:
+        value = item.get(field)
+        if field in _NAMES and isinstance(value, list):
+            value = [entry.get(_NAMES[field]) for entry in value if isinstance(entry, dict)]
+        if value not in (None, "", [], {}, 0):
+            result[field] = value
+    return result
+
+
+def _shorten(text, limit):
+    if not text or len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
+
+
+def search_movie_result(movie):
+    movie = project(movie, SEARCH_MOVIE_FIELDS)
+    if "overview" in movie:
+        movie["overview"] = _shorten(movie["overview"], SEARCH_OVERVIEW_CHARS)
+    return movie
+
+
+def movie_detail_result(movie):
+    return project(movie, MOVIE_DETAIL_FIELDS)
+
+
+def tmdb_error(response, default="Movie not found."):
+    """The error message of a TMDB error response, or None for a real answer."""
+    if not response:
+        return default
+    if response.get("success") is False:
+        return response.get("status_message") or default
+    return None
+
+
+def is_error(result):
+    """Whether the tool RESULT reports a failure, in full or for some items."""
+    try:
+        data = json.loads(result)
+    except (TypeError, ValueError):
+        return False
+    return isinstance(data, dict) and ("error" in data or "errors" in data)
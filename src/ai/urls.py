@@ -0,0 +1,8 @@
+from django.urls import path
+
+from ai import views
+
+urlpatterns = [
+    path('chat/', views.chat, name='chat'),
+    path('chat/stream/', views.chat_stream, name='chat-stream'),
+]
@@ -0,0 +1,219 @@
+import json
+import logging
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from langchain_core.messages import AIMessage, HumanMessage
+
+from ai.cache import get_response_cache
+from ai.graphs import get_graph
+from ai.llms import RateLimitExceeded
+from ai.metrics import agent_name, callback_handler, export
+
+logger = logging.getLogger(__name__)
+
+
+async def get_chat_request(request):
+    """
+    Validate a chat request and return (user, message, thread_id, config), or a
+    JsonResponse describing why it was rejected.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Request body must be JSON."}, status=400)
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Request body must be a JSON object."}, status=400)
+
+    message = str(payload.get("message") or "").strip()
+    if not message:
+        return JsonResponse({"error": "'message' is required."}, status=400)
+
+    thread_id = str(payload.get("thread_id") or uuid.uuid4())
+    config = {
+        "configurable": {
+            "user_id": user.id,
+            # Scope threads to their owner so one user can't resume another's conversation
+            "thread_id": f"{user.id}:{thread_id}",
+            # Scopes the memo of repeated tool calls (ai.cache.ToolMemo) to this turn
+            "turn_id": uuid.uuid4().hex,
+        },
+        "callbacks": [callback_handler],
+    }
+    return user, message, thread_id, config
+
+
+async def cached_reply(graph, user, message, config):
+    """
+    Look up a cached reply for the first message of a conversation; later
+    messages depend on the conversation so far and always run the graph.
+    Returns (reply or None, version); version is None when not cacheable.
+    """
+    state = await graph.aget_state(config)
+    if state.values.get("messages"):
+        return None, None
+
+    reply, version = await sync_to_async(get_response_cache().get)(user.id, message)
+    if reply is not None:
+        # Record the exchange so the conversation can continue from it
+        await graph.aupdate_state(
+            config,
+            {"messages": [HumanMessage(content=message), AIMessage(content=reply, name="supervisor")]},
+            as_node="supervisor",
+        )
+    return reply, version
+
+
+async def cache_reply(user, message, reply, version):
+    """Cache REPLY, the last message of the turn, if it is a complete answer."""
+    # Not a handoff or tool call left behind by a turn that stopped early
+    if version is not None and isinstance(reply, AIMessage) and reply.content and not reply.tool_calls:
+        await sync_to_async(get_response_cache().set)(user.id, message, reply.content, version)
+
+
+def rate_limited(thread_id, e):
+    # Shed load instead of queueing past the wait limit
+    response = JsonResponse({"thread_id": thread_id, "error": str(e)}, status=429)
+    response["Retry-After"] = str(int(e.retry_after) + 1)
+    return response
+
+
+@require_POST
+async def chat(request):
+    """
+    Run one conversation turn through the supervisor.
+
+    POST {"message": "...", "thread_id": "..."}  (thread_id optional)
+    -> {"thread_id": "...", "reply": "..."}
+    """
+    chat_request = await get_chat_request(request)
+    if isinstance(chat_request, JsonResponse):
+        return chat_request
+    user, message, thread_id, config = chat_request
+
+    supervisor = get_graph("main_supervisor")
+    reply, version = await cached_reply(supervisor, user, message, config)
+    if reply is not None:
+        return JsonResponse({"thread_id": thread_id, "reply": reply, "cached": True})
+
+    try:
+        result = await supervisor.ainvoke({"messages": [{"role": "user", "content": message}]}, config)
+    except RateLimitExceeded as e:
+        return rate_limited(thread_id, e)
+    await cache_reply(user, message, result["messages"][-1], version)
+    return JsonResponse({"thread_id": thread_id, "reply": result["messages"][-1].content})
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_chat_events(graph, inputs, config, thread_id):
+    """
+    Translate LangGraph stream events into server-sent events:
+    token, tool_start, tool_end, handoff, error and a final done.
+    RateLimitExceeded before the first event is raised, so the caller can
+    still answer 429; later it becomes an error event.
+    """
+    started = False
+    try:
+        async for event in graph.astream_events(inputs, config, version="v2"):
+            kind = event["event"]
+            name = event.get("name", "")
+            metadata = event.get("metadata", {})
+
+            if kind == "on_chat_model_stream":
+                content = event["data"]["chunk"].content
+                if not content:
+                    continue
+                started = True
+                yield sse_event("token", {"agent": agent_name(metadata), "content": content})
+            elif kind == "on_tool_start":
+                started = True
+                if name.startswith("transfer_"):
+                    yield sse_event("handoff", {"from": agent_name(metadata), "tool": name})
+                else:
+                    yield sse_event("tool_start", {
+                        "agent": agent_name(metadata),
+                        "tool": name,
+                        "input": event["data"].get("input"),
+                    })
+            elif kind == "on_tool_end" and not name.startswith("transfer_"):
+                yield sse_event("tool_end", {"agent": agent_name(metadata), "tool": name})
+    except RateLimitExceeded as e:
+        if not started:
+            raise
+        yield sse_event("error", {"message": str(e), "retry_after": e.retry_after})
+    except Exception:
+        # The details (SQL, provider and auth errors) stay in the server log
+        logger.exception("Chat stream of thread %s failed", thread_id)
+        yield sse_event("error", {"message": "Something went wrong while answering. Please try again."})
+    yield sse_event("done", {"thread_id": thread_id})
+
+
+async def stream_cached_reply(reply, thread_id):
+    yield sse_event("token", {"agent": "supervisor", "content": reply, "cached": True})
+    yield sse_event("done", {"thread_id": thread_id})
+
+
+async def stream_and_cache(graph, inputs, config, thread_id, user, message, version):
+    failed = False
+    async for event in stream_chat_events(graph, inputs, config, thread_id):
+        failed = failed or event.startswith("event: error")
+        # A failed turn leaves a partial reply, or none, in the state
+        if event.startswith("event: done") and version is not None and not failed:
+            state = await graph.aget_state(config)
+            messages = state.values.get("messages") or []
+            if messages:
+                await cache_reply(user, message, messages[-1], version)
+        yield event
+
+
+async def prepend(first, events):
+    yield first
+    async for event in events:
+        yield event
+
+
+@require_POST
+async def chat_stream(request):
+    """
+    Same request as `chat`, but streams the turn as server-sent events so the
+    client sees the first token as soon as the model produces it.
+    """
+    chat_request = await get_chat_request(request)
+    if isinstance(chat_request, JsonResponse):
+        return chat_request
+    user, message, thread_id, config = chat_request
+
+    supervisor = get_graph("main_supervisor")
+    reply, version = await cached_reply(supervisor, user, message, config)
+    if reply is not None:
+        events = stream_cached_reply(reply, thread_id)
+    else:
+        inputs = {"messages": [{"role": "user", "content": message}]}
+        events = stream_and_cache(supervisor, inputs, config, thread_id, user, message, version)
+        # Run up to the first event, so a rate limit can still be a 429
+        try:
+            events = prepend(await anext(events), events)
+        except RateLimitExceeded as e:
+            return rate_limited(thread_id, e)
+
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+def metrics(request):
+    """Prometheus metrics of this process (or of every worker, see ai.metrics)."""
+    body, content_type = export()
+    return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from checkpoints.models import Checkpoint
+from checkpoints.saver import DjangoCheckpointSaver
+
+
+class Command(BaseCommand):
+    help = "Compact stored LangGraph checkpoints and drop idle conversation threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-last", type=int, default=settings.AI_CHECKPOINT_KEEP_LAST,
+                            help="Root checkpoints to keep per thread")
+        parser.add_argument("--idle-days", type=int, default=settings.AI_CHECKPOINT_IDLE_DAYS,
+                            help="Delete threads with no new checkpoint for this many days (0 disables)")
+
+    def handle(self, *args, **options):
+        saver = DjangoCheckpointSaver(keep_last=options["keep_last"])
+
+        pruned = 0
+        thread_ids = Checkpoint.objects.values_list("thread_id", flat=True).distinct()
+        for thread_id in list(thread_ids):
+            with transaction.atomic():
+                pruned += saver.prune(thread_id)
+
+        idle = 0
+        if options["idle_days"]:
+            idle = saver.prune_idle_threads(timedelta(days=options["idle_days"]))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {pruned} old checkpoints and {idle} idle threads."
+        ))
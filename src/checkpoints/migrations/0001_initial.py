@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thread_id', models.CharField(max_length=255)),
+                ('checkpoint_ns', models.CharField(blank=True, default='', max_length=255)),
+                ('checkpoint_id', models.CharField(max_length=64)),
+                ('parent_checkpoint_id', models.CharField(blank=True, max_length=64, null=True)),
+                ('type', models.CharField(max_length=32)),
+                ('checkpoint', models.BinaryField()),
+                ('metadata', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('thread_id', 'checkpoint_ns', 'checkpoint_id'), name='checkpoint_unique_id')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CheckpointWrite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thread_id', models.CharField(max_length=255)),
+                ('checkpoint_ns', models.CharField(blank=True, default='', max_length=255)),
+                ('checkpoint_id', models.CharField(max_length=64)),
+                ('task_id', models.CharField(max_length=64)),
+                ('task_path', models.CharField(blank=True, default='', max_length=255)),
+                ('idx', models.IntegerField()),
+                ('channel', models.CharField(max_length=255)),
+                ('type', models.CharField(max_length=32)),
+                ('value', models.BinaryField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx'), name='checkpoint_write_unique_idx')],
+            },
+        ),
+    ]
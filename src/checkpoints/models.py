@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class Checkpoint(models.Model):
+    """One serialized LangGraph checkpoint (see checkpoints.saver)."""
+    thread_id = models.CharField(max_length=255)
+    checkpoint_ns = models.CharField(max_length=255, blank=True, default="")
+    # LangGraph checkpoint ids are uuid6 strings, so they sort chronologically
+    checkpoint_id = models.CharField(max_length=64)
+    parent_checkpoint_id = models.CharField(max_length=64, blank=True, null=True)
+    type = models.CharField(max_length=32)
+    checkpoint = models.BinaryField()
+    metadata = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread_id", "checkpoint_ns", "checkpoint_id"],
+                name="checkpoint_unique_id",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.thread_id}/{self.checkpoint_ns}/{self.checkpoint_id}"
+
+
+class CheckpointWrite(models.Model):
+    """A pending write of one task against a checkpoint."""
+    thread_id = models.CharField(max_length=255)
+    checkpoint_ns = models.CharField(max_length=255, blank=True, default="")
+    checkpoint_id = models.CharField(max_length=64)
+    task_id = models.CharField(max_length=64)
+    task_path = models.CharField(max_length=255, blank=True, default="")
+    idx = models.IntegerField()
+    channel = models.CharField(max_length=255)
+    type = models.CharField(max_length=32)
+    value = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"],
+                name="checkpoint_write_unique_idx",
+            ),
+        ]
@@ -0,0 +1,240 @@
+"""
+LangGraph checkpointer backed by the project's Django database.
+
+Checkpoints and pending writes are serialized with the saver's serde
+(JsonPlusSerializer, msgpack via ormsgpack) and metadata with orjson, so
+thread memory survives restarts and is shared by every worker. Only the
+newest `keep_last` root checkpoints of each thread are kept, and subgraph
+namespaces (one per agent task, e.g. "supervisor:<task>|document_agent:<task>")
+are dropped once the root graph has moved past them; both are pruned on write.
+"""
+import random
+import threading
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from checkpoints.models import Checkpoint, CheckpointWrite
+
+
+def _config(thread_id, checkpoint_ns, checkpoint_id):
+    return {
+        "configurable": {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint_id,
+        }
+    }
+
+
+class DjangoCheckpointSaver(BaseCheckpointSaver[str]):
+    def __init__(self, *, serde=None, keep_last=None):
+        super().__init__(serde=serde)
+        self.keep_last = settings.AI_CHECKPOINT_KEEP_LAST if keep_last is None else keep_last
+        # Graph runs write from several worker threads at once; serialize the
+        # writes so they never race for the database write lock
+        self._write_lock = threading.Lock()
+
+    # Sync interface
+
+    def get_tuple(self, config):
+        configurable = config["configurable"]
+        qs = Checkpoint.objects.filter(
+            thread_id=str(configurable["thread_id"]),
+            checkpoint_ns=configurable.get("checkpoint_ns", ""),
+        )
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            row = qs.filter(checkpoint_id=checkpoint_id).first()
+        else:
+            row = qs.order_by("-checkpoint_id").first()
+        return self._to_tuple(row) if row is not None else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        qs = Checkpoint.objects.all()
+        if config is not None:
+            configurable = config["configurable"]
+            qs = qs.filter(thread_id=str(configurable["thread_id"]))
+            if "checkpoint_ns" in configurable:
+                qs = qs.filter(checkpoint_ns=configurable["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                qs = qs.filter(checkpoint_id=checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            qs = qs.filter(checkpoint_id__lt=before_id)
+
+        for row in qs.order_by("-checkpoint_id").iterator():
+            if filter:
+                metadata = orjson.loads(row.metadata)
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._to_tuple(row)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        configurable = config["configurable"]
+        thread_id = str(configurable["thread_id"])
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        type_, data = self.serde.dumps_typed(checkpoint)
+
+        with self._write_lock, transaction.atomic():
+            Checkpoint.objects.update_or_create(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                defaults={
+                    "parent_checkpoint_id": configurable.get("checkpoint_id"),
+                    "type": type_,
+                    "checkpoint": data,
+                    "metadata": orjson.dumps(get_checkpoint_metadata(config, metadata), default=str),
+                },
+            )
+            if self.keep_last and checkpoint_ns:
+                # A long agent loop is capped too, until the root run moves on
+                self._prune_namespace(thread_id, checkpoint_ns, self.keep_last)
+            elif self.keep_last:
+                self.prune(thread_id, keep_last=self.keep_last)
+        return _config(thread_id, checkpoint_ns, checkpoint["id"])
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        configurable = config["configurable"]
+        key = {
+            "thread_id": str(configurable["thread_id"]),
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+            "checkpoint_id": configurable["checkpoint_id"],
+            "task_id": task_id,
+        }
+        new_rows = []
+        with self._write_lock, transaction.atomic():
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                type_, data = self.serde.dumps_typed(value)
+                fields = {"task_path": task_path, "channel": channel, "type": type_, "value": data}
+                if write_idx < 0:
+                    # Special channels (errors, interrupts, ...) replace the previous write
+                    CheckpointWrite.objects.update_or_create(**key, idx=write_idx, defaults=fields)
+                else:
+                    new_rows.append(CheckpointWrite(**key, idx=write_idx, **fields))
+            # Regular writes are idempotent: a replayed task must not overwrite them
+            CheckpointWrite.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+    def delete_thread(self, thread_id):
+        with self._write_lock, transaction.atomic():
+            Checkpoint.objects.filter(thread_id=str(thread_id)).delete()
+            CheckpointWrite.objects.filter(thread_id=str(thread_id)).delete()
+
+    def get_next_version(self, current, channel):
+        # Same scheme as InMemorySaver: a zero-padded counter plus a random
+        # suffix, so versions compare correctly as strings
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # Compaction
+
+    def prune(self, thread_id, keep_last=None):
+        """
+        Compact one thread: keep the newest KEEP_LAST root checkpoints and drop
+        every subgraph checkpoint older than the newest root one, i.e. those of
+        agent runs that have finished. Returns the number of pruned checkpoints.
+        """
+        keep_last = keep_last or self.keep_last
+        pruned = self._prune_namespace(thread_id, "", keep_last)
+        latest = (
+            Checkpoint.objects
+            .filter(thread_id=str(thread_id), checkpoint_ns="")
+            .order_by("-checkpoint_id")
+            .values_list("checkpoint_id", flat=True)
+            .first()
+        )
+        if latest is None:
+            return pruned
+        finished = {"thread_id": str(thread_id), "checkpoint_id__lt": latest}
+        CheckpointWrite.objects.filter(**finished).exclude(checkpoint_ns="").delete()
+        deleted, _ = Checkpoint.objects.filter(**finished).exclude(checkpoint_ns="").delete()
+        return pruned + deleted
+
+    def _prune_namespace(self, thread_id, checkpoint_ns, keep_last):
+        stale_ids = list(
+            Checkpoint.objects
+            .filter(thread_id=str(thread_id), checkpoint_ns=checkpoint_ns)
+            .order_by("-checkpoint_id")
+            .values_list("checkpoint_id", flat=True)[keep_last:]
+        )
+        if not stale_ids:
+            return 0
+        scope = {"thread_id": str(thread_id), "checkpoint_ns": checkpoint_ns, "checkpoint_id__in": stale_ids}
+        CheckpointWrite.objects.filter(**scope).delete()
+        Checkpoint.objects.filter(**scope).delete()
+        return len(stale_ids)
+
+    def prune_idle_threads(self, older_than):
+        """Delete every thread whose newest checkpoint is older than OLDER_THAN (a timedelta)."""
+        cutoff = timezone.now() - older_than
+        idle = list(
+            Checkpoint.objects.values("thread_id")
+            .annotate(last_seen=Max("created_at"))
+            .filter(last_seen__lt=cutoff)
+            .values_list("thread_id", flat=True)
+        )
+        for thread_id in idle:
+            self.delete_thread(thread_id)
+        return len(idle)
+
+    # Async interface: the ORM calls run in Django's sync thread
+
+    async def aget_tuple(self, config):
+        return await sync_to_async(self.get_tuple)(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        rows = await sync_to_async(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )()
+        for row in rows:
+            yield row
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await sync_to_async(self.put)(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await sync_to_async(self.put_writes)(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await sync_to_async(self.delete_thread)(thread_id)
+
+    def _to_tuple(self, row):
+        writes = CheckpointWrite.objects.filter(
+            thread_id=row.thread_id,
+            checkpoint_ns=row.checkpoint_ns,
+            checkpoint_id=row.checkpoint_id,
+        ).order_by("task_id", "idx")
+        return CheckpointTuple(
+            config=_config(row.thread_id, row.checkpoint_ns, row.checkpoint_id),
+            checkpoint=self.serde.loads_typed((row.type, bytes(row.checkpoint))),
+            metadata=orjson.loads(row.metadata),
+            parent_config=(
+                _config(row.thread_id, row.checkpoint_ns, row.parent_checkpoint_id)
+                if row.parent_checkpoint_id else None
+            ),
+            pending_writes=[
+                (write.task_id, write.channel, self.serde.loads_typed((write.type, bytes(write.value))))
+                for write in writes
+            ],
+        )
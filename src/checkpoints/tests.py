@@ -0,0 +1,66 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from langgraph.checkpoint.base import empty_checkpoint
+
+from checkpoints.models import Checkpoint, CheckpointWrite
+from checkpoints.saver import DjangoCheckpointSaver
+
+
+class DjangoCheckpointSaverTests(TestCase):
+    def put(self, saver, parent_config=None, checkpoint_ns=""):
+        config = parent_config or {"configurable": {"thread_id": "t1", "checkpoint_ns": checkpoint_ns}}
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": ["hi"]}
+        return saver.put(config, checkpoint, {"source": "input", "step": -1}, {})
+
+    def test_round_trip_with_writes(self):
+        saver = DjangoCheckpointSaver(keep_last=10)
+        config = self.put(saver)
+        saver.put_writes(config, [("messages", "hello")], task_id="task-1")
+
+        saved = saver.get_tuple({"configurable": {"thread_id": "t1", "checkpoint_ns": ""}})
+
+        self.assertEqual(saved.config, config)
+        self.assertEqual(saved.checkpoint["channel_values"], {"messages": ["hi"]})
+        self.assertEqual(saved.metadata["source"], "input")
+        self.assertEqual(saved.pending_writes, [("task-1", "messages", "hello")])
+
+    def test_prunes_old_checkpoints_per_thread(self):
+        saver = DjangoCheckpointSaver(keep_last=2)
+        config = None
+        for _ in range(4):
+            config = self.put(saver, config)
+
+        self.assertEqual(Checkpoint.objects.filter(thread_id="t1").count(), 2)
+        latest = saver.get_tuple({"configurable": {"thread_id": "t1", "checkpoint_ns": ""}})
+        self.assertEqual(latest.config, config)
+
+    def test_drops_subgraph_namespaces_once_the_root_run_moves_on(self):
+        saver = DjangoCheckpointSaver(keep_last=2)
+        root = self.put(saver)
+        for task in ("supervisor:a", "supervisor:a|document_agent:b"):
+            sub = self.put(saver, checkpoint_ns=task)
+            saver.put_writes(sub, [("messages", "hello")], task_id="task-1")
+
+        self.put(saver, root)
+        running = self.put(saver, checkpoint_ns="supervisor:c")
+
+        self.assertEqual(
+            set(Checkpoint.objects.values_list("checkpoint_ns", flat=True)), {"", "supervisor:c"}
+        )
+        self.assertFalse(CheckpointWrite.objects.exclude(checkpoint_ns="").exists())
+        self.assertEqual(saver.get_tuple(running).config, running)
+
+    def test_command_compacts_every_thread(self):
+        saver = DjangoCheckpointSaver(keep_last=0)
+        root = None
+        for _ in range(3):
+            root = self.put(saver, root)
+            self.put(saver, checkpoint_ns="supervisor:a")
+        self.put(saver, root)
+
+        call_command("prune_checkpoints", keep_last=1, idle_days=0, stdout=StringIO())
+
+        self.assertEqual(list(Checkpoint.objects.values_list("checkpoint_ns", flat=True)), [""])
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_ai_agent.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.AI_PRELOAD_GRAPHS:
+    from ai.graphs import warm_up  # noqa: E402
+
+    warm_up()
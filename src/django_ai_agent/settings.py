@@ -41,7 +41,10 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'documents'
+    'documents',
+    'tmdb',
+    'checkpoints',
+    'ai',
 ]
 
 MIDDLEWARE = [
@@ -81,10 +84,44 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Graph runs write checkpoints and documents from worker threads; a
+        # deferred transaction that later upgrades to a write lock fails with
+        # "database is locked" instead of waiting for the other writer
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # The in-memory test database locks whole tables and ignores the
+        # timeout above; test against a file so threads wait as they do here
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tmdb': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv("TMDB_CACHE_DIR", default=BASE_DIR / '.cache' / 'tmdb'),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+    # Response and model caches (see ai.cache). Use a shared backend such as
+    # Redis when running several workers so invalidations reach all of them.
+    'ai': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai',
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv("AI_CACHE_MAX_ENTRIES", default=5000))},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -126,5 +163,100 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Semantic document search: on-disk per-user embedding index and the embedder
+# class (any class with `dim` and `embed(texts)`, see documents.embeddings)
+DOCUMENT_VECTOR_DIR = os.getenv("DOCUMENT_VECTOR_DIR", default=BASE_DIR / '.cache' / 'vectors')
+DOCUMENT_EMBEDDER = os.getenv("DOCUMENT_EMBEDDER", default="documents.embeddings.HashingEmbedder")
+# Semantic matches less similar than this (cosine) are treated as noise
+DOCUMENT_MIN_SIMILARITY = float(os.getenv("DOCUMENT_MIN_SIMILARITY", default=0.05))
+
+# Deleted documents are archived by `manage.py archive_documents` after this many days
+DOCUMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("DOCUMENT_ARCHIVE_AFTER_DAYS", default=30))
+
+# Document content is stored and served to the agent in sections of about this many characters
+DOCUMENT_CHUNK_SIZE = int(os.getenv("DOCUMENT_CHUNK_SIZE", default=4000))
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", default=None)
-TMDB_API_KEY = os.getenv("TMDB_API_KEY")
\ No newline at end of file
+TMDB_API_KEY = os.getenv("TMDB_API_KEY")
+TMDB_BASE_URL = os.getenv("TMDB_BASE_URL", default="https://api.themoviedb.org/3")
+TMDB_CONNECT_TIMEOUT = float(os.getenv("TMDB_CONNECT_TIMEOUT", default=3.05))
+TMDB_READ_TIMEOUT = float(os.getenv("TMDB_READ_TIMEOUT", default=10))
+TMDB_MAX_RETRIES = int(os.getenv("TMDB_MAX_RETRIES", default=3))
+TMDB_BACKOFF_FACTOR = float(os.getenv("TMDB_BACKOFF_FACTOR", default=0.5))
+TMDB_POOL_SIZE = int(os.getenv("TMDB_POOL_SIZE", default=10))
+# Max concurrent requests of one movie_details_batch call (keep <= pool size)
+TMDB_BATCH_CONCURRENCY = int(os.getenv("TMDB_BATCH_CONCURRENCY", default=8))
+
+# TMDB response cache: in-process LRU in front of the 'tmdb' cache above.
+# TTLs are in seconds, per client endpoint.
+TMDB_CACHE_ALIAS = "tmdb"
+TMDB_CACHE_MAX_ENTRIES = int(os.getenv("TMDB_CACHE_MAX_ENTRIES", default=1024))
+TMDB_CACHE_TTLS = {
+    "search_movie": 6 * 60 * 60,
+    "movie_detail": 24 * 60 * 60,
+    "default": 60 * 60,
+}
+
+# Build the compiled agent graphs when the WSGI/ASGI application starts
+# instead of on the first request (see ai.graphs). A graph that fails to
+# build is logged, not fatal: it is built again on its first request.
+AI_PRELOAD_GRAPHS = os.getenv("AI_PRELOAD_GRAPHS", default="true").lower() in ("1", "true", "yes")
+
+# Token budget for the conversation history sent with each model call
+# (system prompts come on top); older turns are trimmed (see ai.history)
+AI_HISTORY_TOKEN_BUDGET = int(os.getenv("AI_HISTORY_TOKEN_BUDGET", default=4000))
+
+# Where conversation state is kept: "database" (checkpoints app) or "memory"
+AI_CHECKPOINTER = os.getenv("AI_CHECKPOINTER", default="database")
+# Checkpoints kept per thread, and days after which idle threads are dropped
+# by `manage.py prune_checkpoints`
+AI_CHECKPOINT_KEEP_LAST = int(os.getenv("AI_CHECKPOINT_KEEP_LAST", default=20))
+AI_CHECKPOINT_IDLE_DAYS = int(os.getenv("AI_CHECKPOINT_IDLE_DAYS", default=30))
+
+# Cache of whole supervisor replies to the first message of a conversation,
+# keyed on the normalized message, model and the user's document version
+# (0 disables). With a similarity above 0 (e.g. 0.95), near-identical
+# messages share an entry too. Model responses are cached for
+# AI_LLM_CACHE_TTL seconds, keyed on the full prompt (0 disables).
+AI_CACHE_ALIAS = "ai"
+AI_RESPONSE_CACHE_TTL = int(os.getenv("AI_RESPONSE_CACHE_TTL", default=300))
+AI_RESPONSE_CACHE_SIMILARITY = float(os.getenv("AI_RESPONSE_CACHE_SIMILARITY", default=0))
+AI_LLM_CACHE_TTL = int(os.getenv("AI_LLM_CACHE_TTL", default=3600))
+# Repeated read-only tool calls in one conversation turn reuse the earlier
+# result; entries outlive the turn by at most AI_TOOL_MEMO_TTL seconds
+# (0 disables)
+AI_TOOL_MEMO_TTL = int(os.getenv("AI_TOOL_MEMO_TTL", default=120))
+
+# Chat models per role (see ai.llms): routing steps use a small fast model,
+# agents a larger one. AI_LLM_BACKEND "fake" runs offline (ai.fake_llm).
+AI_LLM_BACKEND = os.getenv("AI_LLM_BACKEND", default="groq")
+AI_MODELS = {
+    "supervisor": os.getenv("AI_SUPERVISOR_MODEL", default="llama-3.1-8b-instant"),
+    "agent": os.getenv("AI_AGENT_MODEL", default="mixtral-8x7b-32768"),
+}
+AI_FAKE_LLM_LATENCY = float(os.getenv("AI_FAKE_LLM_LATENCY", default=0))
+# (requests per minute, tokens per minute) per model, per process; calls
+# wait up to AI_RATE_LIMIT_MAX_WAIT seconds for budget before being rejected
+AI_RATE_LIMITS = {
+    "default": (int(os.getenv("AI_RATE_LIMIT_RPM", default=30)), int(os.getenv("AI_RATE_LIMIT_TPM", default=6000))),
+}
+AI_RATE_LIMIT_MAX_WAIT = float(os.getenv("AI_RATE_LIMIT_MAX_WAIT", default=10))
+
+# Send requests that plainly name one domain ("list my documents") straight
+# to its agent, skipping the supervisor's routing call (see ai.router)
+AI_FAST_ROUTING = os.getenv("AI_FAST_ROUTING", default="true").lower() in ("1", "true", "yes")
+# Run unambiguous document commands ("delete document 3") without any model call (see ai.commands)
+AI_DIRECT_COMMANDS = os.getenv("AI_DIRECT_COMMANDS", default="true").lower() in ("1", "true", "yes")
+# Run the independent parts of compound requests in parallel (see ai.router.plan_subtasks)
+AI_PARALLEL_SUBTASKS = os.getenv("AI_PARALLEL_SUBTASKS", default="true").lower() in ("1", "true", "yes")
+
+# Tool calls and errors are logged at INFO; DEBUG adds tool inputs
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "ai": {"handlers": ["console"], "level": os.getenv("AI_LOG_LEVEL", default="INFO")},
+        "tmdb": {"handlers": ["console"], "level": os.getenv("AI_LOG_LEVEL", default="INFO")},
+    },
+}
@@ -1,8 +1,14 @@
 from django.contrib import admin
-from .models import Document
+from .models import ArchivedDocument, Document
 
 @admin.register(Document)
 class DocumentAdmin(admin.ModelAdmin):
     list_display = ("id", "title", "owner", "created_at", "updated_at")  # ✅ add here
     list_filter = ("active", "created_at", "updated_at")  # optional: filter by updated time
-    search_fields = ("title", "content")  # optional: make searchable
\ No newline at end of file
+    search_fields = ("title", "content")  # optional: make searchable
+
+
+@admin.register(ArchivedDocument)
+class ArchivedDocumentAdmin(admin.ModelAdmin):
+    list_display = ("document_id", "title", "owner", "deactivated_at", "archived_at")
+    exclude = ("content",)
@@ -0,0 +1,49 @@
+"""
+Move long-inactive documents to cold storage.
+
+Deleting a document only deactivates it (Document.objects.soft_delete()).
+archive_inactive_documents() later copies rows that have been inactive for
+a while into ArchivedDocument, with their content zstd-compressed, and
+removes them from the hot documents table in batches, one transaction per
+batch, so the job can be interrupted and resumed at any point.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedDocument, Document
+
+
+def archive_inactive_documents(older_than=timedelta(days=30), batch_size=500, level=10):
+    """Archive documents inactive for longer than OLDER_THAN. Returns how many were moved."""
+    cutoff = timezone.now() - older_than
+    archived = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                Document.objects
+                .filter(active=False, updated_at__lt=cutoff)
+                .order_by("updated_at")
+                .values("id", "owner_id", "title", "content", "created_at", "updated_at")[:batch_size]
+            )
+            if not batch:
+                return archived
+            ArchivedDocument.objects.bulk_create(
+                [
+                    ArchivedDocument(
+                        document_id=row["id"],
+                        owner_id=row["owner_id"],
+                        title=row["title"],
+                        content=ArchivedDocument.compress(row["content"], level=level),
+                        created_at=row["created_at"],
+                        deactivated_at=row["updated_at"],
+                    )
+                    for row in batch
+                ],
+                # A re-run after a crash must not fail on rows archived before
+                ignore_conflicts=True,
+            )
+            # Inactive rows are already out of the search indexes
+            Document.objects.filter(id__in=[row["id"] for row in batch]).delete()
+        archived += len(batch)
@@ -0,0 +1,90 @@
+"""
+Document content split into sections (DocumentChunk rows).
+
+Content is split with langchain-text-splitters on paragraph, line and word
+boundaries into sections of about settings.DOCUMENT_CHUNK_SIZE characters.
+get_document serves large documents a few sections at a time and search
+results point at the best matching section, so a multi-megabyte document is
+never loaded whole into the prompt.
+
+Chunks are derived data kept in step by documents.indexing; only active
+documents have chunks, and only content changes re-split them. Chunks copy
+their text instead of pointing at offsets into Document.content: sections
+are served and matched (best_sections) with plain indexed row reads, where
+offsets would make the database read and slice the whole content column of
+every candidate document on each call. The copy roughly doubles the stored
+text of active documents; archived ones have no chunks.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def split_content(text, chunk_size=None):
+    """Split TEXT into [(start_offset, chunk_text)]."""
+    if not text:
+        return []
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size or settings.DOCUMENT_CHUNK_SIZE,
+        chunk_overlap=0,
+        add_start_index=True,
+    )
+    return [(chunk.metadata["start_index"], chunk.page_content) for chunk in splitter.create_documents([text])]
+
+
+def refresh_chunks(document_ids):
+    """Re-split the given documents; inactive or missing ones lose their chunks."""
+    from .models import Document, DocumentChunk
+
+    DocumentChunk.objects.filter(document_id__in=document_ids).delete()
+    docs = Document.objects.filter(id__in=document_ids, active=True).values_list("id", "content")
+    DocumentChunk.objects.bulk_create(
+        [
+            DocumentChunk(document_id=doc_id, index=index, start=start, content=text)
+            for doc_id, content in docs
+            for index, (start, text) in enumerate(split_content(content))
+        ],
+        batch_size=500,
+    )
+
+
+def rebuild_chunks(batch_size=100):
+    """Re-split every active document. Returns the number of chunked documents."""
+    from .models import Document, DocumentChunk
+
+    DocumentChunk.objects.all().delete()
+    ids = list(Document.objects.filter(active=True).order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_chunks(ids[start:start + batch_size])
+    return len(ids)
+
+
+def best_sections(document_ids, query):
+    """
+    Return {document_id: index} of the chunk of each document containing the
+    most distinct words of QUERY. Documents without a matching chunk are left out.
+    """
+    from .models import DocumentChunk
+
+    terms = list(dict.fromkeys(re.findall(r"\w+", (query or "").lower())))[:10]
+    if not document_ids or not terms:
+        return {}
+
+    matches = sum(
+        (Case(When(content__icontains=term, then=Value(1)), default=Value(0), output_field=IntegerField()) for term in terms),
+        Value(0),
+    )
+    rows = (
+        DocumentChunk.objects
+        .filter(document_id__in=document_ids)
+        .filter(Q.create([("content__icontains", term) for term in terms], connector=Q.OR))
+        .annotate(matches=matches)
+        .order_by("document_id", "-matches", "index")
+        .values_list("document_id", "index")
+    )
+    sections = {}
+    for doc_id, index in rows:
+        sections.setdefault(doc_id, index)
+    return sections
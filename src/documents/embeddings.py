@@ -0,0 +1,49 @@
+"""
+Text embedders for semantic document search.
+
+The default HashingEmbedder needs no model download or network: words and
+word pairs are hashed into a fixed number of signed buckets and the result
+is L2-normalized, so a dot product is a cosine similarity. Any class with a
+`dim` attribute and an `embed(texts) -> np.ndarray` method (e.g. a wrapper
+around a local sentence-transformers model) can be plugged in through
+settings.DOCUMENT_EMBEDDER.
+"""
+import math
+import re
+import zlib
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Longer documents are embedded from their beginning only
+MAX_EMBED_CHARS = 50_000
+
+
+class HashingEmbedder:
+    def __init__(self, dim=512):
+        self.dim = dim
+
+    def _features(self, text):
+        words = re.findall(r"\w+", text[:MAX_EMBED_CHARS].lower())
+        return Counter(words + [f"{a} {b}" for a, b in zip(words, words[1:])])
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text or "").items():
+                # crc32 is stable across processes, unlike hash()
+                digest = zlib.crc32(feature.encode())
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vectors[row, digest % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    embedder = getattr(settings, "DOCUMENT_EMBEDDER", "documents.embeddings.HashingEmbedder")
+    return import_string(embedder)()
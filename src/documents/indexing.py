@@ -0,0 +1,33 @@
+"""
+Keep the derived search indexes in step with the documents table.
+
+Call documents_changed() after inserting or updating rows (including bulk
+and queryset updates, which bypass Document.save()) and
+documents_removed() after hard-deleting them. Pass content=False when
+neither the content nor the active flag changed, e.g. on a rename: the
+chunks are then left alone. The full-text index and the
+content chunks live in the same database and are updated inside the
+current transaction; the on-disk vector index is only touched once the
+transaction commits.
+"""
+from django.db import transaction
+
+from . import chunks, search, vectors
+
+
+def documents_changed(document_ids, content=True):
+    document_ids = [pk for pk in document_ids if pk is not None]
+    if not document_ids:
+        return
+    search.refresh_index(document_ids)
+    if content:
+        chunks.refresh_chunks(document_ids)
+    transaction.on_commit(lambda: vectors.refresh_vectors(document_ids))
+
+
+def documents_removed(owner_id, document_ids):
+    document_ids = [pk for pk in document_ids if pk is not None]
+    if not document_ids:
+        return
+    search.remove_from_index(document_ids)
+    transaction.on_commit(lambda: vectors.remove_vectors(owner_id, document_ids))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from documents.archive import archive_inactive_documents
+
+
+class Command(BaseCommand):
+    help = "Move long-inactive (deleted) documents into compressed cold storage."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.DOCUMENT_ARCHIVE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        archived = archive_inactive_documents(
+            older_than=timedelta(days=options["older_than_days"]),
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} documents."))
@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents import search
+from documents.models import Document
+
+User = get_user_model()
+
+CONTENT = (
+    "A long running notes document about movies, directors and release dates. "
+    "It repeats to look like real content. "
+) * 40
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway user with many documents, then print the query plans and "
+        "timings of the document tool queries. Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--docs", type=int, default=100_000, help="Documents to seed for the user")
+        parser.add_argument("--runs", type=int, default=20, help="Timed runs per query")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            owner = self.seed(options["docs"])
+            self.run_benchmarks(owner, options["runs"])
+            transaction.set_rollback(True)
+
+    def seed(self, count):
+        started = time.perf_counter()
+        owner = User.objects.create(username=f"bench-{time.time_ns()}")
+        batch = []
+        for i in range(count):
+            batch.append(Document(
+                owner=owner,
+                title=f"Document {i}" + (" inception" if i % 1000 == 0 else ""),
+                content=CONTENT,
+                # One in ten documents is deleted
+                active=i % 10 != 0,
+            ))
+            if len(batch) == 5000:
+                Document.objects.bulk_create(batch)
+                batch = []
+        Document.objects.bulk_create(batch)
+        search.rebuild_index()
+        self.stdout.write(f"Seeded {count} documents in {time.perf_counter() - started:.1f}s\n")
+        return owner
+
+    def run_benchmarks(self, owner, runs):
+        active = Document.objects.filter(owner=owner, active=True)
+        some_id = active.order_by("id").values_list("id", flat=True)[runs]
+
+        queries = {
+            "list (id, title)": lambda: list(
+                active.order_by("-created_at", "-id").only("id", "title")[:25]
+            ),
+            "list (full rows)": lambda: list(active.order_by("-created_at", "-id")[:25]),
+            "get by id": lambda: Document.objects.get(id=some_id, owner=owner, active=True),
+            "full-text search": lambda: search.search_documents(owner.id, "inception", limit=25),
+            "icontains search": lambda: list(
+                active.filter(content__icontains="inception").order_by("-created_at")[:25]
+            ),
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Query plans"))
+        self.stdout.write(active.order_by("-created_at", "-id").only("id", "title")[:25].explain())
+        self.stdout.write(Document.objects.filter(id=some_id, owner=owner, active=True).explain())
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Timings (median of {runs} runs)"))
+        for name, query in queries.items():
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                query()
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f"{name:<20} {statistics.median(timings) * 1000:8.2f} ms")
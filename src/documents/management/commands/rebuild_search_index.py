@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from documents import chunks, search, vectors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text and semantic search indexes and the content sections for all existing documents."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            indexed = search.rebuild_index()
+
+        if indexed is None:
+            self.stdout.write(f"Search index rebuilt ({connection.vendor}).")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} documents."))
+
+        with transaction.atomic():
+            chunked = chunks.rebuild_chunks()
+        self.stdout.write(self.style.SUCCESS(f"Split {chunked} documents into sections."))
+
+        embedded = vectors.rebuild_vectors()
+        self.stdout.write(self.style.SUCCESS(f"Embedded {embedded} documents."))
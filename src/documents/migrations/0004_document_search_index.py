@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE documents_document_fts USING fts5("
+            "title, content, owner_id UNINDEXED, tokenize = 'porter unicode61')"
+        )
+        schema_editor.execute(
+            "INSERT INTO documents_document_fts (rowid, title, content, owner_id) "
+            "SELECT id, title, coalesce(content, ''), owner_id FROM documents_document WHERE active"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE INDEX documents_document_search_gin ON documents_document USING GIN ("
+            "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, '')))"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS documents_document_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS documents_document_search_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_alter_document_active_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
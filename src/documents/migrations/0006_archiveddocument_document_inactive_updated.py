@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0005_document_owner_active_recent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document_id', models.BigIntegerField(unique=True)),
+                ('title', models.CharField(default='Title')),
+                ('content', models.BinaryField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('deactivated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(condition=models.Q(('active', False)), fields=['updated_at'], name='document_inactive_updated'),
+        ),
+        migrations.AddField(
+            model_name='archiveddocument',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-18 14:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def chunk_existing_documents(apps, schema_editor):
+    from documents.chunks import split_content
+
+    Document = apps.get_model("documents", "Document")
+    DocumentChunk = apps.get_model("documents", "DocumentChunk")
+    docs = Document.objects.filter(active=True).values_list("id", "content").iterator(chunk_size=100)
+    batch = []
+    for doc_id, content in docs:
+        batch += [
+            DocumentChunk(document_id=doc_id, index=index, start=start, content=text)
+            for index, (start, text) in enumerate(split_content(content))
+        ]
+        if len(batch) >= 500:
+            DocumentChunk.objects.bulk_create(batch)
+            batch = []
+    DocumentChunk.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0006_archiveddocument_document_inactive_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField()),
+                ('start', models.PositiveIntegerField()),
+                ('content', models.TextField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='documents.document')),
+            ],
+            options={
+                'ordering': ['document', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('document', 'index'), name='document_chunk_unique_index')],
+            },
+        ),
+        migrations.RunPython(chunk_existing_documents, migrations.RunPython.noop),
+    ]
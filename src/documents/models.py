@@ -1,12 +1,32 @@
-from django.db import models
+import zstandard
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+from . import indexing
+
 # Create your models here.
 
 User = settings.AUTH_USER_MODEL
 
 
+class DocumentQuerySet(models.QuerySet):
+    def soft_delete(self):
+        """
+        Deactivate the matching active documents with a single UPDATE instead
+        of deleting them; archive_documents moves them out of the table later.
+        Returns the ids of the deactivated documents.
+        """
+        with transaction.atomic():
+            ids = list(self.filter(active=True).values_list("id", flat=True))
+            if ids:
+                Document.objects.filter(id__in=ids).update(
+                    active=False, active_at=None, updated_at=timezone.now()
+                )
+                indexing.documents_changed(ids)
+        return ids
+
+
 class Document(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(default="Title")
@@ -16,12 +36,127 @@ class Document(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = DocumentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Every tool lists/filters a user's active documents newest first;
+            # the trailing id makes the order total for keyset pagination.
+            models.Index(
+                fields=["owner", "-created_at", "-id"],
+                condition=models.Q(active=True),
+                name="document_owner_active_recent",
+            ),
+            # Lets the archival job find long-inactive rows without a scan
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(active=False),
+                name="document_inactive_updated",
+            ),
+        ]
+
     def __str__(self):
         return f" {self.title}"
 
+    # Fields whose changes affect the search indexes, and those that also
+    # affect the content chunks
+    INDEXED_FIELDS = {"owner", "title", "content", "active"}
+    CHUNKED_FIELDS = {"content", "active"}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_loaded()
+        return instance
+
+    def _remember_loaded(self, fields=None):
+        # Deferred fields are not remembered, so they can never look dirty
+        loaded = getattr(self, "_loaded", {}) if fields is not None else {}
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            if fields is None or field.name in fields or field.attname in fields:
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded = loaded
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._remember_loaded(fields)
+
+    def get_dirty_fields(self):
+        """Names of the fields changed since the row was loaded or last saved."""
+        loaded = getattr(self, "_loaded", None)
+        if loaded is None:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded and getattr(self, field.attname) != loaded[field.attname]
+        }
+
     def save(self, *args, **kwargs):
-        if self.active and self.active_at is None:
+        if not self.active:
+            self.active_at = None
+        elif self.active_at is None:
             self.active_at = timezone.now()
-        else:
-            self.active_at=None
+
+        dirty = None
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            dirty = self.get_dirty_fields()
+            if dirty is not None:
+                if not dirty:
+                    return
+                kwargs["update_fields"] = dirty | {"updated_at"}
+
         super().save(*args, **kwargs)
+        self._remember_loaded(kwargs.get("update_fields"))
+        if dirty is None or dirty & self.INDEXED_FIELDS:
+            indexing.documents_changed([self.pk], content=dirty is None or bool(dirty & self.CHUNKED_FIELDS))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        indexing.documents_removed(self.owner_id, [pk])
+        return result
+
+
+class DocumentChunk(models.Model):
+    """One section of a document's content; see documents.chunks."""
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name="chunks")
+    index = models.PositiveIntegerField()
+    # Character offset of the chunk in the full content
+    start = models.PositiveIntegerField()
+    content = models.TextField()
+
+    class Meta:
+        ordering = ["document", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["document", "index"], name="document_chunk_unique_index"),
+        ]
+
+    def __str__(self):
+        return f" {self.document_id}#{self.index}"
+
+
+class ArchivedDocument(models.Model):
+    """A long-inactive Document moved out of the hot table, content zstd-compressed."""
+    document_id = models.BigIntegerField(unique=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    title = models.CharField(default="Title")
+    content = models.BinaryField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    deactivated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f" {self.title} (archived)"
+
+    @staticmethod
+    def compress(text, level=10):
+        if text is None:
+            return None
+        return zstandard.ZstdCompressor(level=level).compress(text.encode("utf-8"))
+
+    def get_content(self):
+        if self.content is None:
+            return None
+        return zstandard.ZstdDecompressor().decompress(bytes(self.content)).decode("utf-8")
@@ -0,0 +1,58 @@
+"""
+Opaque continuation tokens for keyset pagination.
+
+A cursor records the sort key of the last row of a page, e.g. the
+(created_at, id) of the last listed document, so the next page is a
+`WHERE key < last` range scan over the owner/created_at index instead of an
+OFFSET that reads and discards every earlier row. Tokens are signed so
+clients can't forge or edit them, and they expire after CURSOR_MAX_AGE.
+"""
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+CURSOR_SALT = "documents.cursor"
+
+# Seconds a continuation token stays valid
+CURSOR_MAX_AGE = 60 * 60 * 24
+
+
+def encode_cursor(data):
+    return signing.dumps(data, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, kind):
+    """Return the payload of TOKEN; raises ValueError when it is invalid, expired or of another KIND."""
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT, max_age=CURSOR_MAX_AGE)
+    except signing.BadSignature:
+        raise ValueError("Invalid or expired cursor; start again without one.")
+    if not isinstance(data, dict) or data.get("k") != kind:
+        raise ValueError("This cursor belongs to a different listing; start again without one.")
+    return data
+
+
+def list_cursor(doc):
+    """Cursor pointing just after DOC in newest-first (created_at, id) order."""
+    return encode_cursor({"k": "list", "c": doc.created_at.isoformat(), "i": doc.id})
+
+
+def list_after(token):
+    """Filter selecting the documents that come after TOKEN in newest-first order."""
+    data = decode_cursor(token, "list")
+    created_at = datetime.fromisoformat(data["c"])
+    return Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=data["i"])
+
+
+def search_cursor(query, mode, result):
+    """Cursor pointing just after RESULT, a match of QUERY."""
+    return encode_cursor({"k": "search", "q": query, "m": mode, "s": result["score"], "i": result["id"]})
+
+
+def search_after(token, query, mode):
+    """Return the (score, id) of a search cursor issued for the same QUERY and MODE."""
+    data = decode_cursor(token, "search")
+    if data["q"] != query or data["m"] != mode:
+        raise ValueError("This cursor belongs to a different search; start again without one.")
+    return data["s"], data["i"]
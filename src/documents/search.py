@@ -0,0 +1,233 @@
+"""
+Full-text search over documents.
+
+SQLite uses an FTS5 table (``documents_document_fts``) that mirrors the
+active rows of ``documents_document`` and is ranked with BM25. PostgreSQL
+uses a GIN expression index over ``to_tsvector(title || content)`` and is
+ranked with ``ts_rank_cd``; the index is maintained by Postgres itself.
+Any other backend falls back to ``icontains`` filtering.
+
+Both tables are created in migration ``0004_document_search_index``.
+
+hybrid_search() fuses these keyword results with the semantic results of
+documents.vectors using reciprocal rank fusion, and points every result at
+its best matching content section (documents.chunks).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = "documents_document_fts"
+
+# Must match the expression used by the GIN index in 0004_document_search_index
+PG_VECTOR_SQL = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(content, ''))"
+
+SNIPPET_WORDS = 12
+
+
+def _vendor():
+    return connection.vendor
+
+
+def _fts5_query(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression: every word becomes a
+    quoted prefix term, so user input can never be parsed as FTS5 syntax.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def refresh_index(document_ids):
+    """
+    Re-sync the index rows for the given document ids from the documents
+    table. Inactive or missing documents are dropped from the index.
+    """
+    ids = [int(pk) for pk in document_ids if pk is not None]
+    if not ids or _vendor() != "sqlite":
+        return
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, content, owner_id) "
+            f"SELECT id, title, coalesce(content, ''), owner_id FROM documents_document "
+            f"WHERE id IN ({placeholders}) AND active",
+            ids,
+        )
+
+
+def remove_from_index(document_ids):
+    ids = [int(pk) for pk in document_ids if pk is not None]
+    if not ids or _vendor() != "sqlite":
+        return
+    placeholders = ", ".join(["%s"] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", ids)
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from the documents table. Returns the number of
+    indexed rows (None when the backend keeps its own index up to date).
+    """
+    vendor = _vendor()
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, owner_id) "
+                f"SELECT id, title, coalesce(content, ''), owner_id FROM documents_document WHERE active"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+            return cursor.fetchone()[0]
+        if vendor == "postgresql":
+            cursor.execute("REINDEX INDEX documents_document_search_gin")
+    return None
+
+
+def search_documents(owner_id, query, limit=5, after=None):
+    """
+    Return up to LIMIT active documents of OWNER_ID matching QUERY, best
+    match first, as dicts with ``id``, ``title``, ``snippet`` and ``score``.
+    AFTER is the (score, id) of the last result of the previous page; ties
+    on score are broken by id so pages never overlap.
+    """
+    query = (query or "").strip()
+    if not query:
+        return []
+
+    vendor = _vendor()
+    if vendor == "sqlite":
+        match = _fts5_query(query)
+        if not match:
+            return []
+        # bm25() is lower-is-better
+        bm25 = f"bm25({FTS_TABLE}, 5.0, 1.0, 0.0)"
+        keyset, keyset_params = "", []
+        if after is not None:
+            keyset = f"AND ({bm25} > %s OR ({bm25} = %s AND d.id > %s)) "
+            keyset_params = [after[0], after[0], after[1]]
+        sql = (
+            f"SELECT d.id, d.title, "
+            f"snippet({FTS_TABLE}, -1, '[', ']', '...', {SNIPPET_WORDS}), "
+            f"{bm25} AS score "
+            f"FROM {FTS_TABLE} JOIN documents_document d ON d.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND d.owner_id = %s AND d.active {keyset}"
+            f"ORDER BY score, d.id LIMIT %s"
+        )
+        params = [match, owner_id, *keyset_params, limit]
+    elif vendor == "postgresql":
+        rank = f"ts_rank_cd({PG_VECTOR_SQL}, q)"
+        keyset, keyset_params = "", []
+        if after is not None:
+            keyset = f"AND ({rank} < %s OR ({rank} = %s AND id > %s)) "
+            keyset_params = [after[0], after[0], after[1]]
+        sql = (
+            f"SELECT id, title, "
+            f"ts_headline('english', coalesce(content, ''), q, 'MaxWords={SNIPPET_WORDS * 2}, MinWords={SNIPPET_WORDS // 2}'), "
+            f"{rank} AS score "
+            f"FROM documents_document, websearch_to_tsquery('english', %s) q "
+            f"WHERE owner_id = %s AND active AND {PG_VECTOR_SQL} @@ q {keyset}"
+            f"ORDER BY score DESC, id LIMIT %s"
+        )
+        params = [query, owner_id, *keyset_params, limit]
+    else:
+        # Unranked (score None): the fallback has no keyset to continue from
+        return _search_documents_fallback(owner_id, query, limit) if after is None else []
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {"id": doc_id, "title": title, "snippet": snippet, "score": score}
+        for doc_id, title, snippet, score in rows
+    ]
+
+
+def _search_documents_fallback(owner_id, query, limit):
+    from .models import Document
+
+    qs = Document.objects.filter(
+        Q(owner_id=owner_id),
+        Q(active=True),
+        Q(title__icontains=query) | Q(content__icontains=query)
+    ).order_by("-created_at")
+    return [
+        {"id": doc.id, "title": doc.title, "snippet": None, "score": None}
+        for doc in qs[:limit]
+    ]
+
+
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+# Keyword and semantic candidates fused per query. Fixed, so every page of a
+# search ranks the same candidates and a cursor's score stays comparable
+HYBRID_CANDIDATES = 100
+
+
+class SearchResults(list):
+    """hybrid_search() results; TRUNCATED marks the last page of a ranking cut off at HYBRID_CANDIDATES."""
+    truncated = False
+
+
+def hybrid_search(owner_id, query, limit=5, mode="hybrid", after=None):
+    """
+    Search OWNER_ID's documents by keyword, by meaning ("semantic") or both
+    ("hybrid"). Results have the same shape as search_documents() plus the
+    ``section`` (chunk index) that matches best, or None; semantic only
+    matches have no snippet.
+
+    AFTER is the (score, id) of the last result already returned. Semantic
+    and hybrid results are the fusion of the top HYBRID_CANDIDATES of each
+    ranking, so they page through at most that many documents; when a page
+    exhausts them while a ranking had more matches, it is marked
+    ``truncated``. Keyword results page through every match.
+    """
+    from .models import Document
+    from .vectors import semantic_search
+
+    if mode == "keyword":
+        return SearchResults(_with_sections(search_documents(owner_id, query, limit=limit, after=after), query))
+
+    depth = max(HYBRID_CANDIDATES, limit)
+    semantic = semantic_search(owner_id, query, limit=depth)
+    keyword = search_documents(owner_id, query, limit=depth) if mode == "hybrid" else []
+
+    scores = {}
+    for rank, doc_id in enumerate([doc["id"] for doc in keyword]):
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    for rank, (doc_id, _) in enumerate(semantic):
+        scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+    if after is not None:
+        score, last_id = after
+        ranked = [doc_id for doc_id in ranked if scores[doc_id] < score or (scores[doc_id] == score and doc_id > last_id)]
+
+    # The vector index may lag behind deletes: drop dead or foreign documents
+    # before slicing, so a page is only short when the candidates run out
+    titles = dict(
+        Document.objects.filter(id__in=ranked, owner_id=owner_id, active=True).values_list("id", "title")
+    )
+    ranked = [doc_id for doc_id in ranked if doc_id in titles]
+    snippets = {doc["id"]: doc["snippet"] for doc in keyword}
+    results = SearchResults(_with_sections([
+        {"id": doc_id, "title": titles[doc_id], "snippet": snippets.get(doc_id), "score": scores[doc_id]}
+        for doc_id in ranked[:limit]
+    ], query))
+    # semantic_search() drops weak matches only after taking the top DEPTH,
+    # so a full list means there may be more matches past the window
+    results.truncated = len(ranked) <= limit and depth in (len(keyword), len(semantic))
+    return results
+
+
+def _with_sections(results, query):
+    from .chunks import best_sections
+
+    sections = best_sections([doc["id"] for doc in results], query)
+    for doc in results:
+        doc["section"] = sections.get(doc["id"])
+    return results
@@ -1,3 +1,311 @@
-from django.test import TestCase
+import fcntl
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from documents import pagination, search, vectors
+from documents.archive import archive_inactive_documents
+from documents.embeddings import get_embedder
+from documents.models import ArchivedDocument, Document
+
+User = get_user_model()
+
+
+class DocumentSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        self.other = User.objects.create_user(username="bob", password="pw")
+
+    def test_ranks_title_matches_first_and_scopes_to_owner(self):
+        body = Document.objects.create(owner=self.user, title="Notes", content="a long review of inception")
+        titled = Document.objects.create(owner=self.user, title="Inception", content="dream heist movie")
+        Document.objects.create(owner=self.other, title="Inception", content="someone else's notes")
+
+        results = search.search_documents(self.user.id, "inception")
+
+        self.assertEqual([r["id"] for r in results], [titled.id, body.id])
+
+    def test_index_follows_save_and_delete(self):
+        doc = Document.objects.create(owner=self.user, title="Draft", content="tenet")
+        self.assertEqual(len(search.search_documents(self.user.id, "tenet")), 1)
+
+        doc.content = "interstellar"
+        doc.save()
+        self.assertEqual(search.search_documents(self.user.id, "tenet"), [])
+        self.assertEqual(len(search.search_documents(self.user.id, "interstellar")), 1)
+
+        doc.delete()
+        self.assertEqual(search.search_documents(self.user.id, "interstellar"), [])
+
+    def test_query_syntax_is_escaped(self):
+        Document.objects.create(owner=self.user, title="Quotes", content='he said "hello" AND left')
+        self.assertEqual(len(search.search_documents(self.user.id, '"hello" AND (')), 1)
+
+
+class SemanticSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        vector_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(vector_dir.cleanup)
+        settings_override = override_settings(DOCUMENT_VECTOR_DIR=vector_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create(self, **kwargs):
+        # The vector index is updated once the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return Document.objects.create(owner=self.user, **kwargs)
+
+    def test_finds_documents_that_share_only_some_words(self):
+        space = self.create(title="Interstellar", content="space exploration through a wormhole")
+        self.create(title="Recipes", content="pasta with tomato sauce")
+
+        self.assertEqual(search.search_documents(self.user.id, "space movie"), [])
+        results = search.hybrid_search(self.user.id, "space movie")
+
+        self.assertEqual([r["id"] for r in results], [space.id])
+
+    def test_deleted_documents_leave_the_index(self):
+        doc = self.create(title="Interstellar", content="space exploration")
+        with self.captureOnCommitCallbacks(execute=True):
+            doc.delete()
+
+        self.assertEqual(search.hybrid_search(self.user.id, "space", mode="semantic"), [])
+
+    def test_index_is_loaded_once_and_follows_saves(self):
+        first = self.create(title="Interstellar", content="space exploration")
+        self.assertEqual(vectors.semantic_search(self.user.id, "space")[0][0], first.id)
+        index = vectors._load_index(self.user.id, get_embedder().dim)
+
+        second = self.create(title="Gravity", content="lost in space")
+
+        self.assertEqual({doc_id for doc_id, _ in vectors.semantic_search(self.user.id, "space")}, {first.id, second.id})
+        self.assertIs(vectors._load_index(self.user.id, get_embedder().dim), index)
+
+    def test_updates_from_other_processes_are_locked_out_and_picked_up(self):
+        first = self.create(title="Interstellar", content="space exploration")
+        vectors.semantic_search(self.user.id, "space")
+        lock_path = vectors._user_dir(self.user.id) / "lock"
+
+        with vectors._locked(self.user.id), open(lock_path) as other:
+            with self.assertRaises(BlockingIOError):
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        # Another worker saves its own copy of the index
+        embedder = get_embedder()
+        index = vectors.VectorIndex(vectors._user_dir(self.user.id), embedder.dim)
+        index.upsert(first.id + 1, embedder.embed(["lost in space"])[0])
+        index.save()
+
+        self.assertEqual({doc_id for doc_id, _ in vectors.semantic_search(self.user.id, "space")}, {first.id, first.id + 1})
+
+    def test_weak_matches_are_dropped(self):
+        self.create(title="Interstellar", content="space exploration through a wormhole")
+
+        with override_settings(DOCUMENT_MIN_SIMILARITY=0.5):
+            self.assertEqual(vectors.semantic_search(self.user.id, "space movie"), [])
+        self.assertEqual(len(vectors.semantic_search(self.user.id, "space movie")), 1)
+
+
+class SoftDeleteArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+
+    def test_soft_delete_deactivates_and_unindexes(self):
+        doc = Document.objects.create(owner=self.user, title="Tenet", content="inversion")
+
+        self.assertEqual(Document.objects.filter(id=doc.id).soft_delete(), [doc.id])
+
+        doc.refresh_from_db()
+        self.assertFalse(doc.active)
+        self.assertEqual(search.search_documents(self.user.id, "inversion"), [])
+        # Already inactive: nothing left to delete
+        self.assertEqual(Document.objects.filter(id=doc.id).soft_delete(), [])
+
+    def test_archives_only_long_inactive_documents(self):
+        old = Document.objects.create(owner=self.user, title="Old", content="x" * 10_000)
+        recent = Document.objects.create(owner=self.user, title="Recent", content="y")
+        kept = Document.objects.create(owner=self.user, title="Kept", content="z")
+        Document.objects.filter(id__in=[old.id, recent.id]).soft_delete()
+        Document.objects.filter(id=old.id).update(updated_at=timezone.now() - timedelta(days=90))
+
+        archived = archive_inactive_documents(older_than=timedelta(days=30), batch_size=1)
+
+        self.assertEqual(archived, 1)
+        self.assertEqual(set(Document.objects.values_list("id", flat=True)), {recent.id, kept.id})
+        cold = ArchivedDocument.objects.get(document_id=old.id)
+        self.assertLess(len(cold.content), 100)
+        self.assertEqual(cold.get_content(), "x" * 10_000)
+
+
+class DocumentSaveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+
+    def test_active_at_is_kept_across_saves(self):
+        doc = Document.objects.create(owner=self.user, title="Draft", content="a")
+        activated = doc.active_at
+        self.assertIsNotNone(activated)
+
+        doc.title = "Renamed"
+        doc.save()
+        doc.refresh_from_db()
+        self.assertEqual(doc.active_at, activated)
+
+        doc.active = False
+        doc.save()
+        doc.refresh_from_db()
+        self.assertIsNone(doc.active_at)
+
+    def test_save_writes_only_changed_fields(self):
+        doc = Document.objects.get(pk=Document.objects.create(owner=self.user, title="Draft", content="a").pk)
+
+        with self.assertNumQueries(0):
+            doc.save()
+
+        doc.title = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            doc.save()
+        update = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+        self.assertIn('"title"', update)
+        self.assertNotIn('"content"', update)
+        self.assertEqual(doc.get_dirty_fields(), set())
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        vector_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(vector_dir.cleanup)
+        settings_override = override_settings(DOCUMENT_VECTOR_DIR=vector_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.docs = [
+                Document.objects.create(owner=self.user, title=f"Space {i}", content="space " * (i % 3 + 1))
+                for i in range(7)
+            ]
+
+    def test_list_pages_follow_cursor_without_overlap(self):
+        # Same created_at for every row: the id tie-break must keep pages apart
+        Document.objects.update(created_at=timezone.now())
+        qs = Document.objects.filter(owner=self.user).order_by("-created_at", "-id")
+
+        seen, cursor = [], None
+        while True:
+            page = list((qs.filter(pagination.list_after(cursor)) if cursor else qs)[:3])
+            seen += [doc.id for doc in page]
+            if len(page) < 3:
+                break
+            cursor = pagination.list_cursor(page[-1])
+
+        self.assertEqual(seen, sorted((doc.id for doc in self.docs), reverse=True))
+
+    def test_search_pages_cover_every_match_once(self):
+        for mode in ("keyword", "hybrid"):
+            with self.subTest(mode=mode):
+                expected = [r["id"] for r in search.hybrid_search(self.user.id, "space", limit=10, mode=mode)]
+                pages, after = [], None
+                while True:
+                    page = search.hybrid_search(self.user.id, "space", limit=3, mode=mode, after=after)
+                    pages += [r["id"] for r in page]
+                    if not page:
+                        break
+                    after = (page[-1]["score"], page[-1]["id"])
+
+                self.assertEqual(len(expected), 7)
+                self.assertEqual(pages, expected)
+
+    def test_hybrid_pages_keep_documents_ranked_deep_in_both_lists(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            docs = [Document.objects.create(owner=self.user, title=f"Doc {i}", content="x") for i in range(25)]
+        # 11th in both rankings: fused, it outranks every document found by only one
+        both = docs[0]
+        keyword = [{"id": doc.id, "title": doc.title, "snippet": None, "score": 0} for doc in docs[1:11] + [both]]
+        semantic = [(doc.id, 0.5) for doc in docs[11:21] + [both]]
+
+        with mock.patch.object(search, "search_documents", lambda owner_id, query, limit, **kwargs: keyword[:limit]), \
+                mock.patch("documents.vectors.semantic_search", lambda owner_id, query, limit: semantic[:limit]):
+            pages, after = [], None
+            while page := search.hybrid_search(self.user.id, "space", limit=5, after=after):
+                pages += [r["id"] for r in page]
+                after = (page[-1]["score"], page[-1]["id"])
+
+        self.assertEqual(pages[0], both.id)
+        self.assertEqual(sorted(pages), sorted(doc.id for doc in docs[:21]))
+
+    def test_stale_vector_ids_do_not_shorten_pages(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            docs = [Document.objects.create(owner=self.user, title=f"Doc {i}", content="x") for i in range(5)]
+        # Deleted documents the vector index still knows about rank first
+        deleted = max(doc.id for doc in docs) + 1
+        semantic = [(deleted + i, 0.9) for i in range(3)] + [(doc.id, 0.5) for doc in docs]
+
+        with mock.patch("documents.vectors.semantic_search", lambda owner_id, query, limit: semantic[:limit]):
+            page = search.hybrid_search(self.user.id, "space", limit=5, mode="semantic")
+
+        self.assertEqual([r["id"] for r in page], [doc.id for doc in docs])
+
+    def test_last_page_of_a_cut_off_ranking_is_marked_truncated(self):
+        with mock.patch.object(search, "HYBRID_CANDIDATES", 4):
+            pages, after = [], None
+            while True:
+                page = search.hybrid_search(self.user.id, "space", limit=3, after=after)
+                pages.append((len(page), page.truncated))
+                if len(page) < 3:
+                    break
+                after = (page[-1]["score"], page[-1]["id"])
+
+        # 7 keyword matches, but only the top 4 of each ranking are fused
+        self.assertEqual([truncated for _, truncated in pages], [False] * (len(pages) - 1) + [True])
+        self.assertFalse(search.hybrid_search(self.user.id, "space", limit=10).truncated)
+
+    def test_cursor_is_tamper_proof_and_bound_to_its_query(self):
+        token = pagination.search_cursor("space", "hybrid", {"score": 1.0, "id": 1})
+        with self.assertRaises(ValueError):
+            pagination.search_after(token, "other", "hybrid")
+        with self.assertRaises(ValueError):
+            pagination.list_after(token)
+        with self.assertRaises(ValueError):
+            pagination.list_after(token[:-2] + "xx")
+
+
+@override_settings(DOCUMENT_CHUNK_SIZE=200)
+class DocumentChunkTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", password="pw")
+        paragraphs = [f"Paragraph {i} about {'wormholes' if i == 7 else 'nothing'} in particular." * 3 for i in range(10)]
+        self.content = "\n\n".join(paragraphs)
+        self.doc = Document.objects.create(owner=self.user, title="Long", content=self.content)
+
+    def test_chunks_cover_the_content_and_follow_edits(self):
+        chunks = list(self.doc.chunks.all())
+        self.assertGreater(len(chunks), 5)
+        for chunk in chunks:
+            self.assertLessEqual(len(chunk.content), 200)
+            self.assertEqual(self.content[chunk.start:chunk.start + len(chunk.content)], chunk.content)
+
+        # A rename leaves the chunks alone
+        chunk_ids = set(self.doc.chunks.values_list("id", flat=True))
+        self.doc.title = "Renamed"
+        self.doc.save()
+        self.assertEqual(set(self.doc.chunks.values_list("id", flat=True)), chunk_ids)
+
+        self.doc.content = "short"
+        self.doc.save()
+        self.assertEqual(list(self.doc.chunks.values_list("content", flat=True)), ["short"])
+
+        Document.objects.filter(id=self.doc.id).soft_delete()
+        self.assertFalse(self.doc.chunks.exists())
+
+    def test_search_points_at_the_matching_section(self):
+        results = search.hybrid_search(self.user.id, "wormholes", mode="keyword")
+
+        section = self.doc.chunks.get(index=results[0]["section"])
+        self.assertIn("wormholes", section.content)
@@ -0,0 +1,227 @@
+"""
+Per-user on-disk embedding index for semantic document search.
+
+Each user gets a directory under settings.DOCUMENT_VECTOR_DIR holding
+`vectors.f32`, a float32 matrix memory-mapped with NumPy (one row per
+document), and `ids.npy`, the document id of every row (0 marks a free row).
+Rows are updated in place when a document is saved or deleted; the matrix
+doubles in size when it runs out of free rows. A query is one vectorized
+matrix-vector product followed by a partial sort.
+
+Loaded indexes are kept per user in the process and updated in place by
+writes, so a query doesn't re-read `ids.npy`; an index whose `ids.npy` was
+replaced by another process is reloaded. Scores below
+settings.DOCUMENT_MIN_SIMILARITY are dropped as noise.
+
+The index is a derived cache: `manage.py rebuild_search_index` recreates it
+from the database. Reads and writes of one user are serialized by a thread
+lock within a process and by `flock` on the user's `lock` file across worker
+processes (shared for queries, exclusive for updates).
+"""
+import os
+import shutil
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: indexes are only locked within the process
+    fcntl = None
+
+import numpy as np
+from django.conf import settings
+
+from .embeddings import get_embedder
+
+INITIAL_CAPACITY = 64
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+# Loaded VectorIndex per user directory (least recently used first); an
+# index is only used under its user's lock
+MAX_LOADED_INDEXES = 256
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class VectorIndex:
+    def __init__(self, directory, dim):
+        self.directory = Path(directory)
+        self.dim = dim
+        self.vectors_path = self.directory / "vectors.f32"
+        self.ids_path = self.directory / "ids.npy"
+
+        if self.ids_path.exists():
+            self.ids = np.load(self.ids_path)
+        else:
+            self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = self._open(len(self.ids)) if len(self.ids) else None
+        self.rows = {int(doc_id): row for row, doc_id in enumerate(self.ids) if doc_id}
+        self.version = self._ids_version()
+
+    def _ids_version(self):
+        try:
+            stat = self.ids_path.stat()
+        except FileNotFoundError:
+            return None
+        # save() replaces the file, so a new inode marks a new version even
+        # within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def is_stale(self):
+        """Whether another process saved the index since it was loaded."""
+        return self._ids_version() != self.version
+
+    def _open(self, capacity):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        size = capacity * self.dim * np.dtype(np.float32).itemsize
+        with open(self.vectors_path, "ab") as f:
+            # Grow the file in place; existing rows keep their offsets
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _grow(self):
+        capacity = max(INITIAL_CAPACITY, len(self.ids) * 2)
+        if self.vectors is not None:
+            self.vectors.flush()
+        self.ids = np.concatenate([self.ids, np.zeros(capacity - len(self.ids), dtype=np.int64)])
+        self.vectors = self._open(capacity)
+
+    def upsert(self, doc_id, vector):
+        row = self.rows.get(doc_id)
+        if row is None:
+            free = np.flatnonzero(self.ids == 0)
+            if not len(free):
+                self._grow()
+                free = np.flatnonzero(self.ids == 0)
+            row = int(free[0])
+            self.ids[row] = doc_id
+            self.rows[doc_id] = row
+        self.vectors[row] = vector
+
+    def remove(self, doc_id):
+        row = self.rows.pop(doc_id, None)
+        if row is not None:
+            self.ids[row] = 0
+            self.vectors[row] = 0.0
+
+    def search(self, query_vector, k):
+        if not self.rows:
+            return []
+        scores = self.vectors @ query_vector
+        scores[self.ids == 0] = -np.inf
+        k = min(k, len(self.rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[row]), float(scores[row])) for row in top]
+
+    def save(self):
+        if self.vectors is not None:
+            self.vectors.flush()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / "ids.tmp.npy"
+        np.save(tmp_path, self.ids)
+        os.replace(tmp_path, self.ids_path)
+        self.version = self._ids_version()
+
+
+def _user_dir(owner_id):
+    return Path(settings.DOCUMENT_VECTOR_DIR) / f"user_{int(owner_id)}"
+
+
+@contextmanager
+def _locked(owner_id, exclusive=True):
+    """Hold OWNER_ID's index lock, in this process and across processes."""
+    with _locks_lock:
+        lock = _locks.setdefault(owner_id, threading.Lock())
+    with lock:
+        if fcntl is None:
+            yield
+            return
+        directory = _user_dir(owner_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / "lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            # Closing the file releases the lock
+            yield
+
+
+def _load_index(owner_id, dim):
+    """The loaded index of OWNER_ID; the caller holds the user's lock."""
+    directory = _user_dir(owner_id)
+    with _indexes_lock:
+        index = _indexes.get(directory)
+    if index is None or index.dim != dim or index.is_stale():
+        index = VectorIndex(directory, dim)
+    with _indexes_lock:
+        _indexes[directory] = index
+        _indexes.move_to_end(directory)
+        while len(_indexes) > MAX_LOADED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def _document_text(title, content):
+    return f"{title or ''}\n{content or ''}"
+
+
+def refresh_vectors(document_ids):
+    """Re-embed the given documents; inactive or missing ones are removed."""
+    from .models import Document
+
+    rows = Document.objects.filter(id__in=document_ids).values_list("id", "owner_id", "title", "content", "active")
+    by_owner = defaultdict(list)
+    for row in rows:
+        by_owner[row[1]].append(row)
+
+    embedder = get_embedder()
+    for owner_id, docs in by_owner.items():
+        active = [doc for doc in docs if doc[4]]
+        vectors = embedder.embed([_document_text(doc[2], doc[3]) for doc in active]) if active else []
+        with _locked(owner_id):
+            index = _load_index(owner_id, embedder.dim)
+            for doc, vector in zip(active, vectors):
+                index.upsert(doc[0], vector)
+            for doc in docs:
+                if not doc[4]:
+                    index.remove(doc[0])
+            index.save()
+
+
+def remove_vectors(owner_id, document_ids):
+    if not _user_dir(owner_id).exists():
+        return
+    with _locked(owner_id):
+        index = _load_index(owner_id, get_embedder().dim)
+        for doc_id in document_ids:
+            index.remove(int(doc_id))
+        index.save()
+
+
+def rebuild_vectors(batch_size=500):
+    """Recreate every user's index from the database. Returns the number of indexed documents."""
+    from .models import Document
+
+    shutil.rmtree(settings.DOCUMENT_VECTOR_DIR, ignore_errors=True)
+    with _indexes_lock:
+        _indexes.clear()
+    ids = list(Document.objects.filter(active=True).order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), batch_size):
+        refresh_vectors(ids[start:start + batch_size])
+    return len(ids)
+
+
+def semantic_search(owner_id, query, limit=5):
+    """Return [(document_id, cosine_similarity)] of OWNER_ID's documents closest to QUERY."""
+    directory = _user_dir(owner_id)
+    if not directory.exists() or not (query or "").strip():
+        return []
+    embedder = get_embedder()
+    query_vector = embedder.embed([query])[0]
+    with _locked(owner_id, exclusive=False):
+        found = _load_index(owner_id, embedder.dim).search(query_vector, limit)
+    return [(doc_id, score) for doc_id, score in found if score >= settings.DOCUMENT_MIN_SIMILARITY]
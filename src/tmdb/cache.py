@@ -0,0 +1,170 @@
+"""
+Two-tier cache for TMDB responses.
+
+An in-process LRU (TTLCache) answers repeated lookups without leaving the
+process; behind it a Django cache backend (settings.TMDB_CACHE_ALIAS, a file
+cache by default) keeps responses across restarts and workers. Entries carry
+their own expiry so both tiers agree on when a response goes stale.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time to live."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def normalize(value):
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip().lower()
+    return value
+
+
+def make_key(endpoint, params):
+    """
+    Build a cache key from the endpoint name and its normalized params, so
+    "Inception", " inception " and "INCEPTION" share one entry.
+    """
+    normalized = {key: normalize(value) for key, value in params.items()}
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+    return f"tmdb:{endpoint}:{digest}"
+
+
+class TMDBCache:
+    def __init__(self, maxsize=1024, alias=None):
+        self.local = TTLCache(maxsize=maxsize)
+        self.alias = alias
+        # Updated from movie_details_batch worker threads
+        self.counters = Counter()
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    @property
+    def persistent(self):
+        return caches[self.alias] if self.alias else None
+
+    def ttl_for(self, endpoint):
+        ttls = getattr(settings, "TMDB_CACHE_TTLS", {})
+        return ttls.get(endpoint, ttls.get("default", 3600))
+
+    def _get_local(self, key):
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count("memory_hits")
+            return value
+        return None
+
+    def _from_persistent(self, key, entry):
+        if entry is not None:
+            remaining = entry["expires_at"] - time.time()
+            if remaining > 0:
+                self._count("persistent_hits")
+                self.local.set(key, entry["data"], remaining)
+                return entry["data"]
+        self._count("misses")
+        return None
+
+    def get(self, key):
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        entry = self.persistent.get(key) if self.persistent is not None else None
+        return self._from_persistent(key, entry)
+
+    async def aget(self, key):
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        entry = await self.persistent.aget(key) if self.persistent is not None else None
+        return self._from_persistent(key, entry)
+
+    def set(self, key, value, endpoint):
+        ttl = self.ttl_for(endpoint)
+        self.local.set(key, value, ttl)
+        if self.persistent is not None:
+            self.persistent.set(key, {"data": value, "expires_at": time.time() + ttl}, ttl)
+
+    async def aset(self, key, value, endpoint):
+        ttl = self.ttl_for(endpoint)
+        self.local.set(key, value, ttl)
+        if self.persistent is not None:
+            await self.persistent.aset(key, {"data": value, "expires_at": time.time() + ttl}, ttl)
+
+    def clear(self):
+        self.local.clear()
+        if self.persistent is not None:
+            self.persistent.clear()
+
+    def stats(self):
+        with self._counters_lock:
+            counters = Counter(self.counters)
+        memory_hits, persistent_hits, misses = counters["memory_hits"], counters["persistent_hits"], counters["misses"]
+        hits = memory_hits + persistent_hits
+        lookups = hits + misses
+        return {
+            "memory_hits": memory_hits,
+            "persistent_hits": persistent_hits,
+            "misses": misses,
+            "evictions": self.local.evictions,
+            "size": len(self.local),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+tmdb_cache = TMDBCache(
+    maxsize=getattr(settings, "TMDB_CACHE_MAX_ENTRIES", 1024),
+    alias=getattr(settings, "TMDB_CACHE_ALIAS", None),
+)
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from tmdb import client as tmdb_client
+
+
+class Command(BaseCommand):
+    help = "Pre-populate the TMDB response cache for the given searches and movie IDs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", help="Search queries to cache")
+        parser.add_argument("--movie-id", type=int, action="append", default=[], dest="movie_ids")
+        parser.add_argument(
+            "--details",
+            type=int,
+            default=3,
+            help="Also cache the details of the top N results of each query",
+        )
+
+    def handle(self, *args, **options):
+        stats = tmdb_client.warm_cache(
+            queries=options["queries"],
+            movie_ids=options["movie_ids"],
+            details_per_query=options["details"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"TMDB cache warmed: {stats['size']} entries in memory, "
+            f"{stats['misses']} fetched from TMDB"
+        ))
@@ -0,0 +1,183 @@
+"""
+Local stand-in for the TMDB API, for benchmarks and offline runs.
+
+StubTMDBServer answers the endpoints tmdb.client uses (/search/movie and
+/movie/<id>) with deterministic, realistically sized responses. It runs
+on a free localhost port in a background thread; point
+settings.TMDB_BASE_URL at its `url`. With FAILURES (settable at any
+time), the next that many requests answer 503, to exercise retries.
+
+    with StubTMDBServer(latency=0.05) as server:
+        with override_settings(TMDB_BASE_URL=server.url):
+            ...
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RESULTS_PER_PAGE = 20
+TOTAL_RESULTS = 60
+
+GENRES = [
+    {"id": 28, "name": "Action"},
+    {"id": 12, "name": "Adventure"},
+    {"id": 18, "name": "Drama"},
+    {"id": 878, "name": "Science Fiction"},
+    {"id": 53, "name": "Thriller"},
+]
+
+OVERVIEW = (
+    "A team of specialists takes on one last job that sends them further than anyone has gone before. "
+    "As the stakes rise, they must decide what they are willing to lose to finish it."
+)
+
+
+def _number(*parts):
+    return int(hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:8], 16)
+
+
+def movie_summary(movie_id, title=None):
+    """A /search/movie result."""
+    n = _number(movie_id)
+    return {
+        "adult": False,
+        "backdrop_path": f"/backdrop{movie_id}.jpg",
+        "genre_ids": [GENRES[n % len(GENRES)]["id"], GENRES[(n // 7) % len(GENRES)]["id"]],
+        "id": movie_id,
+        "original_language": "en",
+        "original_title": title or f"Movie {movie_id}",
+        "overview": OVERVIEW,
+        "popularity": round(n % 10000 / 100, 3),
+        "poster_path": f"/poster{movie_id}.jpg",
+        "release_date": f"{1980 + n % 45}-{1 + n % 12:02d}-{1 + n % 28:02d}",
+        "title": title or f"Movie {movie_id}",
+        "video": False,
+        "vote_average": round(5 + n % 50 / 10, 1),
+        "vote_count": n % 30000,
+    }
+
+
+def movie_detail(movie_id):
+    """A /movie/<id> response."""
+    n = _number(movie_id)
+    return {
+        **movie_summary(movie_id),
+        "belongs_to_collection": None,
+        "budget": (n % 200) * 1_000_000,
+        "genres": [GENRES[n % len(GENRES)], GENRES[(n // 7) % len(GENRES)]],
+        "homepage": f"https://example.com/movies/{movie_id}",
+        "imdb_id": f"tt{n % 10_000_000:07d}",
+        "origin_country": ["US"],
+        "production_companies": [
+            {"id": n % 1000 + i, "logo_path": f"/logo{i}.png", "name": f"Studio {n % 1000 + i}", "origin_country": "US"}
+            for i in range(3)
+        ],
+        "production_countries": [{"iso_3166_1": "US", "name": "United States of America"}],
+        "revenue": (n % 900) * 1_000_000,
+        "runtime": 90 + n % 80,
+        "spoken_languages": [{"english_name": "English", "iso_639_1": "en", "name": "English"}],
+        "status": "Released",
+        "tagline": "Some doors should stay closed.",
+    }
+
+
+def search_results(query, page=1):
+    """A /search/movie response: TOTAL_RESULTS movies per query, paged."""
+    first = (page - 1) * RESULTS_PER_PAGE
+    ids = [_number(query.lower(), i) % 1_000_000 + 1 for i in range(first, min(first + RESULTS_PER_PAGE, TOTAL_RESULTS))]
+    return {
+        "page": page,
+        "results": [movie_summary(movie_id, f"{query.title()} {first + i + 1}") for i, movie_id in enumerate(ids)],
+        "total_pages": -(-TOTAL_RESULTS // RESULTS_PER_PAGE),
+        "total_results": TOTAL_RESULTS,
+    }
+
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        with self.server.lock:
+            self.server.requests += 1
+            failing = self.server.requests <= self.server.failures
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if failing:
+            self._send(503, {"success": False, "status_code": 11, "status_message": "Service unavailable."})
+        elif parts[-2:] == ["search", "movie"]:
+            self._send(200, search_results(params.get("query", ""), int(params.get("page", 1))))
+        elif len(parts) >= 2 and parts[-2] == "movie" and parts[-1].isdigit():
+            self._send(200, movie_detail(int(parts[-1])))
+        else:
+            self._send(404, {"success": False, "status_code": 34, "status_message": "The resource you requested could not be found."})
+
+    def _send(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubTMDBServer:
+    def __init__(self, latency=0.0, failures=0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self._failures = failures
+        self.address = (host, port)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    @property
+    def requests(self):
+        return self._server.requests if self._server else 0
+
+    @property
+    def failures(self):
+        return self._failures
+
+    @failures.setter
+    def failures(self, count):
+        """Answer 503 to the next COUNT requests."""
+        self._failures = count
+        if self._server is not None:
+            with self._server.lock:
+                self._server.failures = self._server.requests + count
+
+    def start(self):
+        self._server = ThreadingHTTPServer(self.address, StubTMDBHandler)
+        self._server.daemon_threads = True
+        self._server.latency = self.latency
+        self._server.failures = self._failures
+        self._server.lock = threading.Lock()
+        self._server.requests = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-tmdb", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,123 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from tmdb import client
+from tmdb.cache import TMDBCache, TTLCache, tmdb_cache
+from tmdb.stub import StubTMDBServer
+
+
+class StubTMDBTestCase(SimpleTestCase):
+    """Runs every test against a local StubTMDBServer with a cold, in-process only cache."""
+
+    def setUp(self):
+        self.server = StubTMDBServer().start()
+        self.addCleanup(self.server.stop)
+        settings_override = override_settings(TMDB_BASE_URL=self.server.url, TMDB_API_KEY="test", TMDB_BACKOFF_FACTOR=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        alias, tmdb_cache.alias = tmdb_cache.alias, None
+        self.addCleanup(setattr, tmdb_cache, "alias", alias)
+        tmdb_cache.local.clear()
+        tmdb_cache.counters.clear()
+        client.reset_clients()
+        self.addCleanup(client.reset_clients)
+
+
+class MovieDetailsBatchTests(StubTMDBTestCase):
+    def test_fetches_each_movie_once_and_reports_failures(self):
+        batch = client.movie_details_batch([27205, 155, 27205, -1])
+
+        self.assertEqual([movie["id"] for movie in batch["results"]], [27205, 155])
+        self.assertEqual(list(batch["errors"]), [-1])
+        self.assertEqual(self.server.requests, 3)
+
+    def test_async_batch_matches_the_sync_one(self):
+        expected = client.movie_details_batch([27205, 155, -1])
+
+        self.assertEqual(asyncio.run(client.amovie_details_batch([27205, 155, -1])), expected)
+
+
+class TMDBClientTests(StubTMDBTestCase):
+    def test_retries_unavailable_responses(self):
+        self.server.failures = 2
+
+        self.assertEqual(client.movie_detail(27205)["id"], 27205)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_async_client_retries_unavailable_responses(self):
+        self.server.failures = 2
+
+        self.assertEqual(asyncio.run(client.amovie_detail(27205))["id"], 27205)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_caches_answers_but_not_errors(self):
+        self.server.failures = 4
+        # Still failing after TMDB_MAX_RETRIES retries
+        self.assertIs(client.movie_detail(27205)["success"], False)
+
+        self.assertEqual(client.movie_detail(27205)["id"], 27205)
+        self.assertEqual(client.movie_detail(27205)["id"], 27205)
+        self.assertEqual(asyncio.run(client.amovie_detail(27205))["id"], 27205)
+        self.assertEqual(self.server.requests, 5)
+
+    def test_async_clients_are_kept_per_loop(self):
+        tmdb = client.get_async_client()
+
+        async def lookups():
+            await tmdb.movie_detail(1)
+            first = tmdb.client
+            await tmdb.movie_detail(2)
+            return first, tmdb.client
+
+        first, second = asyncio.run(lookups())
+        self.assertIs(first, second)
+        # A later loop gets a new client and the finished loop's one is dropped
+        third, _ = asyncio.run(lookups())
+        self.assertIsNot(third, first)
+        self.assertEqual(len(tmdb._clients), 1)
+
+
+class TMDBCacheTests(SimpleTestCase):
+    def test_local_tier_evicts_least_recently_used_and_expires(self):
+        local = TTLCache(maxsize=2)
+        local.set("a", 1, ttl=60)
+        local.set("b", 2, ttl=60)
+        local.get("a")
+        local.set("c", 3, ttl=60)
+
+        self.assertIsNone(local.get("b"))
+        self.assertEqual((local.get("a"), local.get("c"), local.evictions), (1, 3, 1))
+
+        local.set("stale", 4, ttl=0)
+        self.assertIsNone(local.get("stale"))
+
+    def test_persistent_tier_refills_memory_until_the_entry_expires(self):
+        caches["default"].clear()
+        self.addCleanup(caches["default"].clear)
+        persistent = caches["default"]
+        persistent.set("fresh", {"data": {"id": 1}, "expires_at": time.time() + 60})
+        persistent.set("stale", {"data": {"id": 2}, "expires_at": time.time() - 1})
+        cache = TMDBCache(alias="default")
+
+        self.assertEqual(cache.get("fresh"), {"id": 1})
+        self.assertEqual(cache.get("fresh"), {"id": 1})
+        self.assertIsNone(cache.get("stale"))
+        stats = cache.stats()
+        self.assertEqual((stats["persistent_hits"], stats["memory_hits"], stats["misses"]), (1, 1, 1))
+
+        cache.set("new", {"id": 3}, "movie_detail")
+        self.assertEqual(persistent.get("new")["data"], {"id": 3})
+
+    def test_counters_are_exact_under_concurrent_lookups(self):
+        cache = TMDBCache()
+        cache.set("key", {"id": 1}, "movie_detail")
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: [cache.get("key") for _ in range(500)], range(8)))
+
+        self.assertEqual(cache.stats()["memory_hits"], 4000)